@@ -1,6 +1,8 @@
 import os
 import sys
+import threading
 import unittest
+from datetime import UTC, datetime, timedelta
 from unittest.mock import Mock, patch
 
 # Set environment variables for testing
@@ -9,6 +11,8 @@ os.environ["FLASK_SECRET_KEY"] = "test-secret-key"
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "shared_libs"))
 
+import jobs
+
 import app
 
 
@@ -16,6 +20,25 @@ class TestAdmin(unittest.TestCase):
     def setUp(self):
         app.app.config["TESTING"] = True
         self.client = app.app.test_client()
+        # Upload jobs run as their request is handled, against mock records
+        patcher = patch("jobs.runner", jobs.JobRunner(max_workers=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("database.create_job", return_value="job-1")
+        self.mock_create_job = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("database.update_job")
+        self.mock_update_job = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _job_outcome(self):
+        """Get the fields the last upload job recorded when it finished"""
+        return self.mock_update_job.call_args[0][1]
+
+    def _consume_results(self, season_name, race_name, chunks, progress=None):
+        """Stand in for add_race_results_stream, keeping the results it reads"""
+        self.written_results = [result for chunk in chunks for result in chunk]
+        return len(self.written_results)
 
     def test_participants_requires_login(self):
         response = self.client.get("/participants")
@@ -29,16 +52,98 @@ class TestAdmin(unittest.TestCase):
     @patch("database.get_participants")
     def test_get_participants_api_with_auth(self, mock_get_participants, mock_is_admin):
         mock_is_admin.return_value = True
-        mock_get_participants.return_value = [
-            {"barcode": "A123456", "first_name": "John"}
-        ]
+        mock_get_participants.return_value = {
+            "participants": [{"barcode": "A123456", "first_name": "John"}],
+            "next_cursor": None,
+        }
 
         with self.client.session_transaction() as sess:
             sess["user"] = {"email": "test@example.com"}
 
         response = self.client.get("/api/participants")
         self.assertEqual(response.status_code, 200)
-        self.assertIsInstance(response.json, list)
+        self.assertIsInstance(response.json["participants"], list)
+        self.assertIsNone(response.json["next_cursor"])
+
+    @patch("database.is_admin_email")
+    @patch("database.get_participants")
+    def test_get_participants_api_search(self, mock_get_participants, mock_is_admin):
+        mock_is_admin.return_value = True
+        mock_get_participants.return_value = {
+            "participants": [{"barcode": "A123456", "first_name": "John"}],
+            "total_count": 1,
+            "next_cursor": "next-token",
+        }
+
+        with self.client.session_transaction() as sess:
+            sess["user"] = {"email": "test@example.com"}
+
+        response = self.client.get("/api/participants?search=jo&page_size=10")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json,
+            {
+                "participants": [{"barcode": "A123456", "first_name": "John"}],
+                "next_cursor": "next-token",
+            },
+        )
+        mock_get_participants.assert_called_with(page_size=10, search="jo", cursor=None)
+
+        mock_get_participants.side_effect = ValueError("Invalid participant cursor")
+        response = self.client.get("/api/participants?cursor=bad")
+        self.assertEqual(response.status_code, 400)
+
+    @patch("database.is_admin_email")
+    @patch("database.get_participants")
+    def test_participants_page_with_cursor(self, mock_get_participants, mock_is_admin):
+        mock_is_admin.return_value = True
+        mock_get_participants.return_value = {
+            "participants": [],
+            "total_count": 120,
+            "page": 2,
+            "page_size": 50,
+            "total_pages": 3,
+            "next_cursor": "next-token",
+            "prev_cursor": "prev-token",
+        }
+
+        with self.client.session_transaction() as sess:
+            sess["user"] = {"email": "test@example.com"}
+
+        response = self.client.get("/participants?page=2&cursor=abc")
+        self.assertEqual(response.status_code, 200)
+        mock_get_participants.assert_called_with(page=2, search=None, cursor="abc")
+        self.assertIn(b"cursor=next-token", response.data)
+        self.assertIn(b"cursor=prev-token", response.data)
+
+        # The search term is escaped in every pagination link
+        response = self.client.get("/participants?page=2&search=a%26page%3D9+%231")
+        self.assertEqual(response.data.count(b"search=a%26page%3D9+%231"), 4)
+        self.assertNotIn(b"&page=9", response.data)
+
+    @patch("database.is_admin_email")
+    @patch("database.get_participants")
+    def test_participants_page_invalid_cursor(
+        self, mock_get_participants, mock_is_admin
+    ):
+        mock_is_admin.return_value = True
+        mock_get_participants.side_effect = [
+            ValueError("Invalid participant cursor"),
+            {
+                "participants": [],
+                "total_count": 0,
+                "page": 2,
+                "page_size": 50,
+                "total_pages": 0,
+            },
+        ]
+
+        with self.client.session_transaction() as sess:
+            sess["user"] = {"email": "test@example.com"}
+
+        response = self.client.get("/participants?page=2&cursor=bad")
+        self.assertEqual(response.status_code, 200)
+        mock_get_participants.assert_called_with(page=2, search=None)
 
     def test_get_participants_api_no_auth(self):
         response = self.client.get("/api/participants")
@@ -320,12 +425,19 @@ class TestAdmin(unittest.TestCase):
 
     @patch("database.is_admin_email")
     @patch("database.get_clubs")
+    @patch("database.diff_participants")
     @patch("database.process_participants_batch")
     def test_upload_participants_with_file(
-        self, mock_batch, mock_get_clubs, mock_is_admin
+        self, mock_batch, mock_diff, mock_get_clubs, mock_is_admin
     ):
         mock_is_admin.return_value = True
         mock_get_clubs.return_value = [{"name": "Test Club", "short_names": ["TC"]}]
+        mock_diff.return_value = {
+            "new": [{"barcode": "A123456", "first_name": "John"}],
+            "updated": [],
+            "unchanged": 0,
+            "reads": 2,
+        }
 
         with self.client.session_transaction() as sess:
             sess["user"] = {"email": "test@example.com"}
@@ -333,12 +445,18 @@ class TestAdmin(unittest.TestCase):
         # Create a mock CSV file
         from io import BytesIO
 
-        csv_data = b"A123456,John,Doe,Male,01/01/1990,Test Club\n"
+        csv_data = b"ID,Fname,LName,Gender,DOB,Club\nA123456,John,Doe,Male,01/01/1990,Test Club\n"
 
         response = self.client.post(
             "/upload_participants", data={"file": (BytesIO(csv_data), "test.csv")}
         )
         self.assertEqual(response.status_code, 302)
+        records = mock_diff.call_args[0][0]
+        self.assertEqual(records[0]["barcode"], "A123456")
+        self.assertEqual(records[0]["date_of_birth"], "1990-01-01")
+        mock_batch.assert_called_once_with(
+            [{"barcode": "A123456", "first_name": "John"}], []
+        )
 
     def test_login_route(self):
         response = self.client.get("/login")
@@ -511,19 +629,73 @@ class TestAdmin(unittest.TestCase):
 
     @patch("database.is_admin_email")
     @patch("database.get_season")
-    @patch("database.get_participant")
-    @patch("database.add_race_results_batch")
+    @patch("database.get_participants_by_barcodes")
+    @patch("database.add_race_results_stream")
+    def test_process_upload_results_streams_chunks(
+        self, mock_stream, mock_get_participants, mock_get_season, mock_is_admin
+    ):
+        mock_is_admin.return_value = True
+        mock_get_season.return_value = {"start_date": "2024-01-01"}
+        mock_get_participants.return_value = {}
+        chunks_read = []
+
+        def write(season_name, race_name, chunks, progress=None):
+            for chunk in chunks:
+                # Each chunk is resolved only as the writer reaches it
+                chunks_read.append((len(chunk), mock_get_participants.call_count))
+            return sum(size for size, _ in chunks_read)
+
+        mock_stream.side_effect = write
+
+        with self.client.session_transaction() as sess:
+            sess["user"] = {"email": "test@example.com"}
+
+        from io import BytesIO
+
+        rows = [f"A{100000 + i},P{i + 1}" for i in range(1200)]
+        rows += ["A100000,P1", "B1,P2000"]
+        csv_data = "\ufeff" + "\n".join(rows) + "\n"
+
+        response = self.client.post(
+            "/process_upload_results",
+            data={
+                "season_name": "2024",
+                "race_name": "Test Race",
+                "file": (BytesIO(csv_data.encode()), "results.csv"),
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.location.endswith("/jobs/job-1"))
+        self.assertEqual(chunks_read, [(500, 1), (500, 2), (200, 3)])
+        self.assertEqual(mock_get_participants.call_args_list[0][0][0][0], "A100000")
+        outcome = self._job_outcome()
+        self.assertEqual(outcome["status"], "done")
+        self.assertEqual(
+            outcome["message"],
+            "Uploaded 1200 results successfully! Warning: 1 duplicate finish "
+            "tokens were skipped: P1. Skipped 1 rows with invalid barcodes.",
+        )
+        self.assertEqual(outcome["progress"]["parsed"], 1202)
+        self.assertEqual(outcome["progress"]["rejected"], 2)
+
+    @patch("database.is_admin_email")
+    @patch("database.get_season")
+    @patch("database.get_participants_by_barcodes")
+    @patch("database.add_race_results_stream")
     def test_process_upload_results_with_file(
-        self, mock_batch, mock_get_participant, mock_get_season, mock_is_admin
+        self, mock_stream, mock_get_participants, mock_get_season, mock_is_admin
     ):
         mock_is_admin.return_value = True
+        mock_stream.side_effect = self._consume_results
         mock_get_season.return_value = {"start_date": "2024-01-01"}
-        mock_get_participant.return_value = {
-            "first_name": "John",
-            "last_name": "Doe",
-            "gender": "Male",
-            "date_of_birth": "1990-01-01",
-            "club": "Test Club",
+        mock_get_participants.return_value = {
+            "A123456": {
+                "first_name": "John",
+                "last_name": "Doe",
+                "gender": "Male",
+                "date_of_birth": "1970-01-01",
+                "club": "Test Club",
+            }
         }
 
         with self.client.session_transaction() as sess:
@@ -531,7 +703,7 @@ class TestAdmin(unittest.TestCase):
 
         from io import BytesIO
 
-        csv_data = b"ID,Pos\nA123456,1\n"
+        csv_data = b"A123456,P1\nA654321,P2\n"
 
         response = self.client.post(
             "/process_upload_results",
@@ -542,6 +714,12 @@ class TestAdmin(unittest.TestCase):
             },
         )
         self.assertEqual(response.status_code, 302)
+        mock_get_participants.assert_called_once_with(["A123456", "A654321"])
+        results_data = self.written_results
+        self.assertEqual(results_data[0]["participant"]["age_category"], "V50")
+        self.assertEqual(
+            results_data[1]["participant"], {"parkrun_barcode_id": "A654321"}
+        )
 
     @patch("database.is_admin_email")
     @patch("database.validate_barcode")
@@ -648,6 +826,199 @@ class TestAdmin(unittest.TestCase):
         self.assertIn(b"Running Clubs", response.data)
         self.assertIn(b"Test Club", response.data)
 
+    @patch("database.is_admin_email")
+    @patch("database.get_clubs")
+    @patch("database.diff_participants")
+    @patch("database.process_participants_batch")
+    def test_upload_participants_job_outcome(
+        self, mock_batch, mock_diff, mock_get_clubs, mock_is_admin
+    ):
+        mock_is_admin.return_value = True
+        mock_get_clubs.return_value = [{"name": "Test Club", "short_names": ["TC"]}]
+        mock_diff.return_value = {
+            "new": [{"barcode": "A123456"}],
+            "updated": [{"barcode": "A654321"}],
+            "unchanged": 0,
+            "reads": 2,
+        }
+
+        with self.client.session_transaction() as sess:
+            sess["user"] = {"email": "test@example.com"}
+
+        from io import BytesIO
+
+        csv_data = (
+            b"ID,Fname,LName,Gender,DOB,Club\n"
+            b"A123456,John,Doe,Male,01/01/1990,Test Club\n"
+            b"A654321,Jane,Doe,Female,01/01/1991,Test Club\n"
+            b"B1,Bad,Barcode,Male,01/01/1990,Test Club\n"
+        )
+
+        with patch("jobs.os.remove", wraps=os.remove) as mock_remove:
+            response = self.client.post(
+                "/upload_participants", data={"file": (BytesIO(csv_data), "test.csv")}
+            )
+        self.assertTrue(response.location.endswith("/jobs/job-1"))
+        self.mock_create_job.assert_called_once_with(
+            "upload_participants",
+            {"filename": "test.csv", "return_url": "/participants"},
+        )
+        outcome = self._job_outcome()
+        self.assertEqual(outcome["status"], "done")
+        self.assertEqual(
+            outcome["progress"], {"parsed": 3, "written": 2, "rejected": 1}
+        )
+        self.assertEqual(outcome["details"], ["Row 4: Invalid Parkrun ID 'B1'"])
+        self.assertIn("Added 1 new participants.", outcome["message"])
+        # The spooled upload is removed once the job ends
+        mock_remove.assert_called_once()
+        self.assertFalse(os.path.exists(mock_remove.call_args[0][0]))
+
+    @patch("database.is_admin_email")
+    @patch("database.get_clubs")
+    def test_upload_participants_job_failure(self, mock_get_clubs, mock_is_admin):
+        mock_is_admin.return_value = True
+        mock_get_clubs.side_effect = Exception("Database unavailable")
+
+        with self.client.session_transaction() as sess:
+            sess["user"] = {"email": "test@example.com"}
+
+        from io import BytesIO
+
+        response = self.client.post(
+            "/upload_participants", data={"file": (BytesIO(b"ID\n"), "test.csv")}
+        )
+        self.assertTrue(response.location.endswith("/jobs/job-1"))
+        outcome = self._job_outcome()
+        self.assertEqual(outcome["status"], "failed")
+        self.assertEqual(outcome["error"], "Database unavailable")
+
+    @patch("database.is_admin_email")
+    def test_upload_participants_queue_full(self, mock_is_admin):
+        mock_is_admin.return_value = True
+
+        with self.client.session_transaction() as sess:
+            sess["user"] = {"email": "test@example.com"}
+
+        from io import BytesIO
+
+        with patch("jobs.runner", jobs.JobRunner(max_workers=0, max_pending=1)):
+            jobs.runner._slots.acquire()
+            response = self.client.post(
+                "/upload_participants", data={"file": (BytesIO(b"ID\n"), "test.csv")}
+            )
+        self.assertTrue(response.location.endswith("/participants"))
+        self.mock_create_job.assert_not_called()
+        with self.client.session_transaction() as sess:
+            message = sess["_flashes"][-1][1]
+        self.assertIn("Too many uploads", message)
+
+    @patch("database.is_admin_email")
+    @patch("database.get_job")
+    def test_job_status(self, mock_get_job, mock_is_admin):
+        mock_is_admin.return_value = True
+        mock_get_job.return_value = {
+            "id": "job-1",
+            "kind": "upload_participants",
+            "params": {"filename": "test.csv", "return_url": "/participants"},
+            "status": "running",
+            "progress": {"parsed": 10, "written": 0, "rejected": 1},
+        }
+
+        with self.client.session_transaction() as sess:
+            sess["user"] = {"email": "test@example.com"}
+
+        response = self.client.get("/jobs/job-1/status")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["status"], "running")
+        self.assertEqual(response.json["progress"]["parsed"], 10)
+
+        response = self.client.get("/jobs/job-1")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Upload Progress", response.data)
+        self.assertIn(b"test.csv", response.data)
+
+        mock_get_job.return_value = None
+        response = self.client.get("/jobs/missing/status")
+        self.assertEqual(response.status_code, 404)
+
+    @patch("database.is_admin_email")
+    @patch("database.get_job")
+    def test_job_status_marks_stale_job_failed(self, mock_get_job, mock_is_admin):
+        mock_is_admin.return_value = True
+        # The instance running this job stopped without recording an outcome
+        mock_get_job.return_value = {
+            "id": "job-1",
+            "kind": "upload_participants",
+            "params": {"filename": "test.csv"},
+            "status": "running",
+            "progress": {"parsed": 10, "written": 0, "rejected": 0},
+            "updated_at": datetime.now(UTC)
+            - timedelta(seconds=jobs.JOB_STALE_AFTER + 1),
+        }
+
+        with self.client.session_transaction() as sess:
+            sess["user"] = {"email": "test@example.com"}
+
+        response = self.client.get("/jobs/job-1/status")
+        self.assertEqual(response.json["status"], "failed")
+        self.assertEqual(response.json["error"], jobs.STALE_JOB_ERROR)
+        self.mock_update_job.assert_called_once_with(
+            "job-1", {"status": "failed", "error": jobs.STALE_JOB_ERROR}
+        )
+
+        # A job that wrote recently is still running
+        self.mock_update_job.reset_mock()
+        mock_get_job.return_value["updated_at"] = datetime.now(UTC)
+        response = self.client.get("/jobs/job-1/status")
+        self.assertEqual(response.json["status"], "running")
+        self.mock_update_job.assert_not_called()
+
+        # A job waiting its turn writes nothing, however long it has queued
+        mock_get_job.return_value.update(
+            status="queued",
+            updated_at=datetime.now(UTC) - timedelta(seconds=jobs.JOB_STALE_AFTER + 1),
+        )
+        response = self.client.get("/jobs/job-1/status")
+        self.assertEqual(response.json["status"], "queued")
+        self.mock_update_job.assert_not_called()
+
+    def test_job_runner_runs_jobs_in_background(self):
+        runner = jobs.JobRunner(max_workers=1, max_pending=2)
+        started = threading.Event()
+        release = threading.Event()
+
+        def work(job, rows):
+            started.set()
+            release.wait(5)
+            job.update(parsed=rows, written=rows)
+            return f"Processed {rows} rows"
+
+        job_id = runner.submit("test", work, 3)
+        self.assertEqual(job_id, "job-1")
+        self.assertTrue(started.wait(5))
+        # The submitting thread is free while the job runs
+        self.mock_update_job.assert_called_once_with(
+            "job-1",
+            {
+                "progress": {"parsed": 0, "written": 0, "rejected": 0},
+                "status": "running",
+            },
+        )
+        release.set()
+        runner.wait(5)
+
+        outcome = self._job_outcome()
+        self.assertEqual(outcome["status"], "done")
+        self.assertEqual(outcome["message"], "Processed 3 rows")
+        self.assertEqual(
+            outcome["progress"], {"parsed": 3, "written": 3, "rejected": 0}
+        )
+
+    def test_job_status_requires_login(self):
+        response = self.client.get("/jobs/job-1/status")
+        self.assertEqual(response.status_code, 302)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -9,6 +9,9 @@ from flask import Flask
 from flask_compress import Compress
 from flask_cors import CORS
 from flask_restx import Api, Resource, fields
+from http_cache import conditional
+from response_cache import cached_response
+from single_flight import coalesced
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-key-change-this")
@@ -17,6 +20,20 @@ Compress(app)
 # Initialize data on startup
 database.init_running_clubs()
 
+# Seconds browsers and CDNs may reuse each resource before revalidating
+CACHE_MAX_AGES = {
+    "clubs": 3600,
+    "seasons": 60,
+    "season": 300,
+    "bundle": 60,
+    "race_results": 60,
+    "championship": 60,
+}
+
+# Seconds a cached response may be served while it is refreshed in the
+# background, after which requests wait for it to be recomputed
+RESPONSE_CACHE_HARD_TTL = 900
+
 # Create API
 api = Api(
     app,
@@ -88,6 +105,11 @@ championship_standing_model = api.model(
         "name": fields.String(required=True, description="Club or participant name"),
         "total_points": fields.Raw(description="Total points or DQ"),
         "race_points": fields.Raw(description="Points per race"),
+        "race_positions": fields.Raw(description="Individual finish position per race"),
+        "club": fields.String(description="Participant club"),
+        "gender": fields.String(description="Participant gender"),
+        "age_category": fields.String(description="Participant age category"),
+        "participant_id": fields.String(description="Participant ID"),
     },
 )
 
@@ -102,16 +124,85 @@ championship_model = api.model(
         "championship_name": fields.String(
             required=True, description="Championship name"
         ),
+        "category": fields.String(description="Age category filter"),
+        "best_of": fields.Integer(description="Individual races counted"),
         "races": fields.List(fields.Nested(race_model)),
         "standings": fields.List(fields.Nested(championship_standing_model)),
     },
 )
 
+individual_championships_model = api.model(
+    "IndividualChampionships",
+    {
+        "season": fields.String(required=True, description="Season name"),
+        "championships": fields.List(
+            fields.Nested(championship_model),
+            description="Each gender's overall standings, then one per age category",
+        ),
+    },
+)
+
+season_bundle_model = api.model(
+    "SeasonBundle",
+    {
+        "name": fields.String(required=True, description="Season name"),
+        "age_category_size": fields.Integer(description="Age category size"),
+        "races": fields.List(fields.Nested(race_model)),
+        "default_race": fields.String(description="Latest race on or before today"),
+        "seasons": fields.List(fields.String, description="All season names"),
+        "default_season": fields.String(description="Default season name"),
+        "championship": fields.Nested(
+            championship_model,
+            allow_null=True,
+            description="Requested championship standings, if any",
+        ),
+        "championships": fields.List(
+            fields.Nested(championship_model),
+            description="Every individual championship, with type=individual&category=all",
+        ),
+    },
+)
+
+
+def season_scopes(season_name):
+    """Version scopes for responses built from a season and its results"""
+    return ["seasons", database.season_version_scope(season_name)]
+
+
+def bundle_scopes(season_name=None):
+    """Version scopes for a season bundle, resolving the default season"""
+    return season_scopes(season_name or database.get_default_season())
+
+
+def season_championship(season_name, championship, gender):
+    """Give a championship the shape the per-gender endpoints have always had.
+
+    Shared standings are named "<gender> ... Championship" and keep
+    individual positions in race_positions; these endpoints prefix the
+    season, suffix the gender and also return the positions as race_points.
+    """
+    kind = championship["championship_type"].capitalize()
+    category = championship.get("category")
+    title = f"{category} {kind}" if category else kind
+    standings = championship["standings"]
+    if championship["championship_type"] == "individual":
+        standings = [
+            {**standing, "race_points": standing["race_positions"]}
+            for standing in standings
+        ]
+    return {
+        **championship,
+        "gender": gender,
+        "championship_name": f"{season_name} {title} Championship ({gender})",
+        "standings": standings,
+    }
+
 
 # Endpoints
 @api.route("/clubs")
 class ClubList(Resource):
     @api.doc("get_clubs")
+    @conditional(lambda: ["clubs"], CACHE_MAX_AGES["clubs"])
     @api.marshal_list_with(club_model)
     def get(self):
         """Get all running clubs"""
@@ -122,6 +213,7 @@ class ClubList(Resource):
 class ParticipantResults(Resource):
     @api.doc("get_participant_results")
     @api.param("participant_id", "Participant ID")
+    @coalesced
     def get(self, participant_id):
         """Get all results for a participant"""
         return database.get_participant_results(participant_id)
@@ -130,6 +222,7 @@ class ParticipantResults(Resource):
 @api.route("/seasons")
 class SeasonList(Resource):
     @api.doc("get_seasons")
+    @conditional(lambda: ["seasons"], CACHE_MAX_AGES["seasons"])
     def get(self):
         """Get all seasons with default season and race"""
         seasons = database.get_seasons()
@@ -137,20 +230,7 @@ class SeasonList(Resource):
         default_race = None
 
         if default_season:
-            races = database.get_races_by_season(default_season)
-            if races:
-                from datetime import datetime
-
-                today = datetime.now().date()
-                past_races = [
-                    r
-                    for r in races
-                    if datetime.strptime(r.get("date", "1900-01-01"), "%Y-%m-%d").date()
-                    <= today
-                ]
-                if past_races:
-                    past_races.sort(key=lambda x: x.get("date", ""), reverse=True)
-                    default_race = past_races[0]["name"]
+            default_race = database.get_default_race(default_season)
 
         return {
             "seasons": seasons,
@@ -168,6 +248,7 @@ class Season(Resource):
             "season_name": "Season name (get available seasons from /seasons endpoint)"
         },
     )
+    @conditional(lambda season_name: ["seasons"], CACHE_MAX_AGES["season"])
     @api.marshal_with(season_model)
     def get(self, season_name):
         """Get season with nested races"""
@@ -183,6 +264,68 @@ class Season(Resource):
         }
 
 
+@api.route("/seasons/bundle", "/seasons/<string:season_name>/bundle")
+class SeasonBundle(Resource):
+    @api.doc(
+        "get_season_bundle",
+        description="Get season details, races, the default race, the season list and optionally championship standings in one cacheable response. /seasons/bundle serves the default season.",
+        params={"season_name": "Season name"},
+    )
+    @api.param(
+        "type", "Championship standings to include (team/individual)", _in="query"
+    )
+    @api.param("gender", "Gender (Male/Female) - required with type", _in="query")
+    @api.param(
+        "category",
+        "Age category filter, or all with type=individual for every individual championship",
+        _in="query",
+    )
+    @conditional(bundle_scopes, CACHE_MAX_AGES["bundle"])
+    @cached_response("bundle", CACHE_MAX_AGES["bundle"], RESPONSE_CACHE_HARD_TTL)
+    @coalesced
+    @api.marshal_with(season_bundle_model)
+    def get(self, season_name=None):
+        """Get a season, or the default one, with its races and optional standings"""
+        from flask import request
+
+        championship_type = request.args.get("type")
+        gender = request.args.get("gender")
+        category = request.args.get("category")
+        if championship_type and championship_type not in ("team", "individual"):
+            api.abort(400, "Type must be team or individual")
+        all_individual = championship_type == "individual" and category == "all"
+        if championship_type and not gender and not all_individual:
+            api.abort(400, "Gender parameter is required")
+
+        if not season_name:
+            season_name = database.get_default_season()
+            if not season_name:
+                # Without a default season there is only the season list
+                return {"races": [], "seasons": database.get_seasons()}
+
+        season = database.get_season(season_name)
+        if not season:
+            api.abort(404, "Season not found")
+
+        bundle = {
+            "name": season_name,
+            "age_category_size": season.get("age_category_size", 5),
+            "races": database.get_races_by_season(season_name),
+            "default_race": database.get_default_race(season_name),
+            "seasons": database.get_seasons(),
+            "default_season": database.get_default_season(),
+            "championship": None,
+            "championships": None,
+        }
+        if all_individual:
+            bundle["championships"] = database.get_individual_championships(season_name)
+        elif championship_type:
+            bundle["championship"] = database.get_championship(
+                season_name, championship_type, gender, category
+            )
+        return bundle
+
+
 @api.route("/seasons/<string:season_name>/races/<string:race_name>")
 class RaceResults(Resource):
     @api.doc(
@@ -195,34 +338,45 @@ class RaceResults(Resource):
     @api.param("gender", "Filter by gender (Male/Female)", _in="query")
     @api.param("category", "Filter by age category", _in="query")
     @api.param("showMissingData", "Show results with missing data", _in="query")
+    @api.param("limit", "Only return the first N finishers by position", _in="query")
+    @conditional(
+        lambda season_name, race_name: [database.season_version_scope(season_name)],
+        CACHE_MAX_AGES["race_results"],
+    )
+    @cached_response(
+        "race_results", CACHE_MAX_AGES["race_results"], RESPONSE_CACHE_HARD_TTL
+    )
+    @coalesced
     def get(self, season_name, race_name):
         """Get race results with optional filters"""
         from flask import request
 
-        results = database.get_race_results(season_name, race_name)
-
-        # Apply filters
         gender_filter = request.args.get("gender")
         category_filter = request.args.get("category")
-        show_missing = request.args.get("showMissingData", "false").lower() == "true"
+        limit = request.args.get("limit", type=int)
 
-        filtered_results = []
-        for result in results:
-            participant = result.get("participant", {})
+        show_missing = request.args.get("showMissingData", "false").lower() == "true"
 
+        def keep(result):
             # Skip results with missing data unless explicitly requested
-            if not show_missing and not participant.get("first_name"):
-                continue
-
-            # Apply gender filter
-            if gender_filter and participant.get("gender") != gender_filter:
-                continue
-
-            # Apply category filter
-            if category_filter and participant.get("age_category") != category_filter:
-                continue
-
-            filtered_results.append(result)
+            return show_missing or result.get("participant", {}).get("first_name")
+
+        # Gender and category filters are applied by the Firestore query,
+        # while results missing data are skipped before the limit is taken
+        if limit:
+            filtered_results = database.get_top_race_results(
+                season_name,
+                race_name,
+                limit,
+                gender=gender_filter,
+                category=category_filter,
+                keep=keep,
+            )
+        else:
+            results = database.get_race_results(
+                season_name, race_name, gender=gender_filter, category=category_filter
+            )
+            filtered_results = [result for result in results if keep(result)]
 
         return {"name": race_name, "season": season_name, "results": filtered_results}
 
@@ -234,6 +388,11 @@ class TeamChampionship(Resource):
         params={"season_name": "Season name"},
     )
     @api.param("gender", "Gender (Male/Female) - required", _in="query", required=True)
+    @conditional(season_scopes, CACHE_MAX_AGES["championship"])
+    @cached_response(
+        "championship", CACHE_MAX_AGES["championship"], RESPONSE_CACHE_HARD_TTL
+    )
+    @coalesced
     @api.marshal_with(championship_model)
     def get(self, season_name):
         """Get team championship standings"""
@@ -243,92 +402,10 @@ class TeamChampionship(Resource):
         if not gender:
             api.abort(400, "Gender parameter is required")
 
-        races = database.get_races_by_season(season_name)
-        if not races:
+        standings = database.get_championship(season_name, "team", gender)
+        if standings is None:
             api.abort(404, "No races found for season")
-
-        # Championship calculation logic (simplified)
-        all_clubs = {}
-
-        for race in races:
-            race_name = race["name"]
-            organising_clubs = race.get("organising_clubs", [])
-            results = database.get_race_results(season_name, race_name)
-
-            # Filter by gender
-            gender_results = [
-                r for r in results if r.get("participant", {}).get("gender") == gender
-            ]
-
-            # Group by club
-            club_participants = {}
-            for result in gender_results:
-                club = result.get("participant", {}).get("club")
-                if club:
-                    if club not in club_participants:
-                        club_participants[club] = []
-                    club_participants[club].append(result)
-
-            # Calculate points for each club
-            for club, participants in club_participants.items():
-                if club not in all_clubs:
-                    all_clubs[club] = {
-                        "name": club,
-                        "race_points": {},
-                        "total_points": 0,
-                    }
-
-                if club in organising_clubs:
-                    all_clubs[club]["race_points"][race_name] = "ORG"
-                elif len(participants) >= 4:  # Sufficient runners
-                    # Simplified scoring - just count participants
-                    all_clubs[club]["race_points"][race_name] = len(participants)
-                    all_clubs[club]["total_points"] += len(participants)
-                else:
-                    all_clubs[club]["race_points"][race_name] = "DQ"
-
-        # Add organizing clubs that didn't have participants
-        for race in races:
-            for org_club in race.get("organising_clubs", []):
-                if org_club not in all_clubs:
-                    all_clubs[org_club] = {
-                        "name": org_club,
-                        "race_points": {},
-                        "total_points": 0,
-                    }
-                if org_club in all_clubs:
-                    all_clubs[org_club]["race_points"][race["name"]] = "ORG"
-
-        # Apply organizing race adjustment
-        for club_data in all_clubs.values():
-            org_races = sum(
-                1 for points in club_data["race_points"].values() if points == "ORG"
-            )
-            total_races = len(races)
-            if org_races > 0 and club_data["total_points"] > 0:
-                adjustment = (
-                    total_races / (total_races - org_races)
-                    if total_races > org_races
-                    else 1
-                )
-                club_data["total_points"] = club_data["total_points"] * adjustment
-
-        standings = list(all_clubs.values())
-        standings.sort(
-            key=lambda x: (
-                x["total_points"] if isinstance(x["total_points"], (int, float)) else 0
-            ),
-            reverse=True,
-        )
-
-        return {
-            "season": season_name,
-            "gender": gender,
-            "championship_type": "team",
-            "championship_name": f"{season_name} Team Championship ({gender})",
-            "races": races,
-            "standings": standings,
-        }
+        return season_championship(season_name, standings, gender)
 
 
 @api.route("/seasons/<string:season_name>/championship/individual")
@@ -338,80 +415,48 @@ class IndividualChampionship(Resource):
         params={"season_name": "Season name"},
     )
     @api.param("gender", "Gender (Male/Female) - required", _in="query", required=True)
+    @api.param("category", "Age category filter", _in="query")
+    @conditional(season_scopes, CACHE_MAX_AGES["championship"])
+    @cached_response(
+        "championship", CACHE_MAX_AGES["championship"], RESPONSE_CACHE_HARD_TTL
+    )
+    @coalesced
     @api.marshal_with(championship_model)
     def get(self, season_name):
         """Get individual championship standings"""
         from flask import request
 
         gender = request.args.get("gender")
+        category = request.args.get("category")
         if not gender:
             api.abort(400, "Gender parameter is required")
 
-        races = database.get_races_by_season(season_name)
-        if not races:
+        standings = database.get_championship(
+            season_name, "individual", gender, category
+        )
+        if standings is None:
             api.abort(404, "No races found for season")
+        return season_championship(season_name, standings, gender)
 
-        season_data = database.get_season(season_name)
-        best_of = season_data.get("individual_results_best_of", 3) if season_data else 3
-
-        # Individual championship calculation (simplified)
-        all_participants = {}
-
-        for race in races:
-            race_name = race["name"]
-            results = database.get_race_results(season_name, race_name)
-
-            # Filter by gender and valid names
-            gender_results = [
-                r
-                for r in results
-                if (
-                    r.get("participant", {}).get("gender") == gender
-                    and r.get("participant", {}).get("first_name")
-                    and r.get("participant", {}).get("last_name")
-                )
-            ]
-
-            for i, result in enumerate(gender_results, 1):
-                participant = result.get("participant", {})
-                name = f"{participant.get('first_name', '')} {participant.get('last_name', '')}".strip()
-
-                if name not in all_participants:
-                    all_participants[name] = {
-                        "name": name,
-                        "club": participant.get("club", ""),
-                        "race_points": {},
-                        "total_points": 0,
-                    }
-
-                all_participants[name]["race_points"][
-                    race_name
-                ] = i  # Position as points
-
-        # Filter participants with sufficient races
-        qualified_participants = {
-            name: data
-            for name, data in all_participants.items()
-            if len(data["race_points"]) >= best_of
-        }
-
-        # Calculate total points (best N races)
-        for participant_data in qualified_participants.values():
-            race_scores = list(participant_data["race_points"].values())
-            race_scores.sort()  # Lower is better (position)
-            participant_data["total_points"] = sum(race_scores[:best_of])
-
-        standings = list(qualified_participants.values())
-        standings.sort(key=lambda x: x["total_points"])
 
-        return {
-            "season": season_name,
-            "gender": gender,
-            "championship_type": "individual",
-            "championship_name": f"{season_name} Individual Championship ({gender})",
-            "races": races,
-            "standings": standings,
-        }
+@api.route("/seasons/<string:season_name>/championship/individual/all")
+class AllIndividualChampionships(Resource):
+    @api.doc(
+        "get_all_individual_championships",
+        params={"season_name": "Season name"},
+    )
+    @conditional(season_scopes, CACHE_MAX_AGES["championship"])
+    @cached_response(
+        "championship", CACHE_MAX_AGES["championship"], RESPONSE_CACHE_HARD_TTL
+    )
+    @coalesced
+    @api.marshal_with(individual_championships_model)
+    def get(self, season_name):
+        """Get individual standings for every gender and age category"""
+        championships = database.get_individual_championships(season_name)
+        if championships is None:
+            api.abort(404, "No races found for season")
+        return {"season": season_name, "championships": championships}
 
 
 if __name__ == "__main__":
@@ -1,6 +1,10 @@
 import os
 import sys
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from unittest.mock import patch
 
 # Set environment variables for testing
@@ -9,6 +13,9 @@ os.environ["FLASK_SECRET_KEY"] = "test-secret-key"
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "shared_libs"))
 
+import response_cache
+import single_flight
+
 import app
 
 
@@ -16,6 +23,23 @@ class TestAPI(unittest.TestCase):
     def setUp(self):
         app.app.config["TESTING"] = True
         self.client = app.app.test_client()
+        # Championship endpoints compute live unless a test provides standings
+        patcher = patch("database.get_championship_standings", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("database.get_versions", side_effect=self._versions)
+        self.mock_get_versions = patcher.start()
+        self.addCleanup(patcher.stop)
+        # Each test starts without cached responses
+        response_cache.clear_caches()
+
+    @staticmethod
+    def _versions(
+        *scopes, version=1, updated_at=datetime(2025, 1, 1, tzinfo=timezone.utc)
+    ):
+        return {
+            scope: {"version": version, "updated_at": updated_at} for scope in scopes
+        }
 
     @patch("database.get_clubs")
     def test_get_clubs_api(self, mock_get_clubs):
@@ -51,9 +75,265 @@ class TestAPI(unittest.TestCase):
     def test_api_seasons_not_found(self, mock_get_season):
         mock_get_season.return_value = None
 
+    @patch("database.get_championship")
+    @patch("database.get_default_season")
+    @patch("database.get_seasons")
+    @patch("database.get_races_by_season")
+    @patch("database.get_season")
+    def test_api_season_bundle(
+        self,
+        mock_get_season,
+        mock_get_races,
+        mock_get_seasons,
+        mock_get_default,
+        mock_get_championship,
+    ):
+        mock_get_season.return_value = {"age_category_size": 5}
+        mock_get_races.return_value = [
+            {"name": "Race1", "date": "2024-01-01"},
+            {"name": "Race2", "date": "2999-01-01"},
+        ]
+        mock_get_seasons.return_value = ["season1"]
+        mock_get_default.return_value = "season1"
+        mock_get_championship.return_value = {
+            "season": "season1",
+            "championship_type": "team",
+            "championship_name": "Male Team Championship",
+            "races": [],
+            "standings": [],
+        }
+
+        response = self.client.get("/seasons/season1/bundle")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Cache-Control"], "public, max-age=60")
+        self.assertEqual(response.json["default_race"], "Race1")
+        self.assertEqual(response.json["seasons"], ["season1"])
+        self.assertEqual(len(response.json["races"]), 2)
+        self.assertIsNone(response.json["championship"])
+        mock_get_championship.assert_not_called()
+
+        response = self.client.get("/seasons/season1/bundle?type=team&gender=Male")
+        self.assertEqual(
+            response.json["championship"]["championship_name"],
+            "Male Team Championship",
+        )
+        mock_get_championship.assert_called_with("season1", "team", "Male", None)
+
+    @patch("database.get_individual_championships")
+    @patch("database.get_default_season")
+    @patch("database.get_seasons")
+    @patch("database.get_races_by_season")
+    @patch("database.get_season")
+    def test_api_default_season_bundle(
+        self,
+        mock_get_season,
+        mock_get_races,
+        mock_get_seasons,
+        mock_get_default,
+        mock_get_individual,
+    ):
+        mock_get_season.return_value = {"age_category_size": 10}
+        mock_get_races.return_value = [{"name": "Race1", "date": "2024-01-01"}]
+        mock_get_seasons.return_value = ["season1", "season2"]
+        mock_get_default.return_value = "season2"
+        mock_get_individual.return_value = [
+            {
+                "season": "season2",
+                "championship_type": "individual",
+                "championship_name": "Male Individual Championship",
+                "gender": "Male",
+                "races": [],
+                "standings": [],
+            }
+        ]
+
+        # One request loads the default season with every individual standing
+        response = self.client.get("/seasons/bundle?type=individual&category=all")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["name"], "season2")
+        self.assertEqual(response.json["age_category_size"], 10)
+        self.assertEqual(response.json["seasons"], ["season1", "season2"])
+        self.assertIsNone(response.json["championship"])
+        self.assertEqual(
+            response.json["championships"][0]["championship_name"],
+            "Male Individual Championship",
+        )
+        mock_get_season.assert_called_with("season2")
+        mock_get_individual.assert_called_once_with("season2")
+
+        # Without a default season the bundle still lists every season
+        mock_get_default.return_value = None
+        response = self.client.get("/seasons/bundle")
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json["name"])
+        self.assertEqual(response.json["seasons"], ["season1", "season2"])
+
+    @patch("database.get_season")
+    def test_api_season_bundle_errors(self, mock_get_season):
+        mock_get_season.return_value = None
+
+        response = self.client.get("/seasons/season1/bundle?type=team")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/seasons/season1/bundle?type=x&gender=Male")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/seasons/season1/bundle")
+        self.assertEqual(response.status_code, 404)
+
         response = self.client.get("/seasons/nonexistent")
         self.assertEqual(response.status_code, 404)
 
+    @patch("database.get_clubs")
+    def test_api_conditional_get(self, mock_get_clubs):
+        mock_get_clubs.return_value = [{"name": "Test Club", "short_names": []}]
+
+        response = self.client.get("/clubs")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Cache-Control"], "public, max-age=3600")
+        self.assertEqual(
+            response.headers["Last-Modified"], "Wed, 01 Jan 2025 00:00:00 GMT"
+        )
+        etag = response.headers["ETag"]
+        self.mock_get_versions.assert_called_with("clubs")
+
+        response = self.client.get("/clubs", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.headers["Cache-Control"], "public, max-age=3600")
+        response = self.client.get(
+            "/clubs",
+            headers={"If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"},
+        )
+        self.assertEqual(response.status_code, 304)
+        mock_get_clubs.assert_called_once()
+
+    @patch("database.get_race_results")
+    def test_api_race_results_not_modified(self, mock_get_results):
+        mock_get_results.return_value = []
+
+        response = self.client.get("/seasons/season/races/race")
+        etag = response.headers["ETag"]
+        self.mock_get_versions.assert_called_with("season:season")
+
+        # A 304 is answered from the version stamps without reading results
+        response = self.client.get(
+            "/seasons/season/races/race", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+        mock_get_results.assert_called_once()
+
+        # Other query arguments and newer versions get a different ETag
+        response = self.client.get(
+            "/seasons/season/races/race?gender=Male",
+            headers={"If-None-Match": etag},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.mock_get_versions.side_effect = lambda *scopes: self._versions(
+            *scopes, version=2
+        )
+        # The client already holds the cached response served while it is
+        # refreshed, then gets the new ETag
+        response = self.client.get(
+            "/seasons/season/races/race", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["X-Cache"], "STALE")
+        deadline = time.monotonic() + 5
+        while response.status_code == 304 and time.monotonic() < deadline:
+            time.sleep(0.001)
+            response = self.client.get(
+                "/seasons/season/races/race", headers={"If-None-Match": etag}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    @patch("database.get_participant_results")
+    def test_api_concurrent_requests_are_coalesced(self, mock_get_results):
+        release = threading.Event()
+
+        def results(participant_id):
+            release.wait(5)
+            return [{"season": "season", "race_name": "race", "position": 1}]
+
+        mock_get_results.side_effect = results
+        shared = single_flight.get_stats()["shared"]
+        url = "/participants/A1/results"
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(self.client.get, url) for _ in range(4)]
+            # Hold the first computation until the others are waiting on it
+            deadline = time.monotonic() + 5
+            while (
+                single_flight.get_stats()["shared"] < shared + 3
+                and time.monotonic() < deadline
+            ):
+                time.sleep(0.001)
+            release.set()
+            responses = [future.result() for future in futures]
+
+        self.assertEqual([r.status_code for r in responses], [200] * 4)
+        self.assertEqual(single_flight.get_stats()["shared"], shared + 3)
+        mock_get_results.assert_called_once_with("A1")
+
+        # Finished computations are not reused by later requests
+        self.client.get(url)
+        self.assertEqual(mock_get_results.call_count, 2)
+
+    @patch("database.get_championship")
+    def test_api_championship_response_cache(self, mock_get_championship):
+        mock_get_championship.return_value = {
+            "season": "season",
+            "championship_type": "team",
+            "standings": [],
+        }
+        url = "/seasons/season/championship/team?gender=Male"
+
+        response = self.client.get(url)
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertEqual(response.headers["Age"], "0")
+        etag = response.headers["ETag"]
+        response = self.client.get(url)
+        self.assertEqual(response.headers["X-Cache"], "HIT")
+        self.assertEqual(response.headers["ETag"], etag)
+        mock_get_championship.assert_called_once()
+
+        # Past the soft TTL the cached body is served while it is refreshed
+        later = time.monotonic() + 120
+        with patch("response_cache.time.monotonic", return_value=later):
+            response = self.client.get(url)
+            self.assertEqual(response.headers["X-Cache"], "STALE")
+            self.assertEqual(response.headers["Age"], "120")
+            deadline = time.monotonic() + 5
+            while (
+                self.client.get(url).headers["X-Cache"] != "HIT"
+                and time.monotonic() < deadline
+            ):
+                time.sleep(0.001)
+        self.assertEqual(mock_get_championship.call_count, 2)
+
+        # Past the hard TTL nothing is cached, so the request waits
+        with patch("response_cache.time.monotonic", return_value=later + 1000):
+            self.assertEqual(self.client.get(url).headers["X-Cache"], "MISS")
+        self.assertEqual(mock_get_championship.call_count, 3)
+
+        # Once results change the last body is served with the validators it
+        # was computed under while one refresh computes the current one
+        last_modified = response.headers["Last-Modified"]
+        self.mock_get_versions.side_effect = lambda *scopes: self._versions(
+            *scopes, version=2, updated_at=datetime(2025, 2, 1, tzinfo=timezone.utc)
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.headers["X-Cache"], "STALE")
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.headers["Last-Modified"], last_modified)
+        deadline = time.monotonic() + 5
+        while response.headers["X-Cache"] != "HIT" and time.monotonic() < deadline:
+            time.sleep(0.001)
+            response = self.client.get(url)
+        self.assertEqual(response.headers["X-Cache"], "HIT")
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertNotEqual(response.headers["Last-Modified"], last_modified)
+        self.assertEqual(mock_get_championship.call_count, 4)
+
     @patch("database.get_race_results")
     def test_api_races_with_results(self, mock_get_results):
         mock_get_results.return_value = [
@@ -84,26 +364,24 @@ class TestAPI(unittest.TestCase):
                     "gender": "Male",
                     "age_category": "Senior",
                 },
-            },
-            {
-                "finish_token": "2",
-                "participant": {
-                    "first_name": "Jane",
-                    "gender": "Female",
-                    "age_category": "V40",
-                },
-            },
+            }
         ]
 
-        # Test gender filter
+        # Filters are passed down to the Firestore query
         response = self.client.get("/seasons/season/races/race?gender=Male")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.json["results"]), 1)
+        mock_get_results.assert_called_with(
+            "season", "race", gender="Male", category=None
+        )
 
-        # Test category filter
-        response = self.client.get("/seasons/season/races/race?category=Senior")
+        response = self.client.get(
+            "/seasons/season/races/race?category=Senior&gender=Male"
+        )
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json["results"]), 1)
+        mock_get_results.assert_called_with(
+            "season", "race", gender="Male", category="Senior"
+        )
 
     @patch("database.get_race_results")
     def test_api_races_show_missing_data(self, mock_get_results):
@@ -120,6 +398,52 @@ class TestAPI(unittest.TestCase):
         response = self.client.get("/seasons/season/races/race?showMissingData=true")
         self.assertEqual(len(response.json["results"]), 2)
 
+    @patch("database.get_race_results")
+    def test_api_races_limit(self, mock_get_results):
+        mock_get_results.return_value = [
+            {"finish_token": "P1", "participant": {"first_name": "John"}},
+            {"finish_token": "P2", "participant": {"first_name": "Jane"}},
+        ]
+
+        response = self.client.get("/seasons/season/races/race?limit=1")
+        self.assertEqual(len(response.json["results"]), 1)
+        mock_get_results.assert_called_with(
+            "season",
+            "race",
+            order_by_position=True,
+            limit=1,
+            gender=None,
+            category=None,
+        )
+
+        # Filtered queries only read the top N matching results
+        self.client.get("/seasons/season/races/race?limit=1&gender=Male")
+        mock_get_results.assert_called_with(
+            "season",
+            "race",
+            order_by_position=True,
+            limit=1,
+            gender="Male",
+            category=None,
+        )
+
+    @patch("database.get_race_results")
+    def test_api_races_limit_skips_missing_data(self, mock_get_results):
+        results = [
+            {"finish_token": "P1", "participant": {"first_name": "John"}},
+            {"finish_token": "P2", "participant": {}},
+            {"finish_token": "P3", "participant": {"first_name": "Jane"}},
+        ]
+        mock_get_results.side_effect = lambda *args, limit=None, **kwargs: results[
+            :limit
+        ]
+
+        # The unnamed second finisher must not cost the response a row
+        response = self.client.get("/seasons/season/races/race?limit=2")
+        self.assertEqual(
+            [r["finish_token"] for r in response.json["results"]], ["P1", "P3"]
+        )
+
     def test_api_championship_missing_gender(self):
         response = self.client.get("/seasons/season/championship/team")
         self.assertEqual(response.status_code, 400)
@@ -146,6 +470,54 @@ class TestAPI(unittest.TestCase):
         response = self.client.get("/seasons/season/championship/team?gender=Male")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json["championship_type"], "team")
+        self.assertEqual(
+            response.json["championship_name"], "season Team Championship (Male)"
+        )
+
+    @patch("database.get_individual_championships")
+    def test_api_all_individual_championships(self, mock_get_championships):
+        mock_get_championships.return_value = [
+            {
+                "season": "season",
+                "gender": "Male",
+                "category": "V40",
+                "championship_type": "individual",
+                "championship_name": "Male V40 Individual Championship",
+                "races": [{"name": "Race1"}],
+                "standings": [
+                    {
+                        "name": "John Doe",
+                        "age_category": "V40",
+                        "total_points": 1,
+                        "race_positions": {"Race1": 1},
+                    }
+                ],
+                "best_of": 1,
+            }
+        ]
+
+        response = self.client.get("/seasons/season/championship/individual/all")
+        self.assertEqual(response.status_code, 200)
+        championship = response.json["championships"][0]
+        self.assertEqual(
+            (championship["gender"], championship["category"]), ("Male", "V40")
+        )
+        self.assertEqual(championship["standings"][0]["race_positions"], {"Race1": 1})
+
+        mock_get_championships.return_value = None
+        # The season's races are deleted, so its version moves on
+        self.mock_get_versions.side_effect = lambda *scopes: self._versions(
+            *scopes, version=2
+        )
+        # The last response is served once while the refresh finds no races
+        url = "/seasons/season/championship/individual/all"
+        response = self.client.get(url)
+        self.assertEqual(response.headers["X-Cache"], "STALE")
+        deadline = time.monotonic() + 5
+        while response.status_code == 200 and time.monotonic() < deadline:
+            time.sleep(0.001)
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
 
     def test_api_individual_championship_missing_gender(self):
         response = self.client.get("/seasons/season/championship/individual")
@@ -189,6 +561,16 @@ class TestAPI(unittest.TestCase):
         )
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json["championship_type"], "individual")
+        self.assertEqual(response.json["gender"], "Male")
+        self.assertEqual(
+            response.json["championship_name"],
+            "season Individual Championship (Male)",
+        )
+        john = response.json["standings"][0]
+        self.assertEqual(john["name"], "John Doe")
+        self.assertEqual(john["gender"], "Male")
+        self.assertEqual(john["race_points"], {"Race1": 1, "Race2": 1, "Race3": 1})
+        self.assertEqual(john["race_points"], john["race_positions"])
 
     @patch("database.get_participant_results")
     def test_api_participant_results(self, mock_get_results):
@@ -323,7 +705,7 @@ class TestAPI(unittest.TestCase):
     def test_api_championship_no_organizing_adjustment(
         self, mock_get_results, mock_get_races
     ):
-        """Test no organizing race adjustment"""
+        """Test adjustment for a club that never organises a race"""
         mock_get_races.return_value = [
             {"name": "Race1", "organising_clubs": ["Other Club"]},
             {"name": "Race2", "organising_clubs": ["Other Club"]},
@@ -367,8 +749,8 @@ class TestAPI(unittest.TestCase):
         club_a_data = next((s for s in standings if s["name"] == "Club A"), None)
         self.assertIsNotNone(club_a_data)
         self.assertNotEqual(club_a_data["total_points"], "DQ")
-        # No adjustment since Club A doesn't organize: 4 participants × 2 races = 8 points
-        self.assertEqual(club_a_data["total_points"], 8)
+        # Ranked first in both races, scaled by (2 - 1) / 2 as Club A never organises
+        self.assertEqual(club_a_data["total_points"], 1.0)
 
     @patch("database.get_races_by_season")
     @patch("database.get_race_results")
@@ -381,7 +763,8 @@ class TestAPI(unittest.TestCase):
             {"name": "Race2"},
             {"name": "Race3"},
         ]
-        mock_get_results.side_effect = [
+        # Races are fetched concurrently, so key results by race name
+        results_by_race = [
             # Race 1
             [
                 {
@@ -416,6 +799,9 @@ class TestAPI(unittest.TestCase):
                 }
             ],  # Valid name
         ]
+        mock_get_results.side_effect = lambda season, race, **kwargs: results_by_race[
+            int(race.removeprefix("Race")) - 1
+        ]
 
         response = self.client.get(
             "/seasons/season/championship/individual?gender=Male"
@@ -436,7 +822,8 @@ class TestAPI(unittest.TestCase):
             {"name": "Race2"},
             {"name": "Race3"},
         ]
-        mock_get_results.side_effect = [
+        # Races are fetched concurrently, so key results by race name
+        results_by_race = [
             # Race 1
             [
                 {
@@ -471,6 +858,9 @@ class TestAPI(unittest.TestCase):
                 }
             ],
         ]
+        mock_get_results.side_effect = lambda season, race, **kwargs: results_by_race[
+            int(race.removeprefix("Race")) - 1
+        ]
 
         response = self.client.get(
             "/seasons/season/championship/individual?gender=Male"
@@ -9,6 +9,9 @@ sys.path.append(os.path.join(os.path.dirname(__file__), "..", "shared_libs"))
 
 import database
 from auth import login_required
+from http_cache import conditional
+from response_cache import cached_response
+from single_flight import coalesced
 
 api_bp = Blueprint("api", __name__)
 api = Api(
@@ -33,6 +36,20 @@ CORS(
     ],
 )
 
+# Seconds browsers and CDNs may reuse each resource before revalidating
+CACHE_MAX_AGES = {
+    "clubs": 3600,
+    "seasons": 60,
+    "season": 300,
+    "bundle": 60,
+    "race_results": 60,
+    "championship": 60,
+}
+
+# Seconds a cached response may be served while it is refreshed in the
+# background, after which requests wait for it to be recomputed
+RESPONSE_CACHE_HARD_TTL = 900
+
 # Define models for documentation
 club_model = api.model(
     "Club",
@@ -60,6 +77,7 @@ race_result_model = api.model(
     "RaceResult",
     {
         "finish_token": fields.String(description="Finish position token"),
+        "position": fields.Integer(description="Numeric finish position"),
         "participant": fields.Nested(participant_model),
     },
 )
@@ -88,6 +106,10 @@ championship_standing_model = api.model(
         "name": fields.String(required=True, description="Club or participant name"),
         "total_points": fields.Raw(description="Total points or DQ"),
         "race_points": fields.Raw(description="Points per race"),
+        "race_positions": fields.Raw(description="Individual finish position per race"),
+        "club": fields.String(description="Participant club"),
+        "age_category": fields.String(description="Participant age category"),
+        "participant_id": fields.String(description="Participant ID"),
     },
 )
 
@@ -102,15 +124,60 @@ championship_model = api.model(
         "championship_name": fields.String(
             required=True, description="Championship name"
         ),
+        "category": fields.String(description="Age category filter"),
+        "best_of": fields.Integer(description="Individual races counted"),
         "races": fields.List(fields.Nested(race_model)),
         "standings": fields.List(fields.Nested(championship_standing_model)),
     },
 )
 
+individual_championships_model = api.model(
+    "IndividualChampionships",
+    {
+        "season": fields.String(required=True, description="Season name"),
+        "championships": fields.List(
+            fields.Nested(championship_model),
+            description="Each gender's overall standings, then one per age category",
+        ),
+    },
+)
+
+season_bundle_model = api.model(
+    "SeasonBundle",
+    {
+        "name": fields.String(required=True, description="Season name"),
+        "age_category_size": fields.Integer(description="Age category size"),
+        "races": fields.List(fields.Nested(race_model)),
+        "default_race": fields.String(description="Latest race on or before today"),
+        "seasons": fields.List(fields.String, description="All season names"),
+        "default_season": fields.String(description="Default season name"),
+        "championship": fields.Nested(
+            championship_model,
+            allow_null=True,
+            description="Requested championship standings, if any",
+        ),
+        "championships": fields.List(
+            fields.Nested(championship_model),
+            description="Every individual championship, with type=individual&category=all",
+        ),
+    },
+)
+
+
+def season_scopes(season_name):
+    """Version scopes for responses built from a season and its results"""
+    return ["seasons", database.season_version_scope(season_name)]
+
+
+def bundle_scopes(season_name=None):
+    """Version scopes for a season bundle, resolving the default season"""
+    return season_scopes(season_name or database.get_default_season())
+
 
 @api.route("/clubs")
 class ClubList(Resource):
     @api.doc("get_clubs")
+    @conditional(lambda: ["clubs"], CACHE_MAX_AGES["clubs"])
     @api.marshal_list_with(club_model)
     def get(self):
         """Get all running clubs"""
@@ -123,19 +190,27 @@ class ParticipantList(Resource):
     @api.param("page", "Page number", type="integer", default=1)
     @api.param("page_size", "Page size", type="integer", default=50)
     @api.param("search", "Search term", type="string")
+    @api.param("cursor", "Page cursor (next_cursor/prev_cursor)", type="string")
     @login_required
     def get(self):
         """Get participants with pagination and search (requires authentication)"""
         page = int(request.args.get("page", 1))
         page_size = int(request.args.get("page_size", 50))
         search = request.args.get("search")
-        return database.get_participants(page=page, page_size=page_size, search=search)
+        cursor = request.args.get("cursor") or None
+        try:
+            return database.get_participants(
+                page=page, page_size=page_size, search=search, cursor=cursor
+            )
+        except ValueError as e:
+            api.abort(400, str(e))
 
 
 @api.route("/participants/<participant_id>/results")
 class ParticipantResults(Resource):
     @api.doc("get_participant_results")
     @api.param("participant_id", "Participant ID")
+    @coalesced
     def get(self, participant_id):
         """Get all results for a participant"""
         return database.get_participant_results(participant_id)
@@ -144,6 +219,7 @@ class ParticipantResults(Resource):
 @api.route("/seasons")
 class SeasonList(Resource):
     @api.doc("get_seasons")
+    @conditional(lambda: ["seasons"], CACHE_MAX_AGES["seasons"])
     def get(self):
         """Get all seasons with default season and race"""
         seasons = database.get_seasons()
@@ -151,20 +227,7 @@ class SeasonList(Resource):
         default_race = None
 
         if default_season:
-            races = database.get_races_by_season(default_season)
-            if races:
-                from datetime import datetime
-
-                today = datetime.now().date()
-                past_races = [
-                    r
-                    for r in races
-                    if datetime.strptime(r.get("date", "1900-01-01"), "%Y-%m-%d").date()
-                    <= today
-                ]
-                if past_races:
-                    past_races.sort(key=lambda x: x.get("date", ""), reverse=True)
-                    default_race = past_races[0]["name"]
+            default_race = database.get_default_race(default_season)
 
         return {
             "seasons": seasons,
@@ -182,6 +245,7 @@ class Season(Resource):
     @api.param(
         "season_name", "Season name (get available seasons from /seasons endpoint)"
     )
+    @conditional(lambda season_name: ["seasons"], CACHE_MAX_AGES["season"])
     @api.marshal_with(season_model)
     def get(self, season_name):
         """Get season with nested races"""
@@ -197,6 +261,77 @@ class Season(Resource):
         }
 
 
+@api.route("/seasons/bundle", "/seasons/<season_name>/bundle")
+class SeasonBundle(Resource):
+    @api.doc(
+        "get_season_bundle",
+        description="Get season details, races, the default race, the season list and optionally championship standings in one cacheable response. /seasons/bundle serves the default season.",
+    )
+    @api.param(
+        "season_name", "Season name (get available seasons from /seasons endpoint)"
+    )
+    @api.param(
+        "type",
+        "Championship standings to include",
+        type="string",
+        enum=["team", "individual"],
+    )
+    @api.param(
+        "gender",
+        "Gender (required with type)",
+        type="string",
+        enum=["Male", "Female"],
+    )
+    @api.param(
+        "category",
+        "Age category filter, or all with type=individual for every individual championship",
+        type="string",
+    )
+    @conditional(bundle_scopes, CACHE_MAX_AGES["bundle"])
+    @cached_response("bundle", CACHE_MAX_AGES["bundle"], RESPONSE_CACHE_HARD_TTL)
+    @coalesced
+    @api.marshal_with(season_bundle_model)
+    def get(self, season_name=None):
+        """Get a season, or the default one, with its races and optional standings"""
+        championship_type = request.args.get("type")
+        gender = request.args.get("gender")
+        category = request.args.get("category")
+
+        if championship_type and championship_type not in ("team", "individual"):
+            api.abort(400, "Type must be team or individual")
+        all_individual = championship_type == "individual" and category == "all"
+        if championship_type and not gender and not all_individual:
+            api.abort(400, "Gender parameter is required")
+
+        if not season_name:
+            season_name = database.get_default_season()
+            if not season_name:
+                # Without a default season there is only the season list
+                return {"races": [], "seasons": database.get_seasons()}
+
+        season = database.get_season(season_name)
+        if not season:
+            api.abort(404, "Season not found")
+
+        bundle = {
+            "name": season_name,
+            "age_category_size": season.get("age_category_size", 5),
+            "races": database.get_races_by_season(season_name),
+            "default_race": database.get_default_race(season_name),
+            "seasons": database.get_seasons(),
+            "default_season": database.get_default_season(),
+            "championship": None,
+            "championships": None,
+        }
+        if all_individual:
+            bundle["championships"] = database.get_individual_championships(season_name)
+        elif championship_type:
+            bundle["championship"] = database.get_championship(
+                season_name, championship_type, gender, category
+            )
+        return bundle
+
+
 @api.route("/seasons/<season_name>/races/<race_name>")
 class RaceResults(Resource):
     @api.doc(
@@ -213,27 +348,42 @@ class RaceResults(Resource):
     @api.param("gender", "Gender filter", type="string")
     @api.param("category", "Age category filter", type="string")
     @api.param("showMissingData", "Show results with missing data", type="boolean")
+    @api.param("limit", "Only return the first N finishers by position", type="integer")
+    @conditional(
+        lambda season_name, race_name: [database.season_version_scope(season_name)],
+        CACHE_MAX_AGES["race_results"],
+    )
+    @cached_response(
+        "race_results", CACHE_MAX_AGES["race_results"], RESPONSE_CACHE_HARD_TTL
+    )
+    @coalesced
     def get(self, season_name, race_name):
         """Get race results with optional filters"""
-        results = database.get_race_results(season_name, race_name)
+        category = request.args.get("category")
+        gender = request.args.get("gender")
+        limit = request.args.get("limit", type=int)
 
         show_missing = request.args.get("showMissingData", "false").lower() == "true"
-        if not show_missing:
-            results = [r for r in results if r.get("participant", {}).get("first_name")]
 
-        category = request.args.get("category")
-        if category:
-            results = [
-                r
-                for r in results
-                if r.get("participant", {}).get("age_category") == category
-            ]
-
-        gender = request.args.get("gender")
-        if gender:
-            results = [
-                r for r in results if r.get("participant", {}).get("gender") == gender
-            ]
+        def keep(result):
+            return show_missing or result.get("participant", {}).get("first_name")
+
+        # Gender and category filters are applied by the Firestore query,
+        # while results missing data are skipped before the limit is taken
+        if limit:
+            results = database.get_top_race_results(
+                season_name,
+                race_name,
+                limit,
+                gender=gender,
+                category=category,
+                keep=keep,
+            )
+        else:
+            results = database.get_race_results(
+                season_name, race_name, gender=gender, category=category
+            )
+            results = [r for r in results if keep(r)]
 
         return {
             "season": season_name,
@@ -258,6 +408,11 @@ class TeamChampionship(Resource):
         required=True,
         enum=["Male", "Female"],
     )
+    @conditional(season_scopes, CACHE_MAX_AGES["championship"])
+    @cached_response(
+        "championship", CACHE_MAX_AGES["championship"], RESPONSE_CACHE_HARD_TTL
+    )
+    @coalesced
     @api.marshal_with(championship_model)
     def get(self, season_name):
         """Get team championship standings"""
@@ -266,145 +421,10 @@ class TeamChampionship(Resource):
         if not gender:
             api.abort(400, "Gender parameter is required")
 
-        races = database.get_races_by_season(season_name)
-
-        if not races:
+        standings = database.get_championship(season_name, "team", gender)
+        if standings is None:
             api.abort(404, "No races found for season")
-
-        club_points = {}
-
-        for race in races:
-            results = database.get_race_results(season_name, race["name"])
-            # Filter by gender and valid participants
-            gender_results = [
-                r
-                for r in results
-                if r.get("participant", {}).get("gender") == gender
-                and r.get("participant", {}).get("first_name")
-            ]
-
-            # Group by club and calculate points
-            club_finishers = {}
-            for i, result in enumerate(gender_results):
-                club = result.get("participant", {}).get("club")
-                if club:
-                    if club not in club_finishers:
-                        club_finishers[club] = []
-                    club_finishers[club].append(i + 1)  # position (1-based)
-
-            # First, add organizing clubs to club_points if they're not already there
-            organising_clubs = race.get("organising_clubs", [])
-            for org_club in organising_clubs:
-                if org_club not in club_points:
-                    club_points[org_club] = {
-                        "total_points": 0,
-                        "total_positions": 0,
-                        "race_points": {},
-                    }
-                club_points[org_club]["race_points"][race["name"]] = "ORG"
-
-            # Get all clubs that have ever participated (reuse results from above)
-            all_clubs = set()
-            for result in results:
-                club = result.get("participant", {}).get("club")
-                if club:
-                    all_clubs.add(club)
-
-            # Calculate points for each club (top 4 men, top 3 women)
-            top_count = 4 if gender == "Male" else 3
-
-            # Mark all clubs as DQ for this race initially
-            for club in all_clubs:
-                if club not in club_points:
-                    club_points[club] = {
-                        "total_points": 0,
-                        "total_positions": 0,
-                        "race_points": {},
-                    }
-                if club not in organising_clubs:
-                    club_points[club]["race_points"][race["name"]] = "DQ"
-
-            # Award points only to clubs with sufficient runners
-            for club, positions in club_finishers.items():
-                if club not in organising_clubs:
-                    if len(positions) >= top_count:
-                        top_positions = sorted(positions)[:top_count]
-                        race_points = sum(top_positions)
-
-                        club_points[club]["race_points"][race["name"]] = {
-                            "points": race_points,
-                            "positions": top_positions,
-                        }
-                        club_points[club]["total_points"] += race_points
-                        club_points[club]["total_positions"] += race_points
-
-        # Calculate club rankings for each race
-        for race in races:
-            race_clubs = []
-            for club, data in club_points.items():
-                race_data = data["race_points"].get(race["name"])
-                if race_data and isinstance(race_data, dict) and "points" in race_data:
-                    race_clubs.append((club, race_data["points"]))
-
-            # Sort by points (lower is better) and assign rankings with ties
-            race_clubs.sort(key=lambda x: x[1])
-            current_rank = 1
-            for i, (club, points) in enumerate(race_clubs):
-                if i > 0 and points != race_clubs[i - 1][1]:
-                    current_rank = i + 1
-                race_data = club_points[club]["race_points"][race["name"]]
-                race_data["rank"] = current_rank
-
-        # Calculate total rankings and separate qualified/disqualified clubs
-        qualified_clubs = []
-        disqualified_clubs = []
-
-        for club, data in club_points.items():
-            # Check if club has DQ in any race (disqualified)
-            has_dq = any(v == "DQ" for v in data["race_points"].values())
-            # Check if club has points or is organizing
-            has_activity = data["total_positions"] > 0 or any(
-                v == "ORG" for v in data["race_points"].values()
-            )
-
-            if has_activity:
-                # Calculate total rankings
-                total_rankings = 0
-                organized_races = 0
-                for race_data in data["race_points"].values():
-                    if isinstance(race_data, dict) and "rank" in race_data:
-                        total_rankings += race_data["rank"]
-                    elif race_data == "ORG":
-                        organized_races += 1
-
-                # Apply adjustment for clubs that didn't organize a race
-                if organized_races == 0 and total_rankings > 0 and len(races) > 1:
-                    total_races = len(races)
-                    total_rankings = total_rankings * ((total_races - 1) / total_races)
-
-                club_data = {
-                    "name": club,
-                    "total_points": "DQ" if has_dq else round(total_rankings, 2),
-                    "race_points": data["race_points"],
-                }
-                if has_dq:
-                    disqualified_clubs.append(club_data)
-                else:
-                    qualified_clubs.append(club_data)
-
-        qualified_clubs.sort(key=lambda x: x["total_points"])
-        disqualified_clubs.sort(key=lambda x: x["name"])
-
-        standings = qualified_clubs + disqualified_clubs
-
-        return {
-            "season": season_name,
-            "gender": gender,
-            "championship_type": "team",
-            "championship_name": f"{gender} Team Championship",
-            "races": races,
-            "standings": standings,
-        }
+        return standings
 
 
 @api.route("/seasons/<season_name>/championship/individual")
@@ -424,101 +444,46 @@ class IndividualChampionship(Resource):
         enum=["Male", "Female"],
     )
     @api.param("category", "Age category filter", type="string")
+    @conditional(season_scopes, CACHE_MAX_AGES["championship"])
+    @cached_response(
+        "championship", CACHE_MAX_AGES["championship"], RESPONSE_CACHE_HARD_TTL
+    )
+    @coalesced
     @api.marshal_with(championship_model)
     def get(self, season_name):
         """Get individual championship standings"""
-        season = database.get_season(season_name)
         gender = request.args.get("gender")
         category = request.args.get("category")
 
         if not gender:
             api.abort(400, "Gender parameter is required")
 
-        races = database.get_races_by_season(season_name)
-        if not races:
+        standings = database.get_championship(
+            season_name, "individual", gender, category
+        )
+        if standings is None:
             api.abort(404, "No races found for season")
+        return standings
 
-        participant_results = {}
-        races_with_results = []
-
-        for race in races:
-            results = database.get_race_results(season_name, race["name"])
-            # Filter by gender and valid participants
-            gender_results = [
-                r
-                for r in results
-                if r.get("participant", {}).get("gender") == gender
-                and r.get("participant", {}).get("first_name")
-            ]
-
-            # Filter by category if specified
-            if category:
-                gender_results = [
-                    r
-                    for r in gender_results
-                    if r.get("participant", {}).get("age_category") == category
-                ]
-
-            # Only process races that have results
-            if gender_results:
-                races_with_results.append(race)
-
-                # Store individual positions
-                for i, result in enumerate(gender_results):
-                    participant = result.get("participant", {})
-                    name = f"{participant.get('first_name', '')} {participant.get('last_name', '')}".strip()
-                    club = participant.get("club", "")
-                    age_category = participant.get("age_category", "")
-
-                    if name and name != " ":
-                        if name not in participant_results:
-                            participant_results[name] = {
-                                "club": club,
-                                "gender": participant.get("gender"),
-                                "age_category": age_category,
-                                "participant_id": participant.get("parkrun_barcode_id"),
-                                "race_positions": {},
-                                "total": 0,
-                            }
-                        participant_results[name]["race_positions"][race["name"]] = (
-                            i + 1
-                        )
-
-        # Calculate best results for each participant
-        standings = []
-        best_of = int(season.get("individual_results_best_of", 3)) if season else 3
-        # Use minimum of best_of or races with actual results
-        actual_best_of = min(best_of, len(races_with_results))
-
-        for name, data in participant_results.items():
-            positions = list(data["race_positions"].values())
-            if len(positions) >= actual_best_of:
-                best_x = sorted(positions)[:actual_best_of]
-                total = sum(best_x)
-                standings.append(
-                    {
-                        "name": name,
-                        "club": data["club"],
-                        "gender": data["gender"],
-                        "age_category": data["age_category"],
-                        "participant_id": data.get("participant_id"),
-                        "total_points": total,
-                        "race_positions": data["race_positions"],
-                    }
-                )
-
-        standings.sort(key=lambda x: x["total_points"])
-
-        championship_name = f"{gender} Individual Championship"
-        if category:
-            championship_name = f"{gender} {category} Individual Championship"
 
-        return {
-            "season": season_name,
-            "category": category,
-            "championship_type": "individual",
-            "championship_name": championship_name,
-            "races": races_with_results,
-            "standings": standings,
-            "best_of": actual_best_of,
-        }
+@api.route("/seasons/<season_name>/championship/individual/all")
+class AllIndividualChampionships(Resource):
+    @api.doc(
+        "get_all_individual_championships",
+        description="Get individual championship standings for every gender and age category from one read of the season. Use /seasons endpoint to get available season names.",
+    )
+    @api.param(
+        "season_name", "Season name (get available seasons from /seasons endpoint)"
+    )
+    @conditional(season_scopes, CACHE_MAX_AGES["championship"])
+    @cached_response(
+        "championship", CACHE_MAX_AGES["championship"], RESPONSE_CACHE_HARD_TTL
+    )
+    @coalesced
+    @api.marshal_with(individual_championships_model)
+    def get(self, season_name):
+        """Get individual standings for every gender and age category"""
+        championships = database.get_individual_championships(season_name)
+        if championships is None:
+            api.abort(404, "No races found for season")
+        return {"season": season_name, "championships": championships}
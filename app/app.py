@@ -14,7 +14,9 @@ from flask_compress import Compress
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "shared_libs"))
 
+import async_database
 import database
+import jobs
 from auth import init_oauth, login_required
 
 from api import api_bp
@@ -64,8 +66,12 @@ def public_results():
 @app.route("/participant/<participant_id>")
 def participant_results(participant_id):
     """Participant results page"""
-    results = database.get_participant_results(participant_id)
-    participant = database.get_participant(participant_id)
+    results, participant = async_database.run(
+        async_database.gather(
+            async_database.get_participant_results(participant_id),
+            async_database.get_participant(participant_id),
+        )
+    )
 
     if not participant:
         flash("Participant not found")
@@ -183,8 +189,14 @@ def participants():
     """View all registered participants"""
     page = int(request.args.get("page", 1))
     search = request.args.get("search", "").strip()
-
-    result = database.get_participants(page=page, search=search if search else None)
+    cursor = request.args.get("cursor") or None
+    try:
+        result = database.get_participants(
+            page=page, search=search if search else None, cursor=cursor
+        )
+    except ValueError:
+        # Malformed cursor, fall back to the page number
+        result = database.get_participants(page=page, search=search if search else None)
 
     return render_template(
         "participants.html",
@@ -341,7 +353,7 @@ def delete_club(club_id):
 @app.route("/upload_participants", methods=["POST"])
 @login_required
 def upload_participants():
-    """Upload participants from CSV"""
+    """Queue a participants CSV upload as a background job"""
     if "file" not in request.files:
         flash("No file selected")
         return redirect(url_for("participants"))
@@ -352,12 +364,26 @@ def upload_participants():
         return redirect(url_for("participants"))
 
     try:
-        import csv
-        import io
-        from datetime import datetime
+        job_id = jobs.submit_upload(
+            "upload_participants",
+            import_participants,
+            file,
+            params={"filename": file.filename, "return_url": url_for("participants")},
+        )
+    except Exception as e:
+        flash(f"Failed to queue CSV file: {str(e)}")
+        return redirect(url_for("participants"))
+
+    return redirect(url_for("job_progress", job_id=job_id))
+
 
-        content = file.read().decode("utf-8")
-        csv_reader = csv.reader(io.StringIO(content))
+def import_participants(job, path):
+    """Add or update participants from a spooled CSV upload"""
+    import csv
+    from datetime import datetime
+
+    with open(path, encoding="utf-8", newline="") as lines:
+        csv_reader = csv.reader(lines)
 
         # Skip header row
         next(csv_reader, None)
@@ -365,15 +391,15 @@ def upload_participants():
         # Get clubs list once for validation
         clubs = database.get_clubs()
 
-        new_participants = []
-        updated_participants = []
+        records = []
         seen_barcodes = set()
         file_duplicates = 0
-        unchanged_records = 0
         invalid_rows = 0
-        invalid_row_details = []
 
         for row in csv_reader:
+            rejected = file_duplicates + invalid_rows
+            job.update(parsed=len(records) + rejected, rejected=rejected)
+
             if len(row) < 6:
                 invalid_rows += 1
                 continue
@@ -388,7 +414,7 @@ def upload_participants():
             # Skip if invalid barcode
             if not database.validate_barcode(barcode):
                 invalid_rows += 1
-                invalid_row_details.append(
+                job.details.append(
                     f"Row {csv_reader.line_num}: Invalid barcode '{barcode}'"
                 )
                 continue
@@ -405,7 +431,7 @@ def upload_participants():
                     dob = date_obj.strftime("%Y-%m-%d")
             except ValueError:
                 invalid_rows += 1
-                invalid_row_details.append(
+                job.details.append(
                     f"Row {csv_reader.line_num}: Invalid date '{row[4]}'"
                 )
                 continue
@@ -413,14 +439,14 @@ def upload_participants():
             # Skip if required fields missing or invalid gender
             if not all([fname, lname, gender, dob, club]):
                 invalid_rows += 1
-                invalid_row_details.append(
+                job.details.append(
                     f"Row {csv_reader.line_num}: Missing required fields"
                 )
                 continue
 
             if gender not in ["Male", "Female"]:
                 invalid_rows += 1
-                invalid_row_details.append(
+                job.details.append(
                     f"Row {csv_reader.line_num}: Invalid gender '{gender}'"
                 )
                 continue
@@ -429,38 +455,11 @@ def upload_participants():
             normalized_club = database.validate_and_normalize_club(club, clubs)
             if not normalized_club:
                 invalid_rows += 1
-                invalid_row_details.append(
-                    f"Row {csv_reader.line_num}: Invalid club '{club}'"
-                )
-                continue
-
-            # Check if participant exists in database
-            existing_participant = database.get_participant(barcode)
-            if existing_participant:
-                # Compare data to see if update is needed
-                new_data = {
-                    "first_name": fname,
-                    "last_name": lname,
-                    "gender": gender,
-                    "date_of_birth": dob,
-                    "club": normalized_club,
-                }
-
-                # Check if any field has changed
-                has_changes = False
-                for key, value in new_data.items():
-                    if existing_participant.get(key) != value:
-                        has_changes = True
-                        break
-
-                if has_changes:
-                    updated_participants.append((barcode, new_data))
-                else:
-                    unchanged_records += 1
+                job.details.append(f"Row {csv_reader.line_num}: Invalid club '{club}'")
                 continue
 
             seen_barcodes.add(barcode)
-            new_participants.append(
+            records.append(
                 {
                     "first_name": fname,
                     "last_name": lname,
@@ -471,28 +470,30 @@ def upload_participants():
                 }
             )
 
-        if new_participants or updated_participants:
-            database.process_participants_batch(new_participants, updated_participants)
-
-        message = f"Added {len(new_participants)} new participants."
-        if len(updated_participants) > 0:
-            message += f" Updated {len(updated_participants)} existing participants."
-        if unchanged_records > 0:
-            message += f" {unchanged_records} records unchanged."
-        if file_duplicates > 0:
-            message += f" Skipped {file_duplicates} duplicates in file."
-        if invalid_rows > 0:
-            message += f" Skipped {invalid_rows} invalid rows."
-        flash(message)
+    rejected = file_duplicates + invalid_rows
+    job.update(parsed=len(records) + rejected, rejected=rejected)
 
-        # Flash invalid row details
-        for detail in invalid_row_details:
-            flash(detail)
+    # Diff against stored participants in bulk rather than row by row
+    diff = database.diff_participants(records)
+    new_participants = diff["new"]
+    updated_participants = diff["updated"]
+    unchanged_records = diff["unchanged"]
 
-    except Exception:
-        flash("Failed to process CSV file. Please check the format.")
+    if new_participants or updated_participants:
+        database.process_participants_batch(new_participants, updated_participants)
+    job.update(written=len(new_participants) + len(updated_participants))
 
-    return redirect(url_for("participants"))
+    message = f"Added {len(new_participants)} new participants."
+    if len(updated_participants) > 0:
+        message += f" Updated {len(updated_participants)} existing participants."
+    if unchanged_records > 0:
+        message += f" {unchanged_records} records unchanged."
+    if file_duplicates > 0:
+        message += f" Skipped {file_duplicates} duplicates in file."
+    if invalid_rows > 0:
+        message += f" Skipped {invalid_rows} invalid rows."
+    message += f" Used {diff['reads']} Firestore reads."
+    return message
 
 
 @app.route("/edit_participant/<participant_id>", methods=["GET"])
@@ -797,7 +798,7 @@ def delete_all_race_results(season_name, race_name):
 @app.route("/process_upload_results", methods=["POST"])
 @login_required
 def process_upload_results():
-    """Process uploaded CSV results"""
+    """Queue an uploaded results CSV as a background job"""
     season_name = request.form.get("season_name", "")
     race_name = request.form.get("race_name", "")
 
@@ -815,9 +816,6 @@ def process_upload_results():
         return redirect(request.referrer or url_for("races"))
 
     try:
-        import csv
-        import io
-
         # Get season data once for age calculation
         season_data = database.get_season(season_name)
         season_start_date = season_data.get("start_date") if season_data else None
@@ -826,55 +824,68 @@ def process_upload_results():
             flash("Season start date is required for results upload")
             return redirect(request.referrer or url_for("races"))
 
-        content = file.read().decode("utf-8-sig")  # Handle BOM
-        csv_reader = csv.reader(io.StringIO(content))
-
-        results_data = []
-        seen_tokens = set()
-        duplicates = []
-        invalid_barcodes = 0
-        invalid_tokens = 0
-        row_count = 0
+        job_id = jobs.submit_upload(
+            "process_upload_results",
+            import_race_results,
+            file,
+            season_name,
+            race_name,
+            season_data,
+            params={
+                "filename": file.filename,
+                "season_name": season_name,
+                "race_name": race_name,
+                "return_url": request.referrer or url_for("races"),
+            },
+        )
+    except Exception as e:
+        flash(f"Failed to process CSV file: {str(e)}")
+        return redirect(request.referrer or url_for("races"))
 
-        for row in csv_reader:
-            row_count += 1
-            if len(row) < 2:
-                continue
+    return redirect(url_for("job_progress", job_id=job_id))
 
-            barcode = row[0].strip().lstrip("\ufeff")  # Remove BOM if present
-            finish_token = row[1].strip()
 
-            if not finish_token:
-                continue
+def import_race_results(job, path, season_name, race_name, season_data):
+    """Add a race's results from a spooled CSV upload"""
+    season_start_date = season_data["start_date"]
+    skipped = {"invalid_barcodes": 0, "invalid_tokens": 0, "duplicates": []}
+    accepted = 0
 
-            # Validate barcode and position token formats
-            if not database.validate_barcode(barcode):
-                invalid_barcodes += 1
-                continue
+    def count_rows():
+        rejected = (
+            skipped["invalid_barcodes"]
+            + skipped["invalid_tokens"]
+            + len(skipped["duplicates"])
+        )
+        job.update(parsed=accepted + rejected, rejected=rejected)
 
-            if not database.validate_position_token(finish_token):
-                invalid_tokens += 1
-                continue
+    def resolve_results(chunk):
+        nonlocal accepted
+        accepted += len(chunk)
+        count_rows()
 
-            if finish_token in seen_tokens:
-                duplicates.append(finish_token)
-                continue
+        # Resolve each chunk's participants in one batched lookup
+        participants = database.get_participants_by_barcodes(
+            [barcode for barcode, _ in chunk]
+        )
 
-            seen_tokens.add(finish_token)
+        # Calculate the chunk's age categories in one pass using season start date
+        try:
+            age_categories = database.calculate_age_categories(
+                season_start_date,
+                [
+                    participants.get(barcode, {}).get("date_of_birth")
+                    for barcode, _ in chunk
+                ],
+                season_data.get("age_category_size", 5),
+            )
+        except ValueError:
+            age_categories = ["Unknown"] * len(chunk)
 
-            # Get participant data
-            participant = database.get_participant(barcode)
+        results_data = []
+        for (barcode, finish_token), age_category in zip(chunk, age_categories):
+            participant = participants.get(barcode)
             if participant:
-                # Calculate age category using season start date
-                try:
-                    age_category = database.calculate_age_category(
-                        season_start_date,
-                        participant["date_of_birth"],
-                        season_data.get("age_category_size", 5),
-                    )
-                except Exception:
-                    age_category = "Unknown"
-
                 participant_data = {
                     "first_name": participant["first_name"],
                     "last_name": participant["last_name"],
@@ -892,24 +903,57 @@ def process_upload_results():
             results_data.append(
                 {"finish_token": finish_token, "participant": participant_data}
             )
+        return results_data
 
-        if results_data:
-            database.add_race_results_batch(season_name, race_name, results_data)
+    # The upload is decoded as it is read rather than held in memory
+    with open(path, encoding="utf-8-sig", newline="") as lines:
+        rows = database.iter_result_rows(lines, skipped)
 
-        message = f"Uploaded {len(results_data)} results successfully!"
-        if duplicates:
-            message += f" Warning: {len(duplicates)} duplicate finish tokens were skipped: {', '.join(duplicates)}."
-        if invalid_barcodes > 0:
-            message += f" Skipped {invalid_barcodes} rows with invalid barcodes."
-        if invalid_tokens > 0:
-            message += f" Skipped {invalid_tokens} rows with invalid position tokens."
+        # Each chunk is written while the next is parsed and resolved
+        uploaded = database.add_race_results_stream(
+            season_name,
+            race_name,
+            (
+                resolve_results(chunk)
+                for chunk in database.chunked(rows, database.RESULTS_BATCH_SIZE)
+            ),
+            progress=lambda written: job.update(written=written),
+        )
 
-        flash(message)
+    count_rows()
+
+    duplicates = skipped["duplicates"]
+    message = f"Uploaded {uploaded} results successfully!"
+    if duplicates:
+        message += f" Warning: {len(duplicates)} duplicate finish tokens were skipped: {', '.join(duplicates)}."
+    if skipped["invalid_barcodes"] > 0:
+        message += f" Skipped {skipped['invalid_barcodes']} rows with invalid barcodes."
+    if skipped["invalid_tokens"] > 0:
+        message += (
+            f" Skipped {skipped['invalid_tokens']} rows with invalid position tokens."
+        )
+    return message
 
-    except Exception as e:
-        flash(f"Failed to process CSV file: {str(e)}")
 
-    return redirect(request.referrer or url_for("races"))
+@app.route("/jobs/<job_id>")
+@login_required
+def job_progress(job_id):
+    """Show a background job's progress until it finishes"""
+    job = jobs.get_status(job_id)
+    if job is None:
+        flash("Upload not found")
+        return redirect(url_for("races"))
+    return render_template("job.html", job=job, user=session.get("user"))
+
+
+@app.route("/jobs/<job_id>/status")
+@login_required
+def job_status(job_id):
+    """Get a background job's status and progress as JSON"""
+    job = jobs.get_status(job_id)
+    if job is None:
+        return {"error": "Job not found"}, 404
+    return job
 
 
 @app.route("/add_manual_result", methods=["POST"])
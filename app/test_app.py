@@ -1,6 +1,10 @@
 import os
+import threading
+import time
 import unittest
-from unittest.mock import Mock, patch
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, Mock, patch
 
 # Set environment variables for testing
 os.environ["GOOGLE_CLOUD_PROJECT"] = "test-project"
@@ -14,12 +18,51 @@ import app
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "shared_libs"))
 
 import database
+import jobs
+import response_cache
+import single_flight
 
 
 class TestApp(unittest.TestCase):
     def setUp(self):
         app.app.config["TESTING"] = True
         self.client = app.app.test_client()
+        # Championship endpoints compute live unless a test provides standings
+        patcher = patch("database.get_championship_standings", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("database.get_versions", side_effect=self._versions)
+        self.mock_get_versions = patcher.start()
+        self.addCleanup(patcher.stop)
+        # Each test starts without cached responses
+        response_cache.clear_caches()
+        # Upload jobs run as their request is handled, against mock records
+        patcher = patch("jobs.runner", jobs.JobRunner(max_workers=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("database.create_job", return_value="job-1")
+        self.mock_create_job = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("database.update_job")
+        self.mock_update_job = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _job_outcome(self):
+        """Get the fields the last upload job recorded when it finished"""
+        return self.mock_update_job.call_args[0][1]
+
+    def _consume_results(self, season_name, race_name, chunks, progress=None):
+        """Stand in for add_race_results_stream, keeping the results it reads"""
+        self.written_results = [result for chunk in chunks for result in chunk]
+        return len(self.written_results)
+
+    @staticmethod
+    def _versions(
+        *scopes, version=1, updated_at=datetime(2025, 1, 1, tzinfo=timezone.utc)
+    ):
+        return {
+            scope: {"version": version, "updated_at": updated_at} for scope in scopes
+        }
 
     def test_validate_barcode_valid(self):
         self.assertTrue(database.validate_barcode("A12"))
@@ -323,9 +366,265 @@ class TestApp(unittest.TestCase):
     def test_api_seasons_not_found(self, mock_get_season):
         mock_get_season.return_value = None
 
+    @patch("database.get_championship")
+    @patch("database.get_default_season")
+    @patch("database.get_seasons")
+    @patch("database.get_races_by_season")
+    @patch("database.get_season")
+    def test_api_season_bundle(
+        self,
+        mock_get_season,
+        mock_get_races,
+        mock_get_seasons,
+        mock_get_default,
+        mock_get_championship,
+    ):
+        mock_get_season.return_value = {"age_category_size": 5}
+        mock_get_races.return_value = [
+            {"name": "Race1", "date": "2024-01-01"},
+            {"name": "Race2", "date": "2999-01-01"},
+        ]
+        mock_get_seasons.return_value = ["season1"]
+        mock_get_default.return_value = "season1"
+        mock_get_championship.return_value = {
+            "season": "season1",
+            "championship_type": "team",
+            "championship_name": "Male Team Championship",
+            "races": [],
+            "standings": [],
+        }
+
+        response = self.client.get("/api/seasons/season1/bundle")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Cache-Control"], "public, max-age=60")
+        self.assertEqual(response.json["default_race"], "Race1")
+        self.assertEqual(response.json["seasons"], ["season1"])
+        self.assertEqual(len(response.json["races"]), 2)
+        self.assertIsNone(response.json["championship"])
+        mock_get_championship.assert_not_called()
+
+        response = self.client.get("/api/seasons/season1/bundle?type=team&gender=Male")
+        self.assertEqual(
+            response.json["championship"]["championship_name"],
+            "Male Team Championship",
+        )
+        mock_get_championship.assert_called_with("season1", "team", "Male", None)
+
+    @patch("database.get_individual_championships")
+    @patch("database.get_default_season")
+    @patch("database.get_seasons")
+    @patch("database.get_races_by_season")
+    @patch("database.get_season")
+    def test_api_default_season_bundle(
+        self,
+        mock_get_season,
+        mock_get_races,
+        mock_get_seasons,
+        mock_get_default,
+        mock_get_individual,
+    ):
+        mock_get_season.return_value = {"age_category_size": 10}
+        mock_get_races.return_value = [{"name": "Race1", "date": "2024-01-01"}]
+        mock_get_seasons.return_value = ["season1", "season2"]
+        mock_get_default.return_value = "season2"
+        mock_get_individual.return_value = [
+            {
+                "season": "season2",
+                "championship_type": "individual",
+                "championship_name": "Male Individual Championship",
+                "gender": "Male",
+                "races": [],
+                "standings": [],
+            }
+        ]
+
+        # One request loads the default season with every individual standing
+        response = self.client.get("/api/seasons/bundle?type=individual&category=all")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["name"], "season2")
+        self.assertEqual(response.json["age_category_size"], 10)
+        self.assertEqual(response.json["seasons"], ["season1", "season2"])
+        self.assertIsNone(response.json["championship"])
+        self.assertEqual(
+            response.json["championships"][0]["championship_name"],
+            "Male Individual Championship",
+        )
+        mock_get_season.assert_called_with("season2")
+        mock_get_individual.assert_called_once_with("season2")
+
+        # Without a default season the bundle still lists every season
+        mock_get_default.return_value = None
+        response = self.client.get("/api/seasons/bundle")
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json["name"])
+        self.assertEqual(response.json["seasons"], ["season1", "season2"])
+
+    @patch("database.get_season")
+    def test_api_season_bundle_errors(self, mock_get_season):
+        mock_get_season.return_value = None
+
+        response = self.client.get("/api/seasons/season1/bundle?type=team")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/seasons/season1/bundle?type=x&gender=Male")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/seasons/season1/bundle")
+        self.assertEqual(response.status_code, 404)
+
         response = self.client.get("/api/seasons/nonexistent")
         self.assertEqual(response.status_code, 404)
 
+    @patch("database.get_clubs")
+    def test_api_conditional_get(self, mock_get_clubs):
+        mock_get_clubs.return_value = [{"name": "Test Club", "short_names": []}]
+
+        response = self.client.get("/api/clubs")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Cache-Control"], "public, max-age=3600")
+        self.assertEqual(
+            response.headers["Last-Modified"], "Wed, 01 Jan 2025 00:00:00 GMT"
+        )
+        etag = response.headers["ETag"]
+        self.mock_get_versions.assert_called_with("clubs")
+
+        response = self.client.get("/api/clubs", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.headers["Cache-Control"], "public, max-age=3600")
+        response = self.client.get(
+            "/api/clubs",
+            headers={"If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"},
+        )
+        self.assertEqual(response.status_code, 304)
+        mock_get_clubs.assert_called_once()
+
+    @patch("database.get_race_results")
+    def test_api_race_results_not_modified(self, mock_get_results):
+        mock_get_results.return_value = []
+
+        response = self.client.get("/api/seasons/season/races/race")
+        etag = response.headers["ETag"]
+        self.mock_get_versions.assert_called_with("season:season")
+
+        # A 304 is answered from the version stamps without reading results
+        response = self.client.get(
+            "/api/seasons/season/races/race", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+        mock_get_results.assert_called_once()
+
+        # Other query arguments and newer versions get a different ETag
+        response = self.client.get(
+            "/api/seasons/season/races/race?gender=Male",
+            headers={"If-None-Match": etag},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.mock_get_versions.side_effect = lambda *scopes: self._versions(
+            *scopes, version=2
+        )
+        # The client already holds the cached response served while it is
+        # refreshed, then gets the new ETag
+        response = self.client.get(
+            "/api/seasons/season/races/race", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["X-Cache"], "STALE")
+        deadline = time.monotonic() + 5
+        while response.status_code == 304 and time.monotonic() < deadline:
+            time.sleep(0.001)
+            response = self.client.get(
+                "/api/seasons/season/races/race", headers={"If-None-Match": etag}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    @patch("database.get_participant_results")
+    def test_api_concurrent_requests_are_coalesced(self, mock_get_results):
+        release = threading.Event()
+
+        def results(participant_id):
+            release.wait(5)
+            return [{"season": "season", "race_name": "race", "position": 1}]
+
+        mock_get_results.side_effect = results
+        shared = single_flight.get_stats()["shared"]
+        url = "/api/participants/A1/results"
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(self.client.get, url) for _ in range(4)]
+            # Hold the first computation until the others are waiting on it
+            deadline = time.monotonic() + 5
+            while (
+                single_flight.get_stats()["shared"] < shared + 3
+                and time.monotonic() < deadline
+            ):
+                time.sleep(0.001)
+            release.set()
+            responses = [future.result() for future in futures]
+
+        self.assertEqual([r.status_code for r in responses], [200] * 4)
+        self.assertEqual(single_flight.get_stats()["shared"], shared + 3)
+        mock_get_results.assert_called_once_with("A1")
+
+        # Finished computations are not reused by later requests
+        self.client.get(url)
+        self.assertEqual(mock_get_results.call_count, 2)
+
+    @patch("database.get_championship")
+    def test_api_championship_response_cache(self, mock_get_championship):
+        mock_get_championship.return_value = {
+            "season": "season",
+            "championship_type": "team",
+            "standings": [],
+        }
+        url = "/api/seasons/season/championship/team?gender=Male"
+
+        response = self.client.get(url)
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertEqual(response.headers["Age"], "0")
+        etag = response.headers["ETag"]
+        response = self.client.get(url)
+        self.assertEqual(response.headers["X-Cache"], "HIT")
+        self.assertEqual(response.headers["ETag"], etag)
+        mock_get_championship.assert_called_once()
+
+        # Past the soft TTL the cached body is served while it is refreshed
+        later = time.monotonic() + 120
+        with patch("response_cache.time.monotonic", return_value=later):
+            response = self.client.get(url)
+            self.assertEqual(response.headers["X-Cache"], "STALE")
+            self.assertEqual(response.headers["Age"], "120")
+            deadline = time.monotonic() + 5
+            while (
+                self.client.get(url).headers["X-Cache"] != "HIT"
+                and time.monotonic() < deadline
+            ):
+                time.sleep(0.001)
+        self.assertEqual(mock_get_championship.call_count, 2)
+
+        # Past the hard TTL nothing is cached, so the request waits
+        with patch("response_cache.time.monotonic", return_value=later + 1000):
+            self.assertEqual(self.client.get(url).headers["X-Cache"], "MISS")
+        self.assertEqual(mock_get_championship.call_count, 3)
+
+        # Once results change the last body is served with the validators it
+        # was computed under while one refresh computes the current one
+        last_modified = response.headers["Last-Modified"]
+        self.mock_get_versions.side_effect = lambda *scopes: self._versions(
+            *scopes, version=2, updated_at=datetime(2025, 2, 1, tzinfo=timezone.utc)
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.headers["X-Cache"], "STALE")
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.headers["Last-Modified"], last_modified)
+        deadline = time.monotonic() + 5
+        while response.headers["X-Cache"] != "HIT" and time.monotonic() < deadline:
+            time.sleep(0.001)
+            response = self.client.get(url)
+        self.assertEqual(response.headers["X-Cache"], "HIT")
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertNotEqual(response.headers["Last-Modified"], last_modified)
+        self.assertEqual(mock_get_championship.call_count, 4)
+
     @patch("database.get_race_results")
     def test_api_races_with_results(self, mock_get_results):
         mock_get_results.return_value = [
@@ -379,26 +678,24 @@ class TestApp(unittest.TestCase):
                     "gender": "Male",
                     "age_category": "Senior",
                 },
-            },
-            {
-                "finish_token": "2",
-                "participant": {
-                    "first_name": "Jane",
-                    "gender": "Female",
-                    "age_category": "V40",
-                },
-            },
+            }
         ]
 
-        # Test gender filter
+        # Filters are passed down to the Firestore query
         response = self.client.get("/api/seasons/season/races/race?gender=Male")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.json["results"]), 1)
+        mock_get_results.assert_called_with(
+            "season", "race", gender="Male", category=None
+        )
 
-        # Test category filter
-        response = self.client.get("/api/seasons/season/races/race?category=Senior")
+        response = self.client.get(
+            "/api/seasons/season/races/race?category=Senior&gender=Male"
+        )
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json["results"]), 1)
+        mock_get_results.assert_called_with(
+            "season", "race", gender="Male", category="Senior"
+        )
 
     @patch("database.get_race_results")
     def test_api_races_show_missing_data(self, mock_get_results):
@@ -417,6 +714,52 @@ class TestApp(unittest.TestCase):
         )
         self.assertEqual(len(response.json["results"]), 2)
 
+    @patch("database.get_race_results")
+    def test_api_races_limit(self, mock_get_results):
+        mock_get_results.return_value = [
+            {"finish_token": "P1", "participant": {"first_name": "John"}},
+            {"finish_token": "P2", "participant": {"first_name": "Jane"}},
+        ]
+
+        response = self.client.get("/api/seasons/season/races/race?limit=1")
+        self.assertEqual(len(response.json["results"]), 1)
+        mock_get_results.assert_called_with(
+            "season",
+            "race",
+            order_by_position=True,
+            limit=1,
+            gender=None,
+            category=None,
+        )
+
+        # Filtered queries only read the top N matching results
+        self.client.get("/api/seasons/season/races/race?limit=1&gender=Male")
+        mock_get_results.assert_called_with(
+            "season",
+            "race",
+            order_by_position=True,
+            limit=1,
+            gender="Male",
+            category=None,
+        )
+
+    @patch("database.get_race_results")
+    def test_api_races_limit_skips_missing_data(self, mock_get_results):
+        results = [
+            {"finish_token": "P1", "participant": {"first_name": "John"}},
+            {"finish_token": "P2", "participant": {}},
+            {"finish_token": "P3", "participant": {"first_name": "Jane"}},
+        ]
+        mock_get_results.side_effect = lambda *args, limit=None, **kwargs: results[
+            :limit
+        ]
+
+        # The unnamed second finisher must not cost the response a row
+        response = self.client.get("/api/seasons/season/races/race?limit=2")
+        self.assertEqual(
+            [r["finish_token"] for r in response.json["results"]], ["P1", "P3"]
+        )
+
     def test_api_championship_missing_gender(self):
         response = self.client.get("/api/seasons/season/championship/team")
         self.assertEqual(response.status_code, 400)
@@ -444,6 +787,74 @@ class TestApp(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json["championship_type"], "team")
 
+    @patch("database.load_season_results")
+    @patch("database.get_championship_standings")
+    def test_api_championship_serves_materialised_standings(
+        self, mock_get_standings, mock_load_season_results
+    ):
+        mock_get_standings.return_value = {
+            "season": "season",
+            "gender": "Female",
+            "championship_type": "team",
+            "championship_name": "Female Team Championship",
+            "races": [],
+            "standings": [{"name": "Club A", "total_points": 3, "race_points": {}}],
+        }
+
+        response = self.client.get(
+            "/api/seasons/season/championship/team?gender=Female"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["standings"][0]["name"], "Club A")
+        mock_get_standings.assert_called_with("season", "team", "Female", None)
+        mock_load_season_results.assert_not_called()
+
+    @patch("database.get_individual_championships")
+    def test_api_all_individual_championships(self, mock_get_championships):
+        mock_get_championships.return_value = [
+            {
+                "season": "season",
+                "gender": "Male",
+                "category": "V40",
+                "championship_type": "individual",
+                "championship_name": "Male V40 Individual Championship",
+                "races": [{"name": "Race1"}],
+                "standings": [
+                    {
+                        "name": "John Doe",
+                        "age_category": "V40",
+                        "total_points": 1,
+                        "race_positions": {"Race1": 1},
+                    }
+                ],
+                "best_of": 1,
+            }
+        ]
+
+        response = self.client.get("/api/seasons/season/championship/individual/all")
+        self.assertEqual(response.status_code, 200)
+        championship = response.json["championships"][0]
+        self.assertEqual(
+            (championship["gender"], championship["category"]), ("Male", "V40")
+        )
+        self.assertEqual(championship["standings"][0]["race_positions"], {"Race1": 1})
+
+        mock_get_championships.return_value = None
+        # The season's races are deleted, so its version moves on
+        self.mock_get_versions.side_effect = lambda *scopes: self._versions(
+            *scopes, version=2
+        )
+        # The last response is served once while the refresh finds no races
+        url = "/api/seasons/season/championship/individual/all"
+        response = self.client.get(url)
+        self.assertEqual(response.headers["X-Cache"], "STALE")
+        deadline = time.monotonic() + 5
+        while response.status_code == 200 and time.monotonic() < deadline:
+            time.sleep(0.001)
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
     def test_api_individual_championship_missing_gender(self):
         response = self.client.get("/api/seasons/season/championship/individual")
         self.assertEqual(response.status_code, 400)
@@ -953,12 +1364,19 @@ class TestApp(unittest.TestCase):
 
     @patch("database.is_admin_email")
     @patch("database.get_clubs")
+    @patch("database.diff_participants")
     @patch("database.process_participants_batch")
     def test_upload_participants_with_file(
-        self, mock_batch, mock_get_clubs, mock_is_admin
+        self, mock_batch, mock_diff, mock_get_clubs, mock_is_admin
     ):
         mock_is_admin.return_value = True
         mock_get_clubs.return_value = [{"name": "Test Club", "short_names": ["TC"]}]
+        mock_diff.return_value = {
+            "new": [{"barcode": "A123456", "first_name": "John"}],
+            "updated": [],
+            "unchanged": 0,
+            "reads": 2,
+        }
 
         with self.client.session_transaction() as sess:
             sess["user"] = {"email": "test@example.com"}
@@ -966,28 +1384,88 @@ class TestApp(unittest.TestCase):
         # Create a mock CSV file
         from io import BytesIO
 
-        csv_data = b"A123456,John,Doe,Male,01/01/1990,Test Club\n"
+        csv_data = b"ID,Fname,LName,Gender,DOB,Club\nA123456,John,Doe,Male,01/01/1990,Test Club\n"
 
         response = self.client.post(
             "/upload_participants", data={"file": (BytesIO(csv_data), "test.csv")}
         )
         self.assertEqual(response.status_code, 302)
+        records = mock_diff.call_args[0][0]
+        self.assertEqual(records[0]["barcode"], "A123456")
+        self.assertEqual(records[0]["date_of_birth"], "1990-01-01")
+        mock_batch.assert_called_once_with(
+            [{"barcode": "A123456", "first_name": "John"}], []
+        )
 
     @patch("database.is_admin_email")
     @patch("database.get_season")
-    @patch("database.get_participant")
-    @patch("database.add_race_results_batch")
+    @patch("database.get_participants_by_barcodes")
+    @patch("database.add_race_results_stream")
+    def test_process_upload_results_streams_chunks(
+        self, mock_stream, mock_get_participants, mock_get_season, mock_is_admin
+    ):
+        mock_is_admin.return_value = True
+        mock_get_season.return_value = {"start_date": "2024-01-01"}
+        mock_get_participants.return_value = {}
+        chunks_read = []
+
+        def write(season_name, race_name, chunks, progress=None):
+            for chunk in chunks:
+                # Each chunk is resolved only as the writer reaches it
+                chunks_read.append((len(chunk), mock_get_participants.call_count))
+            return sum(size for size, _ in chunks_read)
+
+        mock_stream.side_effect = write
+
+        with self.client.session_transaction() as sess:
+            sess["user"] = {"email": "test@example.com"}
+
+        from io import BytesIO
+
+        rows = [f"A{100000 + i},P{i + 1}" for i in range(1200)]
+        rows += ["A100000,P1", "B1,P2000"]
+        csv_data = "\ufeff" + "\n".join(rows) + "\n"
+
+        response = self.client.post(
+            "/process_upload_results",
+            data={
+                "season_name": "2024",
+                "race_name": "Test Race",
+                "file": (BytesIO(csv_data.encode()), "results.csv"),
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.location.endswith("/jobs/job-1"))
+        self.assertEqual(chunks_read, [(500, 1), (500, 2), (200, 3)])
+        self.assertEqual(mock_get_participants.call_args_list[0][0][0][0], "A100000")
+        outcome = self._job_outcome()
+        self.assertEqual(outcome["status"], "done")
+        self.assertEqual(
+            outcome["message"],
+            "Uploaded 1200 results successfully! Warning: 1 duplicate finish "
+            "tokens were skipped: P1. Skipped 1 rows with invalid barcodes.",
+        )
+        self.assertEqual(outcome["progress"]["parsed"], 1202)
+        self.assertEqual(outcome["progress"]["rejected"], 2)
+
+    @patch("database.is_admin_email")
+    @patch("database.get_season")
+    @patch("database.get_participants_by_barcodes")
+    @patch("database.add_race_results_stream")
     def test_process_upload_results_with_file(
-        self, mock_batch, mock_get_participant, mock_get_season, mock_is_admin
+        self, mock_stream, mock_get_participants, mock_get_season, mock_is_admin
     ):
         mock_is_admin.return_value = True
+        mock_stream.side_effect = self._consume_results
         mock_get_season.return_value = {"start_date": "2024-01-01"}
-        mock_get_participant.return_value = {
-            "first_name": "John",
-            "last_name": "Doe",
-            "gender": "Male",
-            "date_of_birth": "1990-01-01",
-            "club": "Test Club",
+        mock_get_participants.return_value = {
+            "A123456": {
+                "first_name": "John",
+                "last_name": "Doe",
+                "gender": "Male",
+                "date_of_birth": "1990-01-01",
+                "club": "Test Club",
+            }
         }
 
         with self.client.session_transaction() as sess:
@@ -995,7 +1473,7 @@ class TestApp(unittest.TestCase):
 
         from io import BytesIO
 
-        csv_data = b"ID,Pos\nA123456,1\n"
+        csv_data = b"ID,Pos\nA123456,P1\nA654321,P2\n"
 
         response = self.client.post(
             "/process_upload_results",
@@ -1006,6 +1484,13 @@ class TestApp(unittest.TestCase):
             },
         )
         self.assertEqual(response.status_code, 302)
+        # All barcodes are resolved with a single batched lookup
+        mock_get_participants.assert_called_once_with(["A123456", "A654321"])
+        results_data = self.written_results
+        self.assertEqual(results_data[0]["participant"]["first_name"], "John")
+        self.assertEqual(
+            results_data[1]["participant"], {"parkrun_barcode_id": "A654321"}
+        )
 
     def test_login_route(self):
         response = self.client.get("/login")
@@ -1390,6 +1875,61 @@ class TestApp(unittest.TestCase):
         )
         self.assertEqual(response.status_code, 302)
 
+    @patch("database.is_admin_email")
+    @patch("database.get_season")
+    @patch("database.add_race_results_stream")
+    def test_process_upload_results_job_failure(
+        self, mock_stream, mock_get_season, mock_is_admin
+    ):
+        mock_is_admin.return_value = True
+        mock_get_season.return_value = {"start_date": "2024-01-01"}
+        mock_stream.side_effect = Exception("Write failed")
+
+        with self.client.session_transaction() as sess:
+            sess["user"] = {"email": "test@example.com"}
+
+        from io import BytesIO
+
+        response = self.client.post(
+            "/process_upload_results",
+            data={
+                "season_name": "2024",
+                "race_name": "Test Race",
+                "file": (BytesIO(b"A123456,P1\n"), "results.csv"),
+            },
+        )
+        self.assertTrue(response.location.endswith("/jobs/job-1"))
+        self.assertEqual(self.mock_create_job.call_args[0][1]["race_name"], "Test Race")
+        outcome = self._job_outcome()
+        self.assertEqual(outcome["status"], "failed")
+        self.assertEqual(outcome["error"], "Write failed")
+
+    @patch("database.is_admin_email")
+    @patch("database.get_job")
+    def test_job_status(self, mock_get_job, mock_is_admin):
+        mock_is_admin.return_value = True
+        mock_get_job.return_value = {
+            "id": "job-1",
+            "kind": "process_upload_results",
+            "params": {"filename": "results.csv", "return_url": "/races"},
+            "status": "done",
+            "progress": {"parsed": 2, "written": 2, "rejected": 0},
+            "message": "Uploaded 2 results successfully!",
+            "details": [],
+        }
+
+        with self.client.session_transaction() as sess:
+            sess["user"] = {"email": "test@example.com"}
+
+        response = self.client.get("/jobs/job-1/status")
+        self.assertEqual(response.json["message"], "Uploaded 2 results successfully!")
+        response = self.client.get("/jobs/job-1")
+        self.assertIn(b"Uploaded 2 results successfully!", response.data)
+
+        mock_get_job.return_value = None
+        response = self.client.get("/jobs/missing")
+        self.assertTrue(response.location.endswith("/races"))
+
     def test_public_results_route(self):
         response = self.client.get("/results")
         self.assertEqual(response.status_code, 200)
@@ -1398,8 +1938,8 @@ class TestApp(unittest.TestCase):
         response = self.client.get("/register")
         self.assertEqual(response.status_code, 200)
 
-    @patch("database.get_participant_results")
-    @patch("database.get_participant")
+    @patch("async_database.get_participant_results", new_callable=AsyncMock)
+    @patch("async_database.get_participant", new_callable=AsyncMock)
     def test_participant_results_route(self, mock_get_participant, mock_get_results):
         mock_get_participant.return_value = {
             "first_name": "John",
@@ -1420,12 +1960,16 @@ class TestApp(unittest.TestCase):
 
         response = self.client.get("/participant/A123456")
         self.assertEqual(response.status_code, 200)
-        mock_get_participant.assert_called_with("A123456")
-        mock_get_results.assert_called_with("A123456")
+        mock_get_participant.assert_awaited_with("A123456")
+        mock_get_results.assert_awaited_with("A123456")
 
-    @patch("database.get_participant")
-    def test_participant_results_not_found(self, mock_get_participant):
+    @patch("async_database.get_participant_results", new_callable=AsyncMock)
+    @patch("async_database.get_participant", new_callable=AsyncMock)
+    def test_participant_results_not_found(
+        self, mock_get_participant, mock_get_results
+    ):
         mock_get_participant.return_value = None
+        mock_get_results.return_value = []
 
         response = self.client.get("/participant/A999999")
         self.assertEqual(response.status_code, 302)
@@ -1757,7 +2301,7 @@ class TestApp(unittest.TestCase):
     # CSV Results Processing Tests
     @patch("database.is_admin_email")
     @patch("database.get_participant")
-    @patch("database.add_race_results_batch")
+    @patch("database.add_race_results_stream")
     def test_process_upload_results_csv_empty_finish_token(
         self, mock_batch, mock_get_participant, mock_is_admin
     ):
@@ -1789,7 +2333,7 @@ class TestApp(unittest.TestCase):
 
     @patch("database.is_admin_email")
     @patch("database.get_participant")
-    @patch("database.add_race_results_batch")
+    @patch("database.add_race_results_stream")
     def test_process_upload_results_csv_duplicate_tokens(
         self, mock_batch, mock_get_participant, mock_is_admin
     ):
@@ -1821,7 +2365,7 @@ class TestApp(unittest.TestCase):
 
     @patch("database.is_admin_email")
     @patch("database.get_participant")
-    @patch("database.add_race_results_batch")
+    @patch("database.add_race_results_stream")
     def test_process_upload_results_csv_unknown_participant(
         self, mock_batch, mock_get_participant, mock_is_admin
     ):
@@ -1847,7 +2391,7 @@ class TestApp(unittest.TestCase):
 
     @patch("database.is_admin_email")
     @patch("database.get_participant")
-    @patch("database.add_race_results_batch")
+    @patch("database.add_race_results_stream")
     def test_process_upload_results_csv_invalid_date_format(
         self, mock_batch, mock_get_participant, mock_is_admin
     ):
@@ -2162,7 +2706,8 @@ class TestApp(unittest.TestCase):
             {"name": "Race2"},
             {"name": "Race3"},
         ]
-        mock_get_results.side_effect = [
+        # Races are fetched concurrently, so key results by race name
+        results_by_race = [
             # Race 1
             [
                 {
@@ -2197,6 +2742,9 @@ class TestApp(unittest.TestCase):
                 }
             ],  # Valid name
         ]
+        mock_get_results.side_effect = lambda season, race, **kwargs: results_by_race[
+            int(race.removeprefix("Race")) - 1
+        ]
 
         response = self.client.get(
             "/api/seasons/season/championship/individual?gender=Male"
@@ -2217,7 +2765,8 @@ class TestApp(unittest.TestCase):
             {"name": "Race2"},
             {"name": "Race3"},
         ]
-        mock_get_results.side_effect = [
+        # Races are fetched concurrently, so key results by race name
+        results_by_race = [
             # Race 1
             [
                 {
@@ -2252,6 +2801,9 @@ class TestApp(unittest.TestCase):
                 }
             ],
         ]
+        mock_get_results.side_effect = lambda season, race, **kwargs: results_by_race[
+            int(race.removeprefix("Race")) - 1
+        ]
 
         response = self.client.get(
             "/api/seasons/season/championship/individual?gender=Male"
@@ -9,6 +9,16 @@ including all collections and subcollections.
 import json
 import sys
 from google.cloud import firestore
+from google.cloud.firestore_v1.bulk_writer import BulkRetry, BulkWriterOptions
+
+# gRPC status codes worth retrying: deadline exceeded, resource exhausted,
+# aborted (contention), internal and unavailable
+RETRYABLE_CODES = {4, 8, 10, 13, 14}
+MAX_ATTEMPTS = 5
+# Write rate in operations a second, ramped from the first to the second by
+# 50% every five minutes (Firestore's 500/50/5 rule)
+INITIAL_OPS_PER_SECOND = 500
+MAX_OPS_PER_SECOND = 10000
 
 def restore_cc6_firestore(backup_file):
     """Restore CC6 Firestore database from backup file"""
@@ -27,16 +37,17 @@ def restore_cc6_firestore(backup_file):
         return False
     
     db = firestore.Client()
+    writer, failures = create_bulk_writer(db)
     
     # Restore simple collections
     print("Restoring participants...")
-    restore_collection(db, "participants", backup_data.get("participants", {}))
+    restore_collection(writer, db, "participants", backup_data.get("participants", {}))
     
     print("Restoring clubs...")
-    restore_collection(db, "clubs", backup_data.get("clubs", {}))
+    restore_collection(writer, db, "clubs", backup_data.get("clubs", {}))
     
     print("Restoring admin emails...")
-    restore_collection(db, "admin_emails", backup_data.get("admin_emails", {}))
+    restore_collection(writer, db, "admin_emails", backup_data.get("admin_emails", {}))
     
     # Restore seasons with subcollections
     print("Restoring seasons with races and results...")
@@ -49,7 +60,7 @@ def restore_cc6_firestore(backup_file):
         races_data = season_data.pop("races", {})
         
         # Store season document
-        db.collection("season").document(season_id).set(season_data)
+        writer.set(db.collection("season").document(season_id), season_data)
         
         # Restore races subcollection
         for race_id, race_data in races_data.items():
@@ -59,15 +70,20 @@ def restore_cc6_firestore(backup_file):
             results_data = race_data.pop("results", {})
             
             # Store race document
-            db.collection("season").document(season_id).collection("races").document(race_id).set(race_data)
+            race_ref = db.collection("season").document(season_id).collection("races").document(race_id)
+            writer.set(race_ref, race_data)
             
             # Restore results subcollection
             if results_data:
-                restore_subcollection(
-                    db.collection("season").document(season_id).collection("races").document(race_id),
-                    "results",
-                    results_data
-                )
+                restore_subcollection(writer, race_ref, "results", results_data)
+    
+    # Wait for every queued write, including retries
+    writer.close()
+    if failures:
+        print(f"Restore failed: {len(failures)} writes could not be applied:")
+        for failure in failures:
+            print(f"  {failure}")
+        return False
     
     print("Restore completed successfully!")
     
@@ -89,46 +105,38 @@ def restore_cc6_firestore(backup_file):
     
     return True
 
-def restore_collection(db, collection_name, documents):
-    """Restore a simple collection"""
-    batch = db.batch()
-    batch_count = 0
+def create_bulk_writer(db):
+    """Create a BulkWriter that retries transient failures and records the rest.
+
+    Writes are sent as concurrent batches at a rate that ramps up from
+    INITIAL_OPS_PER_SECOND to MAX_OPS_PER_SECOND. Returns the writer and the list that collects a
+    "path: message" line for each write that still failed.
+    """
+    failures = []
+    writer = db.bulk_writer(options=BulkWriterOptions(
+        initial_ops_per_second=INITIAL_OPS_PER_SECOND,
+        max_ops_per_second=MAX_OPS_PER_SECOND,
+        retry=BulkRetry.exponential,
+    ))
+    
+    def on_write_error(failure, _writer):
+        if failure.code in RETRYABLE_CODES and failure.attempts < MAX_ATTEMPTS:
+            return True
+        failures.append(f"{failure.operation.reference.path}: {failure.message}")
+        return False
     
+    writer.on_write_error(on_write_error)
+    return writer, failures
+
+def restore_collection(writer, db, collection_name, documents):
+    """Restore a simple collection"""
     for doc_id, doc_data in documents.items():
-        doc_ref = db.collection(collection_name).document(doc_id)
-        batch.set(doc_ref, doc_data)
-        batch_count += 1
-        
-        # Firestore batch limit is 500 operations
-        if batch_count >= 500:
-            batch.commit()
-            batch = db.batch()
-            batch_count = 0
-    
-    # Commit remaining operations
-    if batch_count > 0:
-        batch.commit()
+        writer.set(db.collection(collection_name).document(doc_id), doc_data)
 
-def restore_subcollection(parent_doc_ref, subcollection_name, documents):
+def restore_subcollection(writer, parent_doc_ref, subcollection_name, documents):
     """Restore a subcollection"""
-    db = parent_doc_ref._client
-    batch = db.batch()
-    batch_count = 0
-    
     for doc_id, doc_data in documents.items():
-        doc_ref = parent_doc_ref.collection(subcollection_name).document(doc_id)
-        batch.set(doc_ref, doc_data)
-        batch_count += 1
-        
-        # Firestore batch limit is 500 operations
-        if batch_count >= 500:
-            batch.commit()
-            batch = db.batch()
-            batch_count = 0
-    
-    # Commit remaining operations
-    if batch_count > 0:
-        batch.commit()
+        writer.set(parent_doc_ref.collection(subcollection_name).document(doc_id), doc_data)
 
 if __name__ == "__main__":
     if len(sys.argv) != 2:
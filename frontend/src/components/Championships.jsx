@@ -1,70 +1,113 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 
 const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8080';
+const DEFAULT_TYPE = 'team';
+const DEFAULT_GENDER = 'Male';
+
+// Team standings come one gender at a time, individual ones all at once
+const bundleQuery = (type, gender) =>
+  new URLSearchParams(
+    type === 'individual' ? { type, category: 'all' } : { type, gender }
+  ).toString();
+
+// One bundle carries the season list, categories and standings, and each
+// is fetched once, with no season meaning the default one
+const fetchBundle = (bundles, season, type, gender) => {
+  const query = bundleQuery(type, gender);
+  const key = `${season}?${query}`;
+  if (!bundles.has(key)) {
+    const path = season ? `${season}/bundle` : 'bundle';
+    const request = fetch(`${API_BASE}/api/seasons/${path}?${query}`)
+      .then((res) => {
+        if (!res.ok) {
+          throw new Error(`Bundle request failed with ${res.status}`);
+        }
+        return res.json();
+      })
+      .then((data) => {
+        // Later requests name the season the default one resolved to
+        if (data.name) {
+          bundles.set(`${data.name}?${query}`, request);
+        }
+        return data;
+      })
+      .catch((error) => {
+        bundles.delete(key);
+        throw error;
+      });
+    bundles.set(key, request);
+  }
+  return bundles.get(key);
+};
+
+const ageCategories = (categorySize) => {
+  const cats = ['Senior'];
+  for (let age = 40; age <= 80; age += categorySize) {
+    cats.push(`V${age}`);
+  }
+  return cats;
+};
 
 function Championships() {
   const [seasons, setSeasons] = useState([]);
   const [selectedSeason, setSelectedSeason] = useState('');
-  const [selectedGender, setSelectedGender] = useState('Male');
-  const [championshipType, setChampionshipType] = useState('team');
+  const [selectedGender, setSelectedGender] = useState(DEFAULT_GENDER);
+  const [championshipType, setChampionshipType] = useState(DEFAULT_TYPE);
   const [selectedCategory, setSelectedCategory] = useState('');
   const [categories, setCategories] = useState([]);
   const [championshipData, setChampionshipData] = useState(null);
   const [loading, setLoading] = useState(false);
+  const bundles = useRef(new Map());
 
-  // Load seasons on mount
+  // The default season's bundle loads the whole page in one request
   useEffect(() => {
-    fetch(`${API_BASE}/api/seasons`)
-      .then((res) => res.json())
+    fetchBundle(bundles.current, '', DEFAULT_TYPE, DEFAULT_GENDER)
       .then((data) => {
-        setSeasons(data.seasons);
-        if (data.default_season) {
-          setSelectedSeason(data.default_season);
+        setSeasons(data.seasons || []);
+        if (data.name) {
+          setSelectedSeason(data.name);
         }
-      });
+        setCategories(ageCategories(data.age_category_size || 5));
+      })
+      .catch((error) => console.error('Error fetching season data:', error));
   }, []);
 
-  // Load season data for categories
-  useEffect(() => {
-    if (selectedSeason) {
-      fetch(`${API_BASE}/api/seasons/${selectedSeason}`)
-        .then((res) => res.json())
-        .then((data) => {
-          const categorySize = data.age_category_size || 5;
-          const cats = ['Senior'];
-          for (let age = 40; age <= 80; age += categorySize) {
-            cats.push(`V${age}`);
-          }
-          setCategories(cats);
-        });
+  const changeSeason = (season) => {
+    setSelectedSeason(season);
+    if (season) {
+      fetchBundle(bundles.current, season, championshipType, selectedGender)
+        .then((data) =>
+          setCategories(ageCategories(data.age_category_size || 5))
+        )
+        .catch((error) => console.error('Error fetching season data:', error));
     }
-  }, [selectedSeason]);
+  };
 
-  // Load championship results
+  // Pick the selected gender and category from every individual standing
+  const selectIndividual = (championships) =>
+    championships.find(
+      (championship) =>
+        championship.gender === selectedGender &&
+        (championship.category || '') === selectedCategory
+    ) || null;
+
+  // Load championship results, reusing any bundle already fetched
   const loadChampionship = () => {
     if (!selectedSeason || !selectedGender) return;
 
     setLoading(true);
-    let endpoint;
-    const params = new URLSearchParams();
-    if (championshipType === 'team') {
-      endpoint = `${API_BASE}/api/seasons/${selectedSeason}/championship/team`;
-      params.append('gender', selectedGender);
-    } else {
-      endpoint = `${API_BASE}/api/seasons/${selectedSeason}/championship/individual`;
-      params.append('gender', selectedGender);
-      if (selectedCategory) {
-        params.append('category', selectedCategory);
-      }
-    }
-    if (params.toString()) {
-      endpoint += `?${params.toString()}`;
-    }
-
-    fetch(endpoint)
-      .then((res) => res.json())
+    fetchBundle(
+      bundles.current,
+      selectedSeason,
+      championshipType,
+      selectedGender
+    )
       .then((data) => {
-        setChampionshipData(data);
+        setChampionshipData(
+          championshipType === 'individual'
+            ? selectIndividual(data.championships || [])
+            : data.championship
+        );
         setLoading(false);
       })
       .catch((error) => {
@@ -86,7 +129,7 @@ function Championships() {
           </label>
           <select
             value={selectedSeason}
-            onChange={(e) => setSelectedSeason(e.target.value)}
+            onChange={(e) => changeSeason(e.target.value)}
             className="px-4 py-2 border border-gray-300 dark:border-gray-600 rounded-lg bg-white dark:bg-gray-700 text-gray-900 dark:text-white focus:ring-2 focus:ring-blue-500 focus:border-transparent"
           >
             <option value="">Select Season</option>
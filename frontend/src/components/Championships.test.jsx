@@ -1,4 +1,4 @@
-import { render, screen, fireEvent } from '@testing-library/react';
+import { render, screen, fireEvent, waitFor } from '@testing-library/react';
 import { vi } from 'vitest';
 import Championships from './Championships';
 
@@ -52,3 +52,86 @@ test('displays season selector', () => {
   render(<Championships />);
   expect(screen.getByText('Season:')).toBeInTheDocument();
 });
+
+const championship = (name, type, category = null) => ({
+  season: '2024',
+  championship_type: type,
+  championship_name: name,
+  gender: 'Male',
+  category,
+  races: [],
+  standings: [],
+});
+
+test('loads the default season and its standings from one bundle', async () => {
+  fetch.mockResolvedValue({
+    ok: true,
+    json: async () => ({
+      name: '2024',
+      seasons: ['2023', '2024'],
+      age_category_size: 5,
+      championship: championship('Male Team Championship', 'team'),
+    }),
+  });
+
+  render(<Championships />);
+  await waitFor(() => {
+    expect(screen.getByDisplayValue('2024')).toBeInTheDocument();
+  });
+
+  fireEvent.click(screen.getByText('Load Championship'));
+
+  expect(
+    await screen.findByText('Male Team Championship - 2024')
+  ).toBeInTheDocument();
+  expect(fetch).toHaveBeenCalledTimes(1);
+  expect(fetch.mock.calls[0][0]).toContain(
+    '/api/seasons/bundle?type=team&gender=Male'
+  );
+});
+
+test('loads every individual category from one bundle', async () => {
+  fetch.mockImplementation(async (url) => ({
+    ok: true,
+    json: async () => ({
+      name: '2024',
+      seasons: ['2024'],
+      age_category_size: 5,
+      championship: null,
+      championships: url.includes('type=individual')
+        ? [
+            championship('Male Individual Championship', 'individual'),
+            championship(
+              'Male V40 Individual Championship',
+              'individual',
+              'V40'
+            ),
+          ]
+        : null,
+    }),
+  }));
+
+  render(<Championships />);
+  await waitFor(() => {
+    expect(screen.getByDisplayValue('2024')).toBeInTheDocument();
+  });
+
+  fireEvent.click(screen.getByDisplayValue('individual'));
+  fireEvent.click(screen.getByText('Load Championship'));
+  expect(
+    await screen.findByText('Male Individual Championship - 2024')
+  ).toBeInTheDocument();
+
+  fireEvent.click(screen.getByLabelText('V40'));
+  fireEvent.click(screen.getByText('Load Championship'));
+  expect(
+    await screen.findByText('Male V40 Individual Championship - 2024')
+  ).toBeInTheDocument();
+
+  expect(fetch.mock.calls.map(([url]) => url)).toEqual([
+    expect.stringContaining('/api/seasons/bundle?type=team&gender=Male'),
+    expect.stringContaining(
+      '/api/seasons/2024/bundle?type=individual&category=all'
+    ),
+  ]);
+});
@@ -2,6 +2,14 @@ import { useState, useEffect } from 'react';
 
 const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8080';
 
+const ageCategories = (categorySize) => {
+  const cats = ['Senior'];
+  for (let age = 40; age <= 80; age += categorySize) {
+    cats.push(`V${age}`);
+  }
+  return cats;
+};
+
 function RaceResults() {
   const [seasons, setSeasons] = useState([]);
   const [selectedSeason, setSelectedSeason] = useState('');
@@ -13,40 +21,38 @@ function RaceResults() {
   const [selectedCategory, setSelectedCategory] = useState('');
   const [categories, setCategories] = useState([]);
 
-  // Load seasons on mount
+  // The default season's bundle loads the seasons, races and default race
   useEffect(() => {
-    fetch(`${API_BASE}/api/seasons`)
+    fetch(`${API_BASE}/api/seasons/bundle`)
       .then((res) => res.json())
       .then((data) => {
-        setSeasons(data.seasons);
-        if (data.default_season) {
-          setSelectedSeason(data.default_season);
-        }
-        if (data.default_race && data.default_season) {
-          setSelectedRace(data.default_race);
+        setSeasons(data.seasons || []);
+        if (data.name) {
+          setSelectedSeason(data.name);
+          if (data.default_race) {
+            setSelectedRace(data.default_race);
+          }
         }
+        setRaces(data.races || []);
+        setCategories(ageCategories(data.age_category_size || 5));
       });
   }, []);
 
-  // Load races when season changes
-  useEffect(() => {
-    if (selectedSeason) {
-      fetch(`${API_BASE}/api/seasons/${selectedSeason}`)
+  // Load races when another season is picked
+  const changeSeason = (season) => {
+    setSelectedSeason(season);
+    setSelectedRace('');
+    setRaces([]);
+    setResults([]);
+    if (season) {
+      fetch(`${API_BASE}/api/seasons/${season}/bundle`)
         .then((res) => res.json())
         .then((data) => {
           setRaces(data.races || []);
-          if (!selectedRace) {
-            setResults([]);
-          }
-          const categorySize = data.age_category_size || 5;
-          const cats = ['Senior'];
-          for (let age = 40; age <= 80; age += categorySize) {
-            cats.push(`V${age}`);
-          }
-          setCategories(cats);
+          setCategories(ageCategories(data.age_category_size || 5));
         });
     }
-  }, [selectedSeason, selectedRace]);
+  };
 
   // Load results when race or filters change
   useEffect(() => {
@@ -77,7 +83,7 @@ function RaceResults() {
       <div className="flex flex-wrap justify-center gap-4 mb-8">
         <select
           value={selectedSeason}
-          onChange={(e) => setSelectedSeason(e.target.value)}
+          onChange={(e) => changeSeason(e.target.value)}
           className="px-4 py-2 border border-gray-300 dark:border-gray-600 rounded-lg bg-white dark:bg-gray-700 text-gray-900 dark:text-white focus:ring-2 focus:ring-blue-500 focus:border-transparent"
         >
           <option value="">Select Season</option>
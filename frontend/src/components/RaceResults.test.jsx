@@ -43,3 +43,30 @@ test('displays seasons after loading', async () => {
     expect(screen.getByText('Select Season')).toBeInTheDocument();
   });
 });
+
+test('loads the default season and race from one bundle', async () => {
+  fetch.mockImplementation(async (url) => ({
+    ok: true,
+    json: async () =>
+      url.includes('/bundle')
+        ? {
+            name: '2024',
+            seasons: ['2023', '2024'],
+            default_race: 'Race 1',
+            races: [{ name: 'Race 1', date: '2024-01-01' }],
+            age_category_size: 5,
+          }
+        : { results: [] },
+  }));
+
+  render(<RaceResults />);
+
+  await waitFor(() => {
+    expect(fetch).toHaveBeenCalledTimes(2);
+  });
+  expect(fetch.mock.calls.map(([url]) => url)).toEqual([
+    expect.stringContaining('/api/seasons/bundle'),
+    expect.stringContaining('/api/seasons/2024/races/Race 1'),
+  ]);
+  expect(screen.getByDisplayValue('Race 1 (2024-01-01)')).toBeInTheDocument();
+});
@@ -0,0 +1,92 @@
+"""Async Firestore reads for the participant results page.
+
+The page needs a participant and their results, two independent reads, so
+they are awaited together on Firestore's AsyncClient instead of one after
+the other. Flask views are synchronous, so coroutines are handed to one
+shared event loop with run(), which lets every request thread multiplex
+its Firestore I/O over a single client. Only these reads live here; every
+write, and the helpers that turn documents into participants and results,
+are in database.py so the two modules cannot drift apart. Further async
+reads belong here only once an endpoint gathers them.
+"""
+
+import asyncio
+import threading
+
+from google.cloud import firestore
+
+from database import (
+    participant_from_doc,
+    participant_results_from_docs,
+    participant_results_from_index,
+)
+
+# Initialize async Firestore
+db = firestore.AsyncClient()
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop():
+    """Get the shared event loop, starting its thread on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="async-database", daemon=True
+            ).start()
+    return _loop
+
+
+def run(coro):
+    """Run a coroutine on the shared event loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+async def gather(*coros):
+    """Await several independent reads concurrently, returning results in order"""
+    return await asyncio.gather(*coros)
+
+
+async def get_participant(barcode):
+    """Get single participant by barcode"""
+    doc = await db.collection("participants").document(barcode).get()
+    if doc.exists:
+        return participant_from_doc(doc)
+    return None
+
+
+async def get_participant_results(participant_id):
+    """Get all results for a specific participant across all seasons and races.
+
+    Reads the participant's results index, falling back to a collection
+    group query for participants without one.
+    """
+    index = await db.collection("participant_results").document(participant_id).get()
+    if index.exists:
+        return participant_results_from_index(participant_id, index.to_dict())
+
+    results_query = await (
+        db.collection_group("results")
+        .where(
+            filter=firestore.FieldFilter(
+                "participant.parkrun_barcode_id", "==", participant_id
+            )
+        )
+        .get()
+    )
+
+    race_refs = {}
+    for result in results_query:
+        race_ref = result.reference.parent.parent
+        race_refs[race_ref.path] = race_ref
+
+    race_dates = {}
+    if race_refs:
+        async for race_doc in db.get_all(list(race_refs.values())):
+            if race_doc.exists:
+                race_dates[race_doc.reference.path] = race_doc.to_dict().get("date", "")
+
+    return participant_results_from_docs(results_query, race_dates)
@@ -0,0 +1,438 @@
+"""Benchmark the championship engine against the previous dict-based scoring.
+
+Generates a synthetic 20-race season with 2,000 runners and times team and
+individual standings with both implementations, checking they agree. Also
+compares the memory held by the season as result dicts with the compact
+SeasonResults store.
+
+    cd shared_libs && python benchmark_championship.py
+"""
+
+import json
+import random
+import time
+import tracemalloc
+
+import championship
+from season_results import SeasonResults
+
+RACES = 20
+RUNNERS = 2000
+CLUBS = 21
+CATEGORIES = ["Senior", "V40", "V45", "V50", "V55", "V60", "V65", "V70"]
+
+
+def build_season(seed=6):
+    """Build synthetic season results in the shape get_season_results returns"""
+    rng = random.Random(seed)
+    clubs = [f"Club {i}" for i in range(CLUBS)]
+    runners = [
+        {
+            "first_name": f"Runner{i}",
+            "last_name": f"Surname{i % 300}",
+            "gender": rng.choice(["Male", "Female"]),
+            "age_category": rng.choice(CATEGORIES),
+            "club": rng.choice(clubs),
+            "parkrun_barcode_id": f"A{100000 + i}",
+        }
+        for i in range(RUNNERS)
+    ]
+    season_results = []
+    for race in range(RACES):
+        starters = rng.sample(runners, int(RUNNERS * rng.uniform(0.6, 0.9)))
+        season_results.append(
+            {
+                "race": {
+                    "name": f"Race {race + 1}",
+                    "organising_clubs": [clubs[race % CLUBS]],
+                },
+                "results": [
+                    {"finish_token": f"P{i + 1}", "participant": dict(runner)}
+                    for i, runner in enumerate(starters)
+                ],
+            }
+        )
+    return season_results
+
+
+def _legacy_valid_results(results, gender):
+    """Filter race results to named participants of one gender, in finish order"""
+    return [
+        r
+        for r in results
+        if r.get("participant", {}).get("gender") == gender
+        and r.get("participant", {}).get("first_name")
+    ]
+
+
+def legacy_team_championship(season_name, season_results, gender):
+    """Previous dict-based team scoring, kept as the benchmark baseline"""
+    races = [entry["race"] for entry in season_results]
+    club_points = {}
+
+    for entry in season_results:
+        race = entry["race"]
+        results = entry["results"]
+        gender_results = _legacy_valid_results(results, gender)
+
+        # Group by club and calculate points
+        club_finishers = {}
+        for i, result in enumerate(gender_results):
+            club = result.get("participant", {}).get("club")
+            if club:
+                if club not in club_finishers:
+                    club_finishers[club] = []
+                club_finishers[club].append(i + 1)  # position (1-based)
+
+        # First, add organizing clubs to club_points if they're not already there
+        organising_clubs = race.get("organising_clubs", [])
+        for org_club in organising_clubs:
+            if org_club not in club_points:
+                club_points[org_club] = {
+                    "total_points": 0,
+                    "total_positions": 0,
+                    "race_points": {},
+                }
+            club_points[org_club]["race_points"][race["name"]] = "ORG"
+
+        # Get all clubs that have ever participated
+        all_clubs = set()
+        for result in results:
+            club = result.get("participant", {}).get("club")
+            if club:
+                all_clubs.add(club)
+
+        # Calculate points for each club (top 4 men, top 3 women)
+        top_count = 4 if gender == "Male" else 3
+
+        # Mark all clubs as DQ for this race initially
+        for club in all_clubs:
+            if club not in club_points:
+                club_points[club] = {
+                    "total_points": 0,
+                    "total_positions": 0,
+                    "race_points": {},
+                }
+            if club not in organising_clubs:
+                club_points[club]["race_points"][race["name"]] = "DQ"
+
+        # Award points only to clubs with sufficient runners
+        for club, positions in club_finishers.items():
+            if club not in organising_clubs and len(positions) >= top_count:
+                top_positions = sorted(positions)[:top_count]
+                race_points = sum(top_positions)
+
+                club_points[club]["race_points"][race["name"]] = {
+                    "points": race_points,
+                    "positions": top_positions,
+                }
+                club_points[club]["total_points"] += race_points
+                club_points[club]["total_positions"] += race_points
+
+    # Calculate club rankings for each race
+    for race in races:
+        race_clubs = []
+        for club, data in club_points.items():
+            race_data = data["race_points"].get(race["name"])
+            if race_data and isinstance(race_data, dict) and "points" in race_data:
+                race_clubs.append((club, race_data["points"]))
+
+        # Sort by points (lower is better) and assign rankings with ties
+        race_clubs.sort(key=lambda x: x[1])
+        current_rank = 1
+        for i, (club, points) in enumerate(race_clubs):
+            if i > 0 and points != race_clubs[i - 1][1]:
+                current_rank = i + 1
+            race_data = club_points[club]["race_points"][race["name"]]
+            race_data["rank"] = current_rank
+
+    # Calculate total rankings and separate qualified/disqualified clubs
+    qualified_clubs = []
+    disqualified_clubs = []
+
+    for club, data in club_points.items():
+        # Check if club has DQ in any race (disqualified)
+        has_dq = any(v == "DQ" for v in data["race_points"].values())
+        # Check if club has points or is organizing
+        has_activity = data["total_positions"] > 0 or any(
+            v == "ORG" for v in data["race_points"].values()
+        )
+
+        if has_activity:
+            # Calculate total rankings
+            total_rankings = 0
+            organized_races = 0
+            for race_data in data["race_points"].values():
+                if isinstance(race_data, dict) and "rank" in race_data:
+                    total_rankings += race_data["rank"]
+                elif race_data == "ORG":
+                    organized_races += 1
+
+            # Apply adjustment for clubs that didn't organize a race
+            if organized_races == 0 and total_rankings > 0 and len(races) > 1:
+                total_races = len(races)
+                total_rankings = total_rankings * ((total_races - 1) / total_races)
+
+            club_data = {
+                "name": club,
+                "total_points": "DQ" if has_dq else round(total_rankings, 2),
+                "race_points": data["race_points"],
+            }
+            if has_dq:
+                disqualified_clubs.append(club_data)
+            else:
+                qualified_clubs.append(club_data)
+
+    qualified_clubs.sort(key=lambda x: x["total_points"])
+    disqualified_clubs.sort(key=lambda x: x["name"])
+
+    return {
+        "season": season_name,
+        "gender": gender,
+        "championship_type": "team",
+        "championship_name": f"{gender} Team Championship",
+        "races": races,
+        "standings": qualified_clubs + disqualified_clubs,
+    }
+
+
+def legacy_individual_championship(
+    season_name, season, season_results, gender, category=None
+):
+    """Previous dict-based individual scoring, kept as the benchmark baseline"""
+    participant_results = {}
+    races_with_results = []
+
+    for entry in season_results:
+        race = entry["race"]
+        gender_results = _legacy_valid_results(entry["results"], gender)
+
+        # Filter by category if specified
+        if category:
+            gender_results = [
+                r
+                for r in gender_results
+                if r.get("participant", {}).get("age_category") == category
+            ]
+
+        # Only process races that have results
+        if gender_results:
+            races_with_results.append(race)
+
+            # Store individual positions
+            for i, result in enumerate(gender_results):
+                participant = result.get("participant", {})
+                name = f"{participant.get('first_name', '')} {participant.get('last_name', '')}".strip()
+
+                if name and name != " ":
+                    if name not in participant_results:
+                        participant_results[name] = {
+                            "club": participant.get("club", ""),
+                            "gender": participant.get("gender"),
+                            "age_category": participant.get("age_category", ""),
+                            "participant_id": participant.get("parkrun_barcode_id"),
+                            "race_positions": {},
+                        }
+                    participant_results[name]["race_positions"][race["name"]] = i + 1
+
+    # Calculate best results for each participant
+    standings = []
+    best_of = int(season.get("individual_results_best_of", 3)) if season else 3
+    # Use minimum of best_of or races with actual results
+    actual_best_of = min(best_of, len(races_with_results))
+
+    for name, data in participant_results.items():
+        positions = list(data["race_positions"].values())
+        if len(positions) >= actual_best_of:
+            standings.append(
+                {
+                    "name": name,
+                    "club": data["club"],
+                    "gender": data["gender"],
+                    "age_category": data["age_category"],
+                    "participant_id": data.get("participant_id"),
+                    "total_points": sum(sorted(positions)[:actual_best_of]),
+                    "race_positions": data["race_positions"],
+                }
+            )
+
+    standings.sort(key=lambda x: x["total_points"])
+
+    championship_name = f"{gender} Individual Championship"
+    if category:
+        championship_name = f"{gender} {category} Individual Championship"
+
+    return {
+        "season": season_name,
+        "category": category,
+        "championship_type": "individual",
+        "championship_name": championship_name,
+        "races": races_with_results,
+        "standings": standings,
+        "best_of": actual_best_of,
+    }
+
+
+def all_championships(team, individual):
+    """Compute every standing a season materialises"""
+    for gender in championship.GENDERS:
+        team(gender)
+        for category in [None, *CATEGORIES]:
+            individual(gender, category)
+
+
+def timed(func, repeat=3):
+    """Best wall-clock time of several runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def traced(build):
+    """Memory held by build's result and peak while building, in MiB"""
+    tracemalloc.start()
+    try:
+        result = build()
+        held, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return held / 2**20, peak / 2**20
+
+
+def memory(season_results):
+    """Compare the season as result dicts with the SeasonResults store"""
+    # Decode each race from JSON as Firestore does, so every result gets its
+    # own dicts and strings rather than sharing the generator's objects
+    payloads = [
+        (entry["race"], json.dumps(entry["results"])) for entry in season_results
+    ]
+
+    def as_dicts():
+        return [
+            {"race": race, "results": json.loads(payload)} for race, payload in payloads
+        ]
+
+    def as_store():
+        store = SeasonResults()
+        for race, payload in payloads:
+            store.append_race(race, json.loads(payload))
+        return store
+
+    print(f"{'representation':<20}{'held (MiB)':>12}{'peak (MiB)':>12}")
+    for name, build in [("result dicts", as_dicts), ("SeasonResults", as_store)]:
+        held, peak = traced(build)
+        print(f"{name:<20}{held:>12.1f}{peak:>12.1f}")
+
+
+def main():
+    season_results = build_season()
+    season = {"individual_results_best_of": 3}
+    result_count = sum(len(entry["results"]) for entry in season_results)
+    print(f"{RACES} races, {RUNNERS} runners, {result_count} results")
+
+    # Both implementations must agree before timing them
+    for gender in championship.GENDERS:
+        legacy = legacy_team_championship("bench", season_results, gender)
+        engine = championship.team_championship("bench", season_results, gender)
+        assert sorted(map(repr, legacy["standings"])) == sorted(
+            map(repr, engine["standings"])
+        )
+        for category in [None, "V50"]:
+            assert legacy_individual_championship(
+                "bench", season, season_results, gender, category
+            ) == championship.individual_championship(
+                "bench", season, season_results, gender, category
+            )
+
+    grouped = championship.individual_championships("bench", season, season_results)
+    for gender, championships in grouped.items():
+        for entry in championships:
+            assert entry == legacy_individual_championship(
+                "bench", season, season_results, gender, entry["category"]
+            )
+
+    def legacy_all():
+        all_championships(
+            lambda gender: legacy_team_championship("bench", season_results, gender),
+            lambda gender, category: legacy_individual_championship(
+                "bench", season, season_results, gender, category
+            ),
+        )
+
+    def legacy_all_individual():
+        for gender in championship.GENDERS:
+            for category in [None, *CATEGORIES]:
+                legacy_individual_championship(
+                    "bench", season, season_results, gender, category
+                )
+
+    def engine_all():
+        encoded = championship.encode_season(season_results)
+        for gender in championship.GENDERS:
+            championship.team_championship("bench", encoded, gender)
+        championship.individual_championships("bench", season, encoded)
+
+    def encode_all():
+        encoded = championship.encode_season(season_results)
+        # Columns are built lazily, so build every one of them
+        for column in ("club", "organising", "name", "category"):
+            getattr(encoded, column)
+        return encoded
+
+    print(f"encoding all columns: {timed(encode_all):.1f} ms")
+    encoded = encode_all()
+
+    cases = [
+        (
+            "team (Male)",
+            lambda: legacy_team_championship("bench", season_results, "Male"),
+            lambda: championship.team_championship("bench", season_results, "Male"),
+            lambda: championship.team_championship("bench", encoded, "Male"),
+        ),
+        (
+            "individual (Male)",
+            lambda: legacy_individual_championship(
+                "bench", season, season_results, "Male"
+            ),
+            lambda: championship.individual_championship(
+                "bench", season, season_results, "Male"
+            ),
+            lambda: championship.individual_championship(
+                "bench", season, encoded, "Male"
+            ),
+        ),
+        (
+            "all individual",
+            legacy_all_individual,
+            lambda: championship.individual_championships(
+                "bench", season, season_results
+            ),
+            lambda: championship.individual_championships("bench", season, encoded),
+        ),
+        ("all standings", legacy_all, engine_all, None),
+    ]
+    print(
+        f"{'case':<20}{'dict (ms)':>11}{'engine (ms)':>13}{'speedup':>9}"
+        f"{'encoded (ms)':>14}{'speedup':>9}"
+    )
+    for name, legacy, engine, engine_encoded in cases:
+        legacy_ms = timed(legacy)
+        engine_ms = timed(engine)
+        line = (
+            f"{name:<20}{legacy_ms:>11.1f}{engine_ms:>13.1f}"
+            f"{legacy_ms / engine_ms:>8.1f}x"
+        )
+        if engine_encoded:
+            encoded_ms = timed(engine_encoded)
+            line += f"{encoded_ms:>14.1f}{legacy_ms / encoded_ms:>8.1f}x"
+        print(line)
+
+    memory(season_results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,673 @@
+"""Championship scoring engine shared by the API services.
+
+Season results are encoded once into integer-coded NumPy arrays (race, club,
+gender, category, participant) in finish order, so team top-N sums, per-race
+ranks with ties and best-of-N individual totals are array operations rather
+than per-result dict lookups. Every scoring function accepts the raw season
+results ({"race", "results"} entries in race order), a compact SeasonResults
+store or an EncodedSeason, so several championships can share one encoding.
+"""
+
+from functools import cached_property
+
+import numpy as np
+
+from season_results import MISSING, SeasonResults
+
+GENDERS = ("Male", "Female")
+
+# Number of finishers counted towards a club's race score
+TEAM_SIZES = {"Male": 4, "Female": 3}
+
+
+class _Codes(dict):
+    """Value to integer code lookup, with -1 for anything not coded"""
+
+    def __missing__(self, key):
+        return -1
+
+
+def _codes(values):
+    """Build a code lookup for an ordered list of distinct values"""
+    return _Codes((value, code) for code, value in enumerate(values))
+
+
+def _present(value, default=None):
+    """Read a stored field value the way participant.get(field, default) would"""
+    return default if value is MISSING else value
+
+
+class EncodedSeason:
+    """Season results as parallel integer-coded arrays, one entry per result.
+
+    Codings are derived from a SeasonResults store once per distinct field
+    value rather than once per result.
+    """
+
+    def __init__(self, season):
+        self.season = season
+        self.races = season.races
+        self.race = season.race
+        columns = season.columns
+
+        # Only finishers with a first name are scored
+        self.valid = columns["first_name"].mapped(bool, bool)
+        gender_codes = _codes(GENDERS)
+        self.gender = columns["gender"].mapped(gender_codes.__getitem__, np.int8)
+
+    def participant(self, index):
+        """Get the participant dict of one result"""
+        return self.season.participant(index)
+
+    @cached_property
+    def _club_coding(self):
+        """Club names by code and the club code of every result"""
+        organisers = [
+            org_club
+            for race in self.races
+            for org_club in race.get("organising_clubs", [])
+        ]
+        column = self.season.columns["club"]
+        # Organising clubs are coded first so every club has a column
+        clubs = [c for c in dict.fromkeys(organisers + column.values) if c]
+        codes = _codes(clubs)
+        return clubs, column.mapped(codes.__getitem__, np.int32)
+
+    @property
+    def clubs(self):
+        """Club names by code"""
+        return self._club_coding[0]
+
+    @property
+    def club(self):
+        """Club code per result, -1 when there is no club"""
+        return self._club_coding[1]
+
+    @cached_property
+    def organising(self):
+        """Race by club matrix of organising clubs"""
+        codes = _codes(self.clubs)
+        organising = np.zeros((len(self.races), len(self.clubs)), dtype=bool)
+        for race_index, race in enumerate(self.races):
+            for org_club in race.get("organising_clubs", []):
+                # A blank organiser has no column; -1 would mark the last club
+                if org_club:
+                    organising[race_index, codes[org_club]] = True
+        return organising
+
+    @cached_property
+    def _name_coding(self):
+        """Participant display names by code and the name code of every result"""
+        first = self.season.columns["first_name"]
+        last = self.season.columns["last_name"]
+        # Display names are built once per distinct first/last name pair
+        pair_keys = first.codes.astype(np.int64) * max(len(last.values), 1)
+        _, first_seen, pair_of_result = np.unique(
+            pair_keys + last.codes, return_index=True, return_inverse=True
+        )
+        display_names = [
+            f"{first_name} {_present(last_name, '')}".strip() if first_name else ""
+            for first_name, last_name in zip(
+                (first.values[c] for c in first.codes[first_seen].tolist()),
+                (last.values[c] for c in last.codes[first_seen].tolist()),
+            )
+        ]
+        appearance = np.argsort(first_seen, kind="stable").tolist()
+        names = [n for n in dict.fromkeys(display_names[i] for i in appearance) if n]
+        codes = _codes(names)
+        pair_codes = np.array(
+            [codes[n] for n in display_names], dtype=np.int32
+        ).reshape(-1)
+        return names, pair_codes[pair_of_result.reshape(-1)]
+
+    @property
+    def names(self):
+        """Participant display names by code"""
+        return self._name_coding[0]
+
+    @property
+    def name(self):
+        """Participant code per result, -1 for finishers without a usable name"""
+        return self._name_coding[1]
+
+    @cached_property
+    def _category_coding(self):
+        """Age categories by code and the category code of every scored result"""
+        column = self.season.columns["age_category"]
+        categories = list(dict.fromkeys(_present(v, "") for v in column.values))
+        codes = _codes(categories)
+        category = column.mapped(lambda v: codes[_present(v, "")], np.int32)
+        return categories, np.where(self.valid, category, -1)
+
+    @property
+    def categories(self):
+        """Age categories by code"""
+        return self._category_coding[0]
+
+    @property
+    def category(self):
+        """Age category code per scored result, -1 for unscored results"""
+        return self._category_coding[1]
+
+    def mask(self, gender, category=None):
+        """Select named finishers of one gender, optionally in one age category"""
+        if gender not in GENDERS:
+            return np.zeros(len(self.race), dtype=bool)
+        mask = self.valid & (self.gender == GENDERS.index(gender))
+        if category:
+            if category not in self.categories:
+                return np.zeros(len(self.race), dtype=bool)
+            mask &= self.category == self.categories.index(category)
+        return mask
+
+    def positions(self, mask):
+        """Get selected result indices and their 1-based finish position per race"""
+        index = np.flatnonzero(mask)
+        races = self.race[index]
+        # Results are stored race by race, so each race is a contiguous run
+        race_starts = np.searchsorted(races, races, side="left")
+        return index, np.arange(len(index)) - race_starts + 1
+
+
+def encode_season(season_results):
+    """Encode season results once for reuse across several championships"""
+    if isinstance(season_results, EncodedSeason):
+        return season_results
+    if not isinstance(season_results, SeasonResults):
+        season_results = SeasonResults.from_results(season_results)
+    return EncodedSeason(season_results)
+
+
+def result_categories(season_results):
+    """Get every age category with a named finisher in the season"""
+    encoded = encode_season(season_results)
+    used = np.unique(encoded.category[encoded.category >= 0])
+    return sorted(encoded.categories[code] for code in used if encoded.categories[code])
+
+
+def _competition_ranks(points, scored):
+    """Rank scored entries per race, lower points first, ties sharing a rank"""
+    values = np.where(scored, points, np.inf)
+    return (values[:, None, :] < values[:, :, None]).sum(axis=2) + 1
+
+
+def team_championship(season_name, season_results, gender):
+    """Calculate team championship standings from per-race results"""
+    encoded = encode_season(season_results)
+    races = encoded.races
+    race_count = len(races)
+    club_count = len(encoded.clubs)
+    cells = race_count * club_count
+    top_count = TEAM_SIZES.get(gender, 3)
+
+    # Finish positions of this gender's named finishers who have a club
+    index, position = encoded.positions(encoded.mask(gender))
+    has_club = encoded.club[index] >= 0
+    index, position = index[has_club], position[has_club]
+    key = encoded.race[index] * club_count + encoded.club[index]
+
+    # Group by race and club; positions stay ascending within each group
+    order = np.argsort(key, kind="stable")
+    key, position = key[order], position[order]
+    occurrence = np.arange(len(key)) - np.searchsorted(key, key, side="left")
+    counted = occurrence < top_count
+
+    finishers = np.bincount(key, minlength=cells).reshape(race_count, club_count)
+    points = np.bincount(
+        key[counted], weights=position[counted], minlength=cells
+    ).reshape(race_count, club_count)
+
+    all_key = encoded.race * club_count + encoded.club
+    participated = (
+        np.bincount(all_key[encoded.club >= 0], minlength=cells).reshape(
+            race_count, club_count
+        )
+        > 0
+    )
+
+    organising = encoded.organising
+    scored = (finishers >= top_count) & ~organising
+    disqualified = participated & ~organising & ~scored
+    ranks = _competition_ranks(points, scored)
+
+    top_positions = {}
+    for cell, pos in zip(key[counted].tolist(), position[counted].tolist()):
+        top_positions.setdefault(cell, []).append(pos)
+
+    total_rankings = np.where(scored, ranks, 0).sum(axis=0)
+    organised_races = organising.sum(axis=0)
+    has_activity = scored.any(axis=0) | (organised_races > 0)
+    has_dq = disqualified.any(axis=0)
+
+    qualified_clubs = []
+    disqualified_clubs = []
+    for club in np.flatnonzero(has_activity).tolist():
+        race_points = {}
+        for race_index, race in enumerate(races):
+            if organising[race_index, club]:
+                race_points[race["name"]] = "ORG"
+            elif scored[race_index, club]:
+                race_points[race["name"]] = {
+                    "points": int(points[race_index, club]),
+                    "positions": top_positions[race_index * club_count + club],
+                    "rank": int(ranks[race_index, club]),
+                }
+            elif disqualified[race_index, club]:
+                race_points[race["name"]] = "DQ"
+
+        total = int(total_rankings[club])
+        # Apply adjustment for clubs that didn't organize a race
+        if organised_races[club] == 0 and total > 0 and race_count > 1:
+            total = total * ((race_count - 1) / race_count)
+
+        club_data = {
+            "name": encoded.clubs[club],
+            "total_points": "DQ" if has_dq[club] else round(total, 2),
+            "race_points": race_points,
+        }
+        if has_dq[club]:
+            disqualified_clubs.append(club_data)
+        else:
+            qualified_clubs.append(club_data)
+
+    qualified_clubs.sort(key=lambda x: x["total_points"])
+    disqualified_clubs.sort(key=lambda x: x["name"])
+
+    return {
+        "season": season_name,
+        "gender": gender,
+        "championship_type": "team",
+        "championship_name": f"{gender} Team Championship",
+        "races": races,
+        "standings": qualified_clubs + disqualified_clubs,
+    }
+
+
+def _individual_groups(season, encoded, index, position, group, group_count):
+    """Score best-of-N individual standings for several groups in one pass.
+
+    index, position and group give each selected result, its finish position
+    within its group in that race and its group, ordered by group and then
+    finish order. Returns (race indices with results, best of, standings)
+    for every group.
+    """
+    race_count = len(encoded.races)
+    group = group.astype(np.int64)
+
+    # Only races with results in a group count towards it
+    cells = np.unique(group * race_count + encoded.race[index])
+    cell_groups = cells // race_count
+    group_races = np.bincount(cell_groups, minlength=group_count)
+    race_indices = np.split(
+        cells % race_count, np.searchsorted(cell_groups, np.arange(1, group_count))
+    )
+
+    # Finishers without a usable name keep their place but are not scored
+    named = encoded.name[index] >= 0
+    index, position, group = index[named], position[named], group[named]
+    race = encoded.race[index]
+
+    # One row per participant in each group, in order of first appearance
+    keys, first_seen, inverse = np.unique(
+        group * len(encoded.names) + encoded.name[index],
+        return_index=True,
+        return_inverse=True,
+    )
+    appearance = np.argsort(first_seen, kind="stable")
+    first_seen = first_seen[appearance]
+    row_of_key = np.empty(len(keys), dtype=np.int64)
+    row_of_key[appearance] = np.arange(len(keys))
+    row = row_of_key[inverse.reshape(-1)]
+    row_group = group[first_seen]
+
+    grid = np.zeros((len(keys), race_count), dtype=np.int64)
+    grid[row, race] = position
+    has_result = np.zeros(grid.shape, dtype=bool)
+    has_result[row, race] = True
+
+    best_of = int(season.get("individual_results_best_of", 3)) if season else 3
+    # Use minimum of best_of or races with actual results
+    actual_best_of = np.minimum(best_of, group_races)
+    row_best_of = actual_best_of[row_group]
+
+    best_positions = np.sort(np.where(has_result, grid, np.iinfo(np.int64).max))
+    counted = np.arange(race_count) < row_best_of[:, None]
+    totals = np.where(counted, best_positions, 0).sum(axis=1)
+    eligible = has_result.sum(axis=1) >= row_best_of
+
+    rows = np.flatnonzero(eligible)
+    race_names = [race["name"] for race in encoded.races]
+    standings = [[] for _ in range(group_count)]
+    for group_index, first, total, positions, present in zip(
+        row_group[rows].tolist(),
+        index[first_seen[rows]].tolist(),
+        totals[rows].tolist(),
+        grid[rows].tolist(),
+        has_result[rows].tolist(),
+    ):
+        participant = encoded.participant(first)
+        standings[group_index].append(
+            {
+                "name": encoded.names[encoded.name[first]],
+                "club": participant.get("club", ""),
+                "gender": participant.get("gender"),
+                "age_category": participant.get("age_category", ""),
+                "participant_id": participant.get("parkrun_barcode_id"),
+                "total_points": total,
+                "race_positions": {
+                    name: race_position
+                    for name, race_position, raced in zip(
+                        race_names, positions, present
+                    )
+                    if raced
+                },
+            }
+        )
+
+    for group_standings in standings:
+        group_standings.sort(key=lambda x: x["total_points"])
+    return [
+        (race_indices[g].tolist(), int(actual_best_of[g]), standings[g])
+        for g in range(group_count)
+    ]
+
+
+def _individual_result(season_name, encoded, gender, category, scored):
+    """Build an individual championship from one group's scored standings"""
+    race_indices, best_of, standings = scored
+
+    championship_name = f"{gender} Individual Championship"
+    if category:
+        championship_name = f"{gender} {category} Individual Championship"
+
+    return {
+        "season": season_name,
+        "category": category,
+        "championship_type": "individual",
+        "championship_name": championship_name,
+        "races": [encoded.races[i] for i in race_indices],
+        "standings": standings,
+        "best_of": best_of,
+    }
+
+
+def individual_championship(season_name, season, season_results, gender, category=None):
+    """Calculate individual championship standings from per-race results"""
+    encoded = encode_season(season_results)
+    index, position = encoded.positions(encoded.mask(gender, category))
+    group = np.zeros(len(index), dtype=np.int64)
+    (scored,) = _individual_groups(season, encoded, index, position, group, 1)
+    return _individual_result(season_name, encoded, gender, category, scored)
+
+
+def individual_championships(season_name, season, season_results):
+    """Calculate every individual championship of a season in one grouped pass.
+
+    Each named finisher is scored once in their gender's overall group and
+    once in their gender and age category group. Returns {gender: [overall,
+    then one championship per age category]}, each matching
+    individual_championship for that gender and category.
+    """
+    encoded = encode_season(season_results)
+    race_count = len(encoded.races)
+    selected = np.flatnonzero(encoded.valid & (encoded.gender >= 0))
+
+    # Age categories with a named Male or Female finisher, in name order
+    used = np.unique(encoded.category[selected]).tolist()
+    categories = sorted(
+        encoded.categories[code] for code in used if encoded.categories[code]
+    )
+    slots = len(categories) + 1
+    # Category code to its group within a gender, 0 for the overall group
+    # (the extra trailing entry catches the -1 of unscored results)
+    category_slot = np.zeros(len(encoded.categories) + 1, dtype=np.int64)
+    for slot, category in enumerate(categories, start=1):
+        category_slot[encoded.categories.index(category)] = slot
+
+    overall = encoded.gender[selected].astype(np.int64) * slots
+    slot = category_slot[encoded.category[selected]]
+    in_category = slot > 0
+    index = np.concatenate([selected, selected[in_category]])
+    group = np.concatenate([overall, (overall + slot)[in_category]])
+
+    # Number finishers within each group and race, keeping finish order
+    key = group * race_count + encoded.race[index]
+    order = np.argsort(key, kind="stable")
+    index, group, key = index[order], group[order], key[order]
+    position = np.arange(len(key)) - np.searchsorted(key, key, side="left") + 1
+
+    scored = _individual_groups(
+        season, encoded, index, position, group, len(GENDERS) * slots
+    )
+    return {
+        gender: [
+            _individual_result(
+                season_name,
+                encoded,
+                gender,
+                category,
+                scored[gender_index * slots + category_index],
+            )
+            for category_index, category in enumerate([None, *categories])
+        ]
+        for gender_index, gender in enumerate(GENDERS)
+    }
+
+
+def race_aggregate(results):
+    """Summarise one race's results into the partial aggregates standings fold.
+
+    Holds the clubs with any result, each club's finisher count and top
+    positions per gender, and every named finisher's overall and age
+    category position per gender. Organising clubs are left to the fold so
+    the aggregate only changes when the race's results do.
+    """
+    participants = [result.get("participant", {}) for result in results]
+    aggregate = {
+        "clubs": [
+            club for club in dict.fromkeys(p.get("club") for p in participants) if club
+        ],
+        "teams": {},
+        "individuals": {},
+    }
+    for gender in GENDERS:
+        finishers = [
+            p for p in participants if p.get("gender") == gender and p.get("first_name")
+        ]
+        club_positions = {}
+        category_counts = {}
+        individuals = []
+        for position, participant in enumerate(finishers, start=1):
+            club = participant.get("club")
+            if club:
+                club_positions.setdefault(club, []).append(position)
+            age_category = participant.get("age_category", "")
+            category_counts[age_category] = category_counts.get(age_category, 0) + 1
+            name = f"{participant.get('first_name', '')} {participant.get('last_name', '')}".strip()
+            individuals.append(
+                {
+                    "name": name,
+                    "club": participant.get("club", ""),
+                    "gender": participant.get("gender"),
+                    "age_category": age_category,
+                    "participant_id": participant.get("parkrun_barcode_id"),
+                    "position": position,
+                    "category_position": category_counts[age_category],
+                }
+            )
+        top_count = TEAM_SIZES.get(gender, 3)
+        aggregate["teams"][gender] = [
+            {
+                "club": club,
+                "finishers": len(positions),
+                "positions": positions[:top_count],
+            }
+            for club, positions in club_positions.items()
+        ]
+        aggregate["individuals"][gender] = individuals
+    return aggregate
+
+
+def aggregate_categories(aggregates):
+    """Get every age category with a named finisher across race aggregates"""
+    categories = {
+        row["age_category"]
+        for aggregate in aggregates
+        for rows in aggregate.get("individuals", {}).values()
+        for row in rows
+    }
+    return sorted(category for category in categories if category)
+
+
+def fold_team_championship(season_name, races, aggregates, gender):
+    """Fold per-race aggregates into team championship standings.
+
+    Races are in season order and aggregates are keyed by race name; a race
+    without an aggregate has no results. Matches team_championship.
+    """
+    top_count = TEAM_SIZES.get(gender, 3)
+    # Organising clubs come first, matching the engine's club order
+    club_points = {
+        org_club: {}
+        for race in races
+        for org_club in race.get("organising_clubs", [])
+        if org_club
+    }
+
+    for race in races:
+        aggregate = aggregates.get(race["name"], {})
+        organising_clubs = [c for c in race.get("organising_clubs", []) if c]
+        for org_club in organising_clubs:
+            club_points[org_club][race["name"]] = "ORG"
+
+        # Every club with a result this race is DQ unless it scores
+        for club in aggregate.get("clubs", []):
+            if club not in organising_clubs:
+                club_points.setdefault(club, {})[race["name"]] = "DQ"
+
+        race_clubs = [
+            team
+            for team in aggregate.get("teams", {}).get(gender, [])
+            if team["club"] not in organising_clubs and team["finishers"] >= top_count
+        ]
+        race_clubs.sort(key=lambda team: sum(team["positions"]))
+        current_rank = 1
+        for i, team in enumerate(race_clubs):
+            points = sum(team["positions"])
+            if i > 0 and points != sum(race_clubs[i - 1]["positions"]):
+                current_rank = i + 1
+            club_points[team["club"]][race["name"]] = {
+                "points": points,
+                "positions": list(team["positions"]),
+                "rank": current_rank,
+            }
+
+    qualified_clubs = []
+    disqualified_clubs = []
+    for club, race_points in club_points.items():
+        values = race_points.values()
+        ranks = [v["rank"] for v in values if isinstance(v, dict)]
+        organised_races = sum(1 for v in values if v == "ORG")
+        if not ranks and not organised_races:
+            continue
+
+        total = sum(ranks)
+        # Apply adjustment for clubs that didn't organize a race
+        if organised_races == 0 and total > 0 and len(races) > 1:
+            total = total * ((len(races) - 1) / len(races))
+
+        has_dq = "DQ" in values
+        club_data = {
+            "name": club,
+            "total_points": "DQ" if has_dq else round(total, 2),
+            "race_points": race_points,
+        }
+        if has_dq:
+            disqualified_clubs.append(club_data)
+        else:
+            qualified_clubs.append(club_data)
+
+    qualified_clubs.sort(key=lambda x: x["total_points"])
+    disqualified_clubs.sort(key=lambda x: x["name"])
+
+    return {
+        "season": season_name,
+        "gender": gender,
+        "championship_type": "team",
+        "championship_name": f"{gender} Team Championship",
+        "races": races,
+        "standings": qualified_clubs + disqualified_clubs,
+    }
+
+
+def fold_individual_championship(
+    season_name, season, races, aggregates, gender, category=None
+):
+    """Fold per-race aggregates into individual championship standings.
+
+    Races are in season order and aggregates are keyed by race name; a race
+    without an aggregate has no results. Matches individual_championship.
+    """
+    position_field = "category_position" if category else "position"
+    participant_results = {}
+    races_with_results = []
+
+    for race in races:
+        rows = aggregates.get(race["name"], {}).get("individuals", {}).get(gender, [])
+        if category:
+            rows = [row for row in rows if row["age_category"] == category]
+        if not rows:
+            continue
+
+        races_with_results.append(race)
+        # Finishers without a usable name keep their place but are not scored
+        for row in rows:
+            if not row["name"]:
+                continue
+            if row["name"] not in participant_results:
+                participant_results[row["name"]] = {
+                    "club": row["club"],
+                    "gender": row["gender"],
+                    "age_category": row["age_category"],
+                    "participant_id": row["participant_id"],
+                    "race_positions": {},
+                }
+            participant_results[row["name"]]["race_positions"][race["name"]] = row[
+                position_field
+            ]
+
+    best_of = int(season.get("individual_results_best_of", 3)) if season else 3
+    # Use minimum of best_of or races with actual results
+    actual_best_of = min(best_of, len(races_with_results))
+
+    standings = []
+    for name, data in participant_results.items():
+        positions = list(data["race_positions"].values())
+        if len(positions) >= actual_best_of:
+            standings.append(
+                {
+                    "name": name,
+                    "club": data["club"],
+                    "gender": data["gender"],
+                    "age_category": data["age_category"],
+                    "participant_id": data["participant_id"],
+                    "total_points": sum(sorted(positions)[:actual_best_of]),
+                    "race_positions": data["race_positions"],
+                }
+            )
+
+    standings.sort(key=lambda x: x["total_points"])
+
+    championship_name = f"{gender} Individual Championship"
+    if category:
+        championship_name = f"{gender} {category} Individual Championship"
+
+    return {
+        "season": season_name,
+        "category": category,
+        "championship_type": "individual",
+        "championship_name": championship_name,
+        "races": races_with_results,
+        "standings": standings,
+        "best_of": actual_best_of,
+    }
@@ -1,10 +1,290 @@
+import base64
+import copy
+import inspect
+import json
+import os
 import re
-
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache, wraps
+
+import numpy as np
 from google.cloud import firestore
+from google.cloud.firestore_v1.bulk_writer import BulkRetry, BulkWriterOptions
+
+import championship
+from season_results import SeasonResults
 
 # Initialize Firestore
 db = firestore.Client()
 
+# Time to live (seconds) for cached reference data, per entity
+CACHE_TTLS = {
+    "clubs": 300,
+    "seasons": 60,
+    "default_season": 60,
+    "season": 300,
+    "races": 120,
+    "versions": 5,
+}
+
+# Optionally keep each race's results as one compressed blob as well, so a
+# race loads in one or two reads instead of one per finisher
+RESULTS_BLOB = os.environ.get("RESULTS_BLOB", "false").lower() == "true"
+RESULTS_BLOB_VERSION = 1
+# Bytes of compressed results per blob shard, under the 1 MiB document limit
+RESULTS_BLOB_SHARD_SIZE = 900_000
+# Results written per upload chunk
+RESULTS_BATCH_SIZE = 500
+
+# gRPC status codes of bulk write failures worth retrying: deadline
+# exceeded, resource exhausted, aborted (contention), internal, unavailable
+RETRYABLE_WRITE_CODES = frozenset({4, 8, 10, 13, 14})
+# Attempts per bulk write operation before it is reported as failed
+BULK_WRITE_MAX_ATTEMPTS = 5
+# Bulk write rate, in operations a second, at the start and at most. The
+# writer ramps from one to the other by 50% every five minutes, as the
+# 500/50/5 rule for a new write load advises; the SDK's default maximum
+# equals its initial rate, which never ramps up at all
+BULK_WRITE_INITIAL_OPS_PER_SECOND = 500
+BULK_WRITE_MAX_OPS_PER_SECOND = 10_000
+
+
+class BulkWriteError(Exception):
+    """Raised when bulk write operations still fail after their retries"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        details = "; ".join(
+            f"{failure['path']}: {failure['message']}" for failure in failures[:5]
+        )
+        super().__init__(f"{len(failures)} writes failed: {details}")
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time to live"""
+
+    def __init__(self, name, ttl, maxsize=128):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (hit, value) for key, dropping the entry if it has expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        """Store value for key, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *key):
+        """Drop a single entry, or every entry when no key is given"""
+        with self._lock:
+            if key:
+                self._entries.pop(key, None)
+            else:
+                self._entries.clear()
+
+    def stats(self):
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+_caches = {
+    "clubs": TTLCache("clubs", CACHE_TTLS["clubs"], maxsize=1),
+    "seasons": TTLCache("seasons", CACHE_TTLS["seasons"], maxsize=1),
+    "default_season": TTLCache(
+        "default_season", CACHE_TTLS["default_season"], maxsize=1
+    ),
+    "season": TTLCache("season", CACHE_TTLS["season"], maxsize=64),
+    "races": TTLCache("races", CACHE_TTLS["races"], maxsize=64),
+    "versions": TTLCache("versions", CACHE_TTLS["versions"], maxsize=256),
+}
+
+
+def cached(cache_name):
+    """Read-through cache decorator keyed on the positional arguments.
+
+    Callers receive a deep copy so mutating a returned value cannot corrupt
+    the cached entry. Coroutine functions share the same cache, so async
+    readers and sync writers see one consistent view.
+    """
+    cache = _caches[cache_name]
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args):
+                hit, value = cache.get(args)
+                if not hit:
+                    value = await func(*args)
+                    cache.set(args, value)
+                return copy.deepcopy(value)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args):
+            hit, value = cache.get(args)
+            if not hit:
+                value = func(*args)
+                cache.set(args, value)
+            return copy.deepcopy(value)
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_cache(cache_name, *key):
+    """Invalidate one cached entry, or the whole named cache"""
+    _caches[cache_name].invalidate(*key)
+
+
+def clear_caches():
+    """Drop every cached entry (counters are kept)"""
+    for cache in _caches.values():
+        cache.invalidate()
+    with _seen_versions_lock:
+        _seen_versions.clear()
+
+
+def get_cache_stats():
+    """Get hit/miss counters for every reference data cache"""
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def season_version_scope(season_name):
+    """Get the version scope covering one season's results and standings"""
+    return f"season:{season_name}"
+
+
+def bump_version(*scopes):
+    """Record that data in each version scope has changed.
+
+    Version stamps live in the versions collection so every instance sees
+    them; public API resources derive their ETags from them. Scopes are
+    "clubs", "seasons" (season details and race lists) and one per season
+    from season_version_scope() for results and standings.
+    """
+    for scope in scopes:
+        db.collection("versions").document(scope).set(
+            {
+                "version": firestore.Increment(1),
+                "updated_at": firestore.SERVER_TIMESTAMP,
+            },
+            merge=True,
+        )
+    invalidate_cache("versions")
+
+
+# Reference data caches holding what each version scope covers
+VERSION_SCOPE_CACHES = {
+    "clubs": ("clubs",),
+    "seasons": ("seasons", "default_season", "season", "races"),
+}
+_seen_versions = {}
+_seen_versions_lock = threading.Lock()
+
+
+def _drop_stale_caches(versions):
+    """Drop reference data cached before a scope's version last moved on.
+
+    Another instance's write only reaches this one through the versions
+    collection, so the caches a scope covers are dropped whenever a version
+    read sees it at a version not seen before. A response's ETag and its
+    body then come from the same data, rather than a new ETag pinning a
+    body read from a cache that still holds the old one.
+    """
+    with _seen_versions_lock:
+        changed = [
+            scope
+            for scope, v in versions.items()
+            if _seen_versions.get(scope) != v["version"]
+        ]
+        _seen_versions.update((scope, versions[scope]["version"]) for scope in changed)
+    for scope in changed:
+        for cache_name in VERSION_SCOPE_CACHES.get(scope, ()):
+            invalidate_cache(cache_name)
+
+
+@cached("versions")
+def get_versions(*scopes):
+    """Get the version stamp and last update time of each scope in one read"""
+    versions = {scope: {"version": 0, "updated_at": None} for scope in scopes}
+    refs = [db.collection("versions").document(scope) for scope in scopes]
+    for doc in db.get_all(refs):
+        if doc.exists:
+            data = doc.to_dict()
+            versions[doc.id] = {
+                "version": data.get("version", 0),
+                "updated_at": data.get("updated_at"),
+            }
+    _drop_stale_caches(versions)
+    return versions
+
+
+def create_job(kind, params):
+    """Create a queued background job record, returning its id"""
+    doc_ref = db.collection("jobs").document()
+    doc_ref.set(
+        {
+            "kind": kind,
+            "params": params,
+            "status": "queued",
+            "progress": {"parsed": 0, "written": 0, "rejected": 0},
+            "created_at": firestore.SERVER_TIMESTAMP,
+            "updated_at": firestore.SERVER_TIMESTAMP,
+        }
+    )
+    return doc_ref.id
+
+
+def update_job(job_id, data):
+    """Update a background job's status, progress or outcome"""
+    db.collection("jobs").document(job_id).update(
+        {**data, "updated_at": firestore.SERVER_TIMESTAMP}
+    )
+
+
+def get_job(job_id):
+    """Get a background job record by id"""
+    doc = db.collection("jobs").document(job_id).get()
+    if doc.exists:
+        return {"id": doc.id, **doc.to_dict()}
+    return None
+
+
 RUNNING_CLUBS = [
     {"id": "Chandler's Ford Swifts", "short_names": ["CF Swifts"]},
     {"id": "Eastleigh Running Club", "short_names": ["Eastleigh"]},
@@ -33,6 +313,48 @@ RUNNING_CLUBS = [
 ]
 
 
+@contextmanager
+def bulk_writer(max_attempts=BULK_WRITE_MAX_ATTEMPTS):
+    """Yield a Firestore BulkWriter for many independent document writes.
+
+    Writes are sent as concurrent batches at a rate that ramps up from
+    BULK_WRITE_INITIAL_OPS_PER_SECOND to BULK_WRITE_MAX_OPS_PER_SECOND, and
+    failures with a retryable status are retried
+    with exponential backoff. Leaving the block waits for every write; any
+    operation that still failed is reported in a BulkWriteError listing
+    each document path, status code and message. Writes are not atomic, so
+    keep writes that must land together in a WriteBatch.
+    """
+    failures = []
+    writer = db.bulk_writer(
+        options=BulkWriterOptions(
+            initial_ops_per_second=BULK_WRITE_INITIAL_OPS_PER_SECOND,
+            max_ops_per_second=BULK_WRITE_MAX_OPS_PER_SECOND,
+            retry=BulkRetry.exponential,
+        )
+    )
+
+    def on_write_error(failure, _writer):
+        if failure.code in RETRYABLE_WRITE_CODES and failure.attempts < max_attempts:
+            return True
+        failures.append(
+            {
+                "path": failure.operation.reference.path,
+                "code": failure.code,
+                "message": failure.message,
+            }
+        )
+        return False
+
+    writer.on_write_error(on_write_error)
+    try:
+        yield writer
+    finally:
+        writer.close()
+    if failures:
+        raise BulkWriteError(failures)
+
+
 def init_running_clubs():
     """Initialize running clubs in database if not present"""
     clubs_ref = db.collection("clubs")
@@ -44,6 +366,8 @@ def init_running_clubs():
             club_ref = clubs_ref.document(club_data["id"])
             batch.set(club_ref, {"short_names": club_data["short_names"]})
         batch.commit()
+        invalidate_cache("clubs")
+        bump_version("clubs")
 
 
 def validate_barcode(barcode):
@@ -56,15 +380,81 @@ def validate_position_token(token):
     return re.match(r"^P\d{1,4}$", token.upper()) is not None
 
 
+def position_from_token(token):
+    """Get the numeric finish position from a position token, or None if invalid"""
+    if not validate_position_token(token):
+        return None
+    return int(token[1:])
+
+
+def iter_result_rows(lines, skipped):
+    """Validate uploaded results CSV rows lazily, one row at a time.
+
+    lines is any iterable of CSV lines, such as the upload decoded as it is
+    read. Yields (barcode, finish_token) for each valid row with a new
+    finish token and counts the rest in skipped, which needs
+    "invalid_barcodes" and "invalid_tokens" counts and a "duplicates" list.
+    """
+    import csv
+
+    seen_tokens = set()
+    for row in csv.reader(lines):
+        if len(row) < 2:
+            continue
+
+        barcode = row[0].strip().lstrip("\ufeff")  # Remove BOM if present
+        finish_token = row[1].strip()
+
+        if not finish_token:
+            continue
+
+        # Validate barcode and position token formats
+        if not validate_barcode(barcode):
+            skipped["invalid_barcodes"] += 1
+            continue
+
+        if not validate_position_token(finish_token):
+            skipped["invalid_tokens"] += 1
+            continue
+
+        if finish_token in seen_tokens:
+            skipped["duplicates"].append(finish_token)
+            continue
+
+        seen_tokens.add(finish_token)
+        yield barcode, finish_token
+
+
+def chunked(iterable, size):
+    """Yield lists of up to size items from an iterable as they fill"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(value):
+    """Parse a YYYY-MM-DD string once per distinct value, passing dates through"""
+    if isinstance(value, str):
+        return datetime.strptime(value, "%Y-%m-%d")
+    return value
+
+
+def _age_band(age, age_category_size):
+    """Get the lower age of the V category for an age or array of ages, up to V80"""
+    return np.minimum(40 + (age - 40) // age_category_size * age_category_size, 80)
+
+
+@lru_cache(maxsize=4096)
 def calculate_age_category(season_date, dob, age_category_size=5):
     """Calculate age category based on season date, date of birth and category size"""
-    from datetime import datetime
-
-    # Parse dates if they are strings
-    if isinstance(season_date, str):
-        season_date = datetime.strptime(season_date, "%Y-%m-%d")
-    if isinstance(dob, str):
-        dob = datetime.strptime(dob, "%Y-%m-%d")
+    season_date = _parse_date(season_date)
+    dob = _parse_date(dob)
 
     # Calculate age during the season
     age = (
@@ -75,17 +465,46 @@ def calculate_age_category(season_date, dob, age_category_size=5):
 
     if age < 40:
         return "Senior"
-
-    # Calculate the appropriate V category
-    base_age = 40
-    while base_age <= 80:
-        if age < base_age + age_category_size:
-            return f"V{base_age}"
-        base_age += age_category_size
-
-    return "V80"
-
-
+    return f"V{int(_age_band(age, age_category_size))}"
+
+
+def calculate_age_categories(season_date, dobs, age_category_size=5):
+    """Calculate the age category for each of a column of dates of birth.
+
+    The season date and each distinct date of birth are parsed once, then
+    ages and categories are computed for the whole column with NumPy.
+    Dates of birth that are missing or cannot be parsed get "Unknown".
+    """
+    season_date = _parse_date(season_date)
+
+    years = np.zeros(len(dobs), dtype=np.int32)
+    birthdays = np.zeros(len(dobs), dtype=np.int32)
+    known = np.zeros(len(dobs), dtype=bool)
+    for row, dob in enumerate(dobs):
+        try:
+            dob = _parse_date(dob)
+        except (TypeError, ValueError):
+            continue
+        if dob is None:
+            continue
+        years[row] = dob.year
+        birthdays[row] = dob.month * 100 + dob.day
+        known[row] = True
+
+    season_birthday = season_date.month * 100 + season_date.day
+    ages = season_date.year - years - (season_birthday < birthdays)
+    # 0 stands for Senior and -1 for Unknown, otherwise the V category
+    bands = np.where(ages < 40, 0, _age_band(ages, age_category_size))
+    # A float category size gives float bands, labelled as the scalar path does
+    bands = np.where(known, bands, -1).astype(np.int64).tolist()
+
+    labels = {-1: "Unknown", 0: "Senior"}
+    for band in set(bands) - labels.keys():
+        labels[band] = f"V{band}"
+    return [labels[band] for band in bands]
+
+
+@cached("clubs")
 def get_clubs():
     """Get all running clubs ordered alphabetically"""
     clubs = db.collection("clubs").order_by("__name__").get()
@@ -108,12 +527,18 @@ def get_club(club_name):
 
 def update_club(club_name, data):
     """Update existing club"""
-    return db.collection("clubs").document(club_name).update(data)
+    result = db.collection("clubs").document(club_name).update(data)
+    invalidate_cache("clubs")
+    bump_version("clubs")
+    return result
 
 
 def delete_club(club_name):
     """Delete a club"""
-    return db.collection("clubs").document(club_name).delete()
+    result = db.collection("clubs").document(club_name).delete()
+    invalidate_cache("clubs")
+    bump_version("clubs")
+    return result
 
 
 def club_exists(club_name):
@@ -124,7 +549,10 @@ def club_exists(club_name):
 def add_club(club_name, short_names=None):
     """Add new club with optional short names"""
     club_data = {"short_names": short_names or []}
-    return db.collection("clubs").document(club_name).set(club_data)
+    result = db.collection("clubs").document(club_name).set(club_data)
+    invalidate_cache("clubs")
+    bump_version("clubs")
+    return result
 
 
 def validate_and_normalize_club(club_input, clubs):
@@ -141,6 +569,59 @@ def validate_and_normalize_club(club_input, clubs):
     return None
 
 
+SEARCH_TOKEN_MAX_LENGTH = 20
+SEARCH_FIELDS = ("first_name", "last_name", "club")
+
+
+def normalize_search_text(text):
+    """Lower-case text and collapse whitespace for search matching"""
+    return " ".join(str(text or "").lower().split())
+
+
+def build_search_tokens(barcode, data):
+    """Build the prefix tokens a participant can be found by.
+
+    Covers the first name, last name, full name, barcode (with and without
+    the leading A) and club, plus each word of the club name.
+    """
+    first_name = normalize_search_text(data.get("first_name"))
+    last_name = normalize_search_text(data.get("last_name"))
+    club = normalize_search_text(data.get("club"))
+    barcode = normalize_search_text(barcode)
+
+    phrases = {first_name, last_name, f"{first_name} {last_name}", barcode, club}
+    phrases.add(barcode.removeprefix("a"))
+    phrases.update(club.split())
+
+    tokens = set()
+    for phrase in phrases:
+        phrase = phrase.strip()
+        for length in range(1, min(len(phrase), SEARCH_TOKEN_MAX_LENGTH) + 1):
+            tokens.add(phrase[:length].strip())
+    tokens.discard("")
+    return sorted(tokens)
+
+
+def participant_from_doc(doc):
+    """Convert a participant snapshot to a dict keyed with its barcode"""
+    data = doc.to_dict()
+    data.pop("search_tokens", None)
+    data["barcode"] = doc.id
+    return data
+
+
+def _with_search_tokens(barcode, data):
+    """Add search tokens to participant write data when searchable fields change"""
+    if not any(field in data for field in SEARCH_FIELDS):
+        return data
+    current = data
+    if not all(field in data for field in SEARCH_FIELDS):
+        doc = db.collection("participants").document(barcode).get()
+        current = {**(doc.to_dict() if doc.exists else {}), **data}
+    data["search_tokens"] = build_search_tokens(barcode, current)
+    return data
+
+
 def participant_exists(barcode):
     """Check if participant exists"""
     return db.collection("participants").document(barcode).get().exists
@@ -152,6 +633,7 @@ def create_participant(barcode, data):
 
     data["created_at"] = datetime.now()
     data["updated_at"] = datetime.now()
+    data["search_tokens"] = build_search_tokens(barcode, data)
     return db.collection("participants").document(barcode).set(data)
 
 
@@ -160,67 +642,87 @@ def update_participant(barcode, data):
     from datetime import datetime
 
     data["updated_at"] = datetime.now()
+    _with_search_tokens(barcode, data)
     return db.collection("participants").document(barcode).update(data)
 
 
-def get_participants(page=1, page_size=50, search=None, get_all=False):
-    """Get participants with pagination and optional search"""
+def encode_participant_cursor(direction, data):
+    """Encode an opaque page cursor from a participant's sort key"""
+    payload = [direction, data.get("last_name"), data.get("first_name")]
+    payload.append(data["barcode"])
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_participant_cursor(cursor):
+    """Decode a page cursor into its direction and start/end values"""
+    try:
+        direction, last_name, first_name, barcode = json.loads(
+            base64.urlsafe_b64decode(cursor.encode())
+        )
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid participant cursor") from e
+    if direction not in ("after", "before"):
+        raise ValueError("Invalid participant cursor")
+    values = {"last_name": last_name, "first_name": first_name, "__name__": barcode}
+    return direction, values
+
+
+def get_participants(page=1, page_size=50, search=None, get_all=False, cursor=None):
+    """Get participants with pagination and optional search.
+
+    Pages are addressed by the opaque next_cursor/prev_cursor tokens in the
+    response, which use start_after/end_before so deep pages cost the same
+    as the first. A page number without a cursor falls back to an offset.
+    """
     query = db.collection("participants").order_by("last_name").order_by("first_name")
 
     if get_all:
         # Return all participants without pagination
-        all_participants = query.get()
-        result = []
-        for p in all_participants:
-            participant_data = p.to_dict()
-            participant_data["barcode"] = p.id
-            result.append(participant_data)
-        return result
+        return [participant_from_doc(p) for p in query.get()]
 
     if search:
-        # For search, fetch all participants and filter in Python
-        search_lower = search.lower()
-        all_participants = query.get()
-        filtered_participants = []
-
-        for p in all_participants:
-            data = p.to_dict()
-            full_name = (
-                f"{data.get('first_name', '')} {data.get('last_name', '')}".lower()
-            )
-            barcode = p.id.lower()
-            club = data.get("club", "").lower()
-
-            if (
-                search_lower in full_name
-                or search_lower in barcode
-                or search_lower in club
-            ):
-                filtered_participants.append(p)
-
-        total_count = len(filtered_participants)
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        participants = filtered_participants[start_idx:end_idx]
+        # Prefix match against the search tokens maintained on every write
+        term = normalize_search_text(search)[:SEARCH_TOKEN_MAX_LENGTH]
+        query = query.where(
+            filter=firestore.FieldFilter("search_tokens", "array_contains", term)
+        )
+
+    # Use count aggregation to get total without fetching all documents
+    total_count = query.count().get()[0][0].value
+    total_pages = (total_count + page_size - 1) // page_size
+
+    if cursor:
+        direction, values = decode_participant_cursor(cursor)
+        keyed_query = query.order_by("__name__")
+        if direction == "after":
+            page_query = keyed_query.start_after(values).limit(page_size)
+        else:
+            page_query = keyed_query.end_before(values).limit_to_last(page_size)
+    elif 1 < page == total_pages:
+        # The last page is read from the end rather than skipping to it
+        page_query = query.limit_to_last(total_count - (page - 1) * page_size)
     else:
-        # Apply pagination directly to query
-        offset = (page - 1) * page_size
-        participants = query.offset(offset).limit(page_size).get()
-        # Use count aggregation to get total without fetching all documents
-        total_count = query.count().get()[0][0].value
+        # Offset fallback for jumping straight to an arbitrary page
+        page_query = query.offset((page - 1) * page_size).limit(page_size)
 
-    result = []
-    for p in participants:
-        participant_data = p.to_dict()
-        participant_data["barcode"] = p.id
-        result.append(participant_data)
+    participants = [participant_from_doc(p) for p in page_query.get()]
+
+    next_cursor = None
+    prev_cursor = None
+    if participants:
+        if page < total_pages:
+            next_cursor = encode_participant_cursor("after", participants[-1])
+        if page > 1:
+            prev_cursor = encode_participant_cursor("before", participants[0])
 
     return {
-        "participants": result,
+        "participants": participants,
         "total_count": total_count,
         "page": page,
         "page_size": page_size,
-        "total_pages": (total_count + page_size - 1) // page_size,
+        "total_pages": total_pages,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
     }
 
 
@@ -228,40 +730,136 @@ def get_participant(barcode):
     """Get single participant by barcode"""
     doc = db.collection("participants").document(barcode).get()
     if doc.exists:
-        data = doc.to_dict()
-        data["barcode"] = doc.id
-        return data
+        return participant_from_doc(doc)
     return None
 
 
+def get_participants_by_barcodes(barcodes, chunk_size=100, max_workers=4):
+    """Get many participants keyed by barcode using chunked multi-document reads"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    unique_barcodes = list(dict.fromkeys(barcodes))
+    if not unique_barcodes:
+        return {}
+
+    chunks = [
+        unique_barcodes[i : i + chunk_size]
+        for i in range(0, len(unique_barcodes), chunk_size)
+    ]
+
+    def fetch_chunk(chunk):
+        refs = [db.collection("participants").document(barcode) for barcode in chunk]
+        return [participant_from_doc(doc) for doc in db.get_all(refs) if doc.exists]
+
+    participants = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        for found in executor.map(fetch_chunk, chunks):
+            for data in found:
+                participants[data["barcode"]] = data
+    return participants
+
+
+PARTICIPANT_FIELDS = ("first_name", "last_name", "gender", "date_of_birth", "club")
+
+
+def load_existing_participants(barcodes, full_scan_ratio=0.5):
+    """Load stored participants for a set of barcodes.
+
+    Uses batched document reads, or a single stream of the whole collection
+    when the barcodes cover at least full_scan_ratio of it. Returns a tuple
+    of (participants keyed by barcode, Firestore reads used).
+    """
+    wanted = set(barcodes)
+    if not wanted:
+        return {}, 0
+
+    participants_ref = db.collection("participants")
+    total_count = participants_ref.count().get()[0][0].value
+    # Count aggregations are billed one read per 1000 index entries
+    reads = max(1, -(-total_count // 1000))
+
+    if total_count and len(wanted) >= total_count * full_scan_ratio:
+        participants = {}
+        for doc in participants_ref.stream():
+            reads += 1
+            if doc.id in wanted:
+                participants[doc.id] = participant_from_doc(doc)
+        return participants, reads
+
+    # Every requested document is billed, whether or not it exists
+    return get_participants_by_barcodes(wanted), reads + len(wanted)
+
+
+def diff_participants(records, full_scan_ratio=0.5):
+    """Split uploaded participant records into inserts, updates and no-ops.
+
+    The result feeds process_participants_batch directly and reports how
+    many Firestore reads were needed to build it.
+    """
+    existing, reads = load_existing_participants(
+        [record["barcode"] for record in records], full_scan_ratio
+    )
+    return {**split_participant_changes(records, existing), "reads": reads}
+
+
+def split_participant_changes(records, existing):
+    """Compare uploaded records with stored participants keyed by barcode"""
+    new_participants = []
+    updated_participants = []
+    unchanged = 0
+    for record in records:
+        current = existing.get(record["barcode"])
+        if current is None:
+            new_participants.append(dict(record))
+            continue
+
+        new_data = {field: record.get(field) for field in PARTICIPANT_FIELDS}
+        if any(current.get(field) != value for field, value in new_data.items()):
+            updated_participants.append((record["barcode"], new_data))
+        else:
+            unchanged += 1
+
+    return {
+        "new": new_participants,
+        "updated": updated_participants,
+        "unchanged": unchanged,
+    }
+
+
 def process_participants_batch(new_participants, updated_participants):
-    """Process new and updated participants in batch"""
+    """Process new and updated participants with one bulk writer"""
     from datetime import datetime
 
-    batch_size = 500
     now = datetime.now()
 
-    # Process new participants
-    for i in range(0, len(new_participants), batch_size):
-        batch = db.batch()
-        chunk = new_participants[i : i + batch_size]
-        for participant in chunk:
+    with bulk_writer() as writer:
+        # Process new participants
+        for participant in new_participants:
             barcode = participant.pop("barcode")  # Remove barcode from data
             participant["created_at"] = now
             participant["updated_at"] = now
-            doc_ref = db.collection("participants").document(barcode)
-            batch.set(doc_ref, participant)
-        batch.commit()
+            participant["search_tokens"] = build_search_tokens(barcode, participant)
+            writer.set(db.collection("participants").document(barcode), participant)
 
-    # Process updated participants
-    for i in range(0, len(updated_participants), batch_size):
-        batch = db.batch()
-        chunk = updated_participants[i : i + batch_size]
-        for barcode, data in chunk:
+        # Process updated participants
+        for barcode, data in updated_participants:
             data["updated_at"] = now
-            doc_ref = db.collection("participants").document(barcode)
-            batch.update(doc_ref, data)
-        batch.commit()
+            _with_search_tokens(barcode, data)
+            writer.update(db.collection("participants").document(barcode), data)
+
+
+def rebuild_participant_search_index():
+    """Backfill search tokens on every participant, returning the number updated"""
+    updated = 0
+    with bulk_writer() as writer:
+        for doc in db.collection("participants").stream():
+            data = doc.to_dict()
+            tokens = build_search_tokens(doc.id, data)
+            if data.get("search_tokens") == tokens:
+                continue
+            writer.update(doc.reference, {"search_tokens": tokens})
+            updated += 1
+    return updated
 
 
 def delete_participant(barcode):
@@ -299,12 +897,14 @@ def remove_admin_email(email):
     return db.collection("admin_emails").document(email).delete()
 
 
+@cached("seasons")
 def get_seasons():
     """Get all seasons ordered by name"""
     seasons = db.collection("season").order_by("__name__").get()
     return [season.id for season in seasons]
 
 
+@cached("default_season")
 def get_default_season():
     """Get the default season if one exists"""
     seasons = (
@@ -328,6 +928,9 @@ def clear_default_seasons():
     for season in seasons:
         batch.update(season.reference, {"is_default": False})
     batch.commit()
+    invalidate_cache("default_season")
+    invalidate_cache("season")
+    bump_version("seasons")
 
 
 def create_season(
@@ -343,9 +946,15 @@ def create_season(
         data["start_date"] = start_date
     if individual_results_best_of:
         data["individual_results_best_of"] = individual_results_best_of
-    return db.collection("season").document(season_name).set(data)
+    result = db.collection("season").document(season_name).set(data)
+    invalidate_cache("seasons")
+    invalidate_cache("default_season")
+    invalidate_cache("season", season_name)
+    bump_version("seasons")
+    return result
 
 
+@cached("season")
 def get_season(season_name):
     """Get single season by name"""
     doc = db.collection("season").document(season_name).get()
@@ -357,14 +966,27 @@ def get_season(season_name):
 
 def update_season(season_name, data):
     """Update existing season"""
-    return db.collection("season").document(season_name).update(data)
+    result = db.collection("season").document(season_name).update(data)
+    invalidate_cache("default_season")
+    invalidate_cache("season", season_name)
+    # best_of and age category settings change how results score
+    refresh_championship_standings(season_name, reuse_aggregates=True)
+    bump_version("seasons")
+    return result
 
 
 def delete_season(season_name):
     """Delete a season"""
-    return db.collection("season").document(season_name).delete()
+    result = db.collection("season").document(season_name).delete()
+    invalidate_cache("seasons")
+    invalidate_cache("default_season")
+    invalidate_cache("season", season_name)
+    invalidate_cache("races", season_name)
+    bump_version("seasons")
+    return result
 
 
+@cached("races")
 def get_races_by_season(season_name):
     """Get races for a specific season"""
     races = db.collection("season").document(season_name).collection("races").get()
@@ -376,27 +998,228 @@ def get_races_by_season(season_name):
     return result
 
 
+def get_default_race(season_name):
+    """Get the name of the latest race on or before today in a season"""
+    from datetime import datetime
+
+    today = datetime.now().date()
+    past_races = [
+        race
+        for race in get_races_by_season(season_name)
+        if datetime.strptime(race.get("date", "1900-01-01"), "%Y-%m-%d").date() <= today
+    ]
+    if not past_races:
+        return None
+    past_races.sort(key=lambda x: x.get("date", ""), reverse=True)
+    return past_races[0]["name"]
+
+
 def create_race(season_name, race_name, race_data):
-    """Create new race in a season"""
-    return (
+    """Create new race in a season, or replace an existing race's details"""
+    race_ref = (
         db.collection("season")
         .document(season_name)
         .collection("races")
         .document(race_name)
-        .set(race_data)
     )
+    previous = race_ref.get()
+    result = race_ref.set(race_data)
+    invalidate_cache("races", season_name)
+    # A race's organising clubs change the team championship
+    refresh_championship_standings(season_name, race_name)
+    # Participant results indexes keep a copy of the race date
+    race_date = race_data.get("date", "")
+    if previous.exists and previous.to_dict().get("date", "") != race_date:
+        reindex_race_date(season_name, race_name, race_date)
+    bump_version("seasons")
+    return result
+
+
+def reindex_race_date(season_name, race_name, race_date):
+    """Rewrite a race's date in the results index of everyone who ran it"""
+    results = _query_race_results(season_name, race_name)
+    with bulk_writer() as writer:
+        _write_participant_results(
+            writer,
+            participant_results_updates(season_name, race_name, race_date, results),
+        )
 
 
-def get_race_results(season_name, race_name):
-    """Get results for a specific race"""
-    results = (
+def _results_ref(season_name, race_name):
+    """Get the results collection for a race"""
+    return (
         db.collection("season")
         .document(season_name)
         .collection("races")
         .document(race_name)
         .collection("results")
-        .get()
     )
+
+
+def _results_blob_ref(season_name, race_name):
+    """Get the collection holding a race's results blob shards"""
+    return (
+        db.collection("season")
+        .document(season_name)
+        .collection("races")
+        .document(race_name)
+        .collection("results_blob")
+    )
+
+
+def sort_results_by_position(results, limit=None):
+    """Order results by numeric position as Firestore would, keeping the first N"""
+    ordered = sorted(
+        (r for r in results if "position" in r),
+        key=lambda r: (r["position"] is not None, r["position"] or 0),
+    )
+    return ordered[:limit] if limit else ordered
+
+
+def filter_results(results, gender=None, category=None):
+    """Keep results matching the participant gender and age category given"""
+    return [
+        r
+        for r in results
+        if (not gender or r.get("participant", {}).get("gender") == gender)
+        and (not category or r.get("participant", {}).get("age_category") == category)
+    ]
+
+
+def _filter_results_query(query, gender=None, category=None):
+    """Add participant gender and age category where clauses to a query"""
+    if gender:
+        query = query.where(
+            filter=firestore.FieldFilter("participant.gender", "==", gender)
+        )
+    if category:
+        query = query.where(
+            filter=firestore.FieldFilter("participant.age_category", "==", category)
+        )
+    return query
+
+
+def encode_results_blob(results):
+    """Compress race results in document ID order and split them into shards"""
+    ordered = sorted(results, key=lambda r: r["finish_token"])
+    data = zlib.compress(json.dumps(ordered, separators=(",", ":")).encode())
+    return [
+        data[i : i + RESULTS_BLOB_SHARD_SIZE]
+        for i in range(0, len(data), RESULTS_BLOB_SHARD_SIZE)
+    ]
+
+
+def decode_results_blob(shards):
+    """Decompress results blob shards back into race results"""
+    return json.loads(zlib.decompress(b"".join(shards)))
+
+
+def set_results_blob(batch, season_name, race_name, results):
+    """Add the writes storing a race's results blob to a batch"""
+    blob_ref = _results_blob_ref(season_name, race_name)
+    shards = encode_results_blob(results)
+    batch.set(
+        blob_ref.document("0"),
+        {
+            "version": RESULTS_BLOB_VERSION,
+            "shards": len(shards),
+            "count": len(results),
+            "data": shards[0],
+        },
+    )
+    for i, shard in enumerate(shards[1:], start=1):
+        batch.set(blob_ref.document(str(i)), {"data": shard})
+
+
+def get_results_blob(season_name, race_name, transaction=None):
+    """Read a race's results blob, or None when it is missing or stale.
+
+    The first shard holds the header, so a race loads in one read, or two
+    round trips when the blob spans several shards. Shards left over from
+    an older blob fail zlib's checksum or the result count and are ignored.
+    Given a transaction, the shards are read in it.
+    """
+    blob_ref = _results_blob_ref(season_name, race_name)
+    header = blob_ref.document("0").get(transaction=transaction)
+    if not header.exists:
+        return None
+    header_data = header.to_dict()
+    if header_data.get("version") != RESULTS_BLOB_VERSION:
+        return None
+
+    shards = [header_data["data"]]
+    if header_data["shards"] > 1:
+        shard_refs = [
+            blob_ref.document(str(i)) for i in range(1, header_data["shards"])
+        ]
+        docs = {
+            doc.id: doc
+            for doc in db.get_all(shard_refs, transaction=transaction)
+            if doc.exists
+        }
+        if len(docs) != len(shard_refs):
+            return None
+        shards += [docs[ref.id].to_dict()["data"] for ref in shard_refs]
+
+    try:
+        results = decode_results_blob(shards)
+    except (zlib.error, ValueError):
+        return None
+    if len(results) != header_data["count"]:
+        return None
+    return results
+
+
+def _update_results_blob(batch, season_name, race_name, existing, added=(), removed=()):
+    """Keep a race's results blob in step with a results write in the same batch.
+
+    existing must have been read in the transaction the batch belongs to,
+    otherwise a concurrent write to the race is lost from the blob.
+    """
+    if existing is None:
+        # No current blob to maintain, so make sure a stale one is never served
+        batch.delete(_results_blob_ref(season_name, race_name).document("0"))
+        return
+    results = {r["finish_token"]: r for r in existing}
+    for finish_token in removed:
+        results.pop(finish_token, None)
+    results.update((r["finish_token"], r) for r in added)
+    set_results_blob(batch, season_name, race_name, list(results.values()))
+
+
+def rebuild_results_blob(season_name, race_name):
+    """Rewrite a race's results blob from its results subcollection.
+
+    The results are read in a transaction, so a result written while the
+    blob is rebuilt makes the rebuild retry rather than be left out.
+    """
+    _rebuild_results_blob(db.transaction(), season_name, race_name)
+
+
+@firestore.transactional
+def _rebuild_results_blob(transaction, season_name, race_name):
+    results = _query_race_results(season_name, race_name, transaction=transaction)
+    set_results_blob(transaction, season_name, race_name, results)
+
+
+def _query_race_results(
+    season_name,
+    race_name,
+    order_by_position=False,
+    limit=None,
+    gender=None,
+    category=None,
+    transaction=None,
+):
+    """Read a race's results from its results subcollection"""
+    query = _filter_results_query(
+        _results_ref(season_name, race_name), gender, category
+    )
+    if order_by_position:
+        query = query.order_by("position")
+        if limit:
+            query = query.limit(limit)
+    results = query.get(transaction=transaction)
     result = []
     for res in results:
         result_data = res.to_dict()
@@ -405,76 +1228,679 @@ def get_race_results(season_name, race_name):
     return result
 
 
+def get_race_results(
+    season_name,
+    race_name,
+    order_by_position=False,
+    limit=None,
+    gender=None,
+    category=None,
+):
+    """Get results for a specific race.
+
+    Results come back in finish-token document ID order unless
+    order_by_position is set, when they are ordered by the numeric position
+    field and limit caps how many are returned. Results written before
+    positions were stored only appear in position-ordered queries once
+    backfill_result_positions() has run (make migrate MIGRATION=result-positions). gender and category become where
+    clauses on the participant fields, so only matching results are read.
+    With RESULTS_BLOB set the race's results blob is read first and filtered
+    in memory, falling back to the results subcollection when it is missing
+    or stale.
+    """
+    if RESULTS_BLOB:
+        results = get_results_blob(season_name, race_name)
+        if results is not None:
+            results = filter_results(results, gender, category)
+            if order_by_position:
+                return sort_results_by_position(results, limit)
+            return results
+    return _query_race_results(
+        season_name, race_name, order_by_position, limit, gender, category
+    )
+
+
+def get_top_race_results(
+    season_name, race_name, limit, gender=None, category=None, keep=None
+):
+    """Get the first limit results by position that keep accepts.
+
+    Filtering a limited read would come back short whenever a rejected
+    result falls inside the limit, so the read is doubled until enough
+    results are kept or the race has no more results to read.
+    """
+    fetch_limit = limit
+    while True:
+        results = get_race_results(
+            season_name,
+            race_name,
+            order_by_position=True,
+            limit=fetch_limit,
+            gender=gender,
+            category=category,
+        )
+        kept = [r for r in results if keep is None or keep(r)]
+        if len(kept) >= limit or len(results) < fetch_limit:
+            return kept[:limit]
+        fetch_limit *= 2
+
+
+def get_season_results(season_name, max_workers=8):
+    """Get every race in a season with its results.
+
+    Race results are fetched concurrently on a bounded thread pool. Returns
+    a list of {"race": ..., "results": ...} entries in race order.
+    """
+    races = get_races_by_season(season_name)
+    race_results = get_results_for_races(
+        season_name, [race["name"] for race in races], max_workers
+    )
+    return [
+        {"race": race, "results": results} for race, results in zip(races, race_results)
+    ]
+
+
+def load_season_results(season_name, max_workers=8):
+    """Read every race in a season into a compact SeasonResults store.
+
+    Races are fetched concurrently like get_season_results, but each race's
+    results are appended to the store as they arrive and then dropped, so
+    only the interned columns are held once the season is loaded.
+    """
+    races = get_races_by_season(season_name)
+    store = SeasonResults()
+    race_results = _iter_results_for_races(
+        season_name, [race["name"] for race in races], max_workers
+    )
+    for race, results in zip(races, race_results):
+        store.append_race(race, results)
+    return store
+
+
+def get_results_for_races(season_name, race_names, max_workers=8):
+    """Get results for several races concurrently, in the order given"""
+    return list(_iter_results_for_races(season_name, race_names, max_workers))
+
+
+def _iter_results_for_races(season_name, race_names, max_workers):
+    """Yield each race's results in the order given as they are read"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    if not race_names:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(race_names))) as executor:
+        yield from executor.map(
+            lambda race_name: _results_in_finish_order(season_name, race_name),
+            race_names,
+        )
+
+
+def _results_in_finish_order(season_name, race_name):
+    """Get every result of a race ordered by the position in its finish token"""
+    return _in_finish_order(get_race_results(season_name, race_name))
+
+
+def _in_finish_order(results):
+    """Order results by the position in their finish token.
+
+    Sorted here rather than with order_by("position"), which leaves out
+    results written before the position field was stored.
+    """
+    return sorted(
+        results, key=lambda r: position_from_token(r.get("finish_token", "")) or 0
+    )
+
+
 def add_race_result(season_name, race_name, finish_token, participant_data):
     """Add result for a race"""
-    return (
-        db.collection("season")
-        .document(season_name)
-        .collection("races")
-        .document(race_name)
-        .collection("results")
-        .document(finish_token)
-        .set({"participant": participant_data})
+    result_data = {
+        "participant": participant_data,
+        "position": position_from_token(finish_token),
+    }
+    _write_race_result(
+        db.transaction(), season_name, race_name, finish_token, result_data
     )
+    refresh_championship_standings(season_name, race_name)
+    bump_version(season_version_scope(season_name))
 
 
 def delete_race_result(season_name, race_name, finish_token):
     """Delete a race result"""
-    return (
-        db.collection("season")
-        .document(season_name)
-        .collection("races")
-        .document(race_name)
-        .collection("results")
-        .document(finish_token)
-        .delete()
+    _write_race_result(db.transaction(), season_name, race_name, finish_token)
+    refresh_championship_standings(season_name, race_name)
+    bump_version(season_version_scope(season_name))
+
+
+@firestore.transactional
+def _write_race_result(
+    transaction, season_name, race_name, finish_token, result_data=None
+):
+    """Set one result, or delete it without result_data, in a transaction.
+
+    The results blob and the result's previous holder are read in the
+    transaction, so two writes to one race retry rather than each
+    rewriting the blob without the other's change.
+    """
+    existing = (
+        get_results_blob(season_name, race_name, transaction) if RESULTS_BLOB else None
+    )
+    previous = _result_barcodes(
+        season_name, race_name, [finish_token], existing, transaction
+    )
+    result_ref = _results_ref(season_name, race_name).document(finish_token)
+
+    if result_data is None:
+        transaction.delete(result_ref)
+        _update_results_blob(
+            transaction, season_name, race_name, existing, removed=[finish_token]
+        )
+        _update_participant_results(
+            transaction, season_name, race_name, removed=previous.items()
+        )
+        return
+
+    added = [{**result_data, "finish_token": finish_token}]
+    transaction.set(result_ref, result_data)
+    _update_results_blob(transaction, season_name, race_name, existing, added=added)
+    _update_participant_results(
+        transaction, season_name, race_name, added, previous.items()
     )
 
 
 def delete_all_race_results(season_name, race_name):
     """Delete all results for a race"""
-    results = (
+    results = _results_ref(season_name, race_name).get()
+
+    removed = [
+        (result.id, result.to_dict().get("participant", {}).get("parkrun_barcode_id"))
+        for result in results
+    ]
+
+    # A race can hold more results than one batch allows
+    with bulk_writer() as writer:
+        for result in results:
+            writer.delete(result.reference)
+        _update_results_blob(writer, season_name, race_name, None)
+        _update_participant_results(writer, season_name, race_name, removed=removed)
+    if RESULTS_BLOB:
+        # Results added while these were deleted must not be left out
+        rebuild_results_blob(season_name, race_name)
+    refresh_championship_standings(season_name, race_name)
+    bump_version(season_version_scope(season_name))
+
+
+def add_race_results_batch(season_name, race_name, results_data):
+    """Add multiple race results in batch.
+
+    With RESULTS_BLOB set the race's results blob is rebuilt from the
+    results subcollection once every result is stored.
+    """
+    add_race_results_stream(
+        season_name, race_name, chunked(results_data, RESULTS_BATCH_SIZE)
+    )
+
+
+def add_race_results_stream(season_name, race_name, chunks, progress=None):
+    """Add race results from an iterable of chunks, writing each as it arrives.
+
+    Each chunk of up to RESULTS_BATCH_SIZE results is written, along with
+    its participant results index updates, by a bulk writer on a writer
+    thread while the next chunk is produced, so writes overlap with producing the results and
+    at most two chunks are held at once. The results blob, standings and
+    season version are updated once the chunks run out, or once an error
+    stops them after some were written. progress, if given, is called with
+    the number of results written so far as each chunk completes. Returns
+    the number of results written.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    results_ref = _results_ref(season_name, race_name)
+    existing = get_results_blob(season_name, race_name) if RESULTS_BLOB else None
+    race_date = _race_date(season_name, race_name)
+
+    def write(added, first):
+        previous = _result_barcodes(
+            season_name, race_name, [r["finish_token"] for r in added], existing
+        )
+        if first:
+            # The blob is stale until every chunk is written
+            _results_blob_ref(season_name, race_name).document("0").delete()
+        with bulk_writer() as writer:
+            for result_data in added:
+                writer.set(
+                    results_ref.document(result_data["finish_token"]),
+                    {
+                        "participant": result_data["participant"],
+                        "position": result_data["position"],
+                    },
+                )
+            _write_participant_results(
+                writer,
+                participant_results_updates(
+                    season_name, race_name, race_date, added, previous.items()
+                ),
+            )
+
+    written = 0
+    pending = None
+    try:
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            for chunk in chunks:
+                added = [
+                    {
+                        "participant": result_data["participant"],
+                        "position": position_from_token(result_data["finish_token"]),
+                        "finish_token": result_data["finish_token"],
+                    }
+                    for result_data in chunk
+                ]
+                if not added:
+                    continue
+                if pending is not None:
+                    # Surface a failed write before queueing the next
+                    pending.result()
+                    if progress:
+                        progress(written)
+                pending = writer.submit(write, added, written == 0)
+                written += len(added)
+        if pending is not None:
+            pending.result()
+            if progress:
+                progress(written)
+    finally:
+        if written:
+            # Rebuilt rather than merged into the blob read at the start,
+            # which would drop results another writer added since
+            if RESULTS_BLOB:
+                rebuild_results_blob(season_name, race_name)
+            refresh_championship_standings(season_name, race_name)
+            bump_version(season_version_scope(season_name))
+    return written
+
+
+def backfill_result_positions():
+    """Store the numeric position on every race result, returning the number updated"""
+    updated = 0
+    with bulk_writer() as writer:
+        for doc in db.collection_group("results").stream():
+            position = position_from_token(doc.id)
+            if doc.to_dict().get("position") == position:
+                continue
+            writer.update(doc.reference, {"position": position})
+            updated += 1
+    return updated
+
+
+# Participant fields copied, as they were at the time of the race, into
+# each participant results index entry
+INDEXED_PARTICIPANT_FIELDS = (
+    "first_name",
+    "last_name",
+    "gender",
+    "age_category",
+    "club",
+)
+
+
+def participant_result_key(season_name, race_name, finish_token):
+    """Build the key of one result in a participant's results index"""
+    return f"{season_name}/{race_name}/{finish_token}"
+
+
+def participant_results_updates(
+    season_name, race_name, race_date, added=(), removed=()
+):
+    """Group participant results index changes by participant barcode.
+
+    added holds results with a finish_token and participant; removed holds
+    (finish_token, barcode) pairs for results no longer held by that
+    participant. Returns {barcode: {key: entry or DELETE_FIELD}} ready to be
+    merged into participant_results documents.
+    """
+    updates = {}
+    for finish_token, barcode in removed:
+        if barcode:
+            key = participant_result_key(season_name, race_name, finish_token)
+            updates.setdefault(barcode, {})[key] = firestore.DELETE_FIELD
+    for result in added:
+        participant = result.get("participant") or {}
+        barcode = participant.get("parkrun_barcode_id")
+        if not barcode:
+            continue
+        key = participant_result_key(season_name, race_name, result["finish_token"])
+        updates.setdefault(barcode, {})[key] = {
+            "season": season_name,
+            "race_name": race_name,
+            "race_date": race_date,
+            "finish_token": result["finish_token"],
+            "position": position_from_token(result["finish_token"]),
+            **{field: participant.get(field) for field in INDEXED_PARTICIPANT_FIELDS},
+        }
+    return updates
+
+
+def _race_date(season_name, race_name):
+    """Read a race's date from its document.
+
+    The races cache is skipped, as a date edited on another instance would
+    otherwise be copied into participant results indexes until it expires.
+    """
+    race = (
         db.collection("season")
         .document(season_name)
         .collection("races")
         .document(race_name)
-        .collection("results")
         .get()
     )
+    return race.to_dict().get("date", "") if race.exists else ""
 
-    batch = db.batch()
-    for result in results:
-        batch.delete(result.reference)
-    batch.commit()
 
+def _result_barcodes(
+    season_name, race_name, finish_tokens, existing=None, transaction=None
+):
+    """Map finish tokens that already have a result to their participant barcode"""
+    tokens = set(finish_tokens)
+    if existing is not None:
+        return {
+            r["finish_token"]: r.get("participant", {}).get("parkrun_barcode_id")
+            for r in existing
+            if r["finish_token"] in tokens
+        }
+    results_ref = _results_ref(season_name, race_name)
+    docs = db.get_all(
+        [results_ref.document(token) for token in tokens], transaction=transaction
+    )
+    return {
+        doc.id: doc.to_dict().get("participant", {}).get("parkrun_barcode_id")
+        for doc in docs
+        if doc.exists
+    }
 
-def add_race_results_batch(season_name, race_name, results_data):
-    """Add multiple race results in batch"""
-    batch_size = 500
 
-    for i in range(0, len(results_data), batch_size):
-        batch = db.batch()
-        chunk = results_data[i : i + batch_size]
-
-        for result_data in chunk:
-            finish_token = result_data["finish_token"]
-            participant_data = result_data["participant"]
-
-            doc_ref = (
-                db.collection("season")
-                .document(season_name)
-                .collection("races")
-                .document(race_name)
-                .collection("results")
-                .document(finish_token)
+def _update_participant_results(batch, season_name, race_name, added=(), removed=()):
+    """Keep the results index of each affected participant in step with a write"""
+    race_date = _race_date(season_name, race_name) if added else ""
+    _write_participant_results(
+        batch,
+        participant_results_updates(season_name, race_name, race_date, added, removed),
+    )
+
+
+def _write_participant_results(batch, updates):
+    """Add grouped participant results index changes to a batch or bulk writer"""
+    for barcode, entries in updates.items():
+        batch.set(
+            db.collection("participant_results").document(barcode),
+            {"results": entries},
+            merge=True,
+        )
+
+
+def backfill_participant_results():
+    """Bring every participant's results index up to date, returning the number written.
+
+    Reads every race and result once and merges only the index entries that
+    are missing or out of date, deleting entries whose result has gone, so
+    entries an upload writes while the backfill runs are kept. Indexes are
+    read before results, so an entry written in between is never taken for
+    one whose result has gone. Registered participants without results get
+    an empty index so their page never falls back to the collection group
+    query.
+    """
+    stored = {
+        doc.id: doc.to_dict().get("results", {})
+        for doc in db.collection("participant_results").stream()
+    }
+    race_dates = {
+        tuple(race.reference.path.split("/")[1::2]): race.to_dict().get("date", "")
+        for race in db.collection_group("races").stream()
+    }
+    indexes = {ref.id: {} for ref in db.collection("participants").list_documents()}
+    indexes.update((barcode, {}) for barcode in stored)
+    for doc in db.collection_group("results").stream():
+        path = doc.reference.path.split("/")
+        if len(path) != 6 or path[0] != "season":
+            continue
+        season_name, race_name = path[1], path[3]
+        updates = participant_results_updates(
+            season_name,
+            race_name,
+            race_dates.get((season_name, race_name), ""),
+            [{**doc.to_dict(), "finish_token": doc.id}],
+        )
+        for barcode, entries in updates.items():
+            indexes.setdefault(barcode, {}).update(entries)
+
+    changes = {}
+    for barcode, entries in indexes.items():
+        if barcode not in stored:
+            changes[barcode] = entries
+            continue
+        current = stored[barcode]
+        changed = {
+            key: entry for key, entry in entries.items() if current.get(key) != entry
+        }
+        changed.update(
+            (key, firestore.DELETE_FIELD) for key in current if key not in entries
+        )
+        if changed:
+            changes[barcode] = changed
+
+    with bulk_writer() as writer:
+        _write_participant_results(writer, changes)
+    return len(changes)
+
+
+def standings_document_id(championship_type, gender, category=None):
+    """Build the standings document ID for a championship"""
+    return f"{championship_type}-{gender}-{category or 'all'}"
+
+
+def refresh_championship_standings(season_name, race_name=None, reuse_aggregates=False):
+    """Recompute and store every championship standing for a season.
+
+    Standings are folded from per-race aggregates kept in
+    season/{season}/race_aggregates. Given a race_name, only that race's
+    results are re-read and its aggregate rebuilt; other races reuse their
+    stored aggregates, so an edit costs one race rather than the season.
+    With reuse_aggregates, as after a season or race setting changes, only
+    races without an aggregate are read. Otherwise every aggregate is
+    rebuilt. Writes one document per championship type, gender and age
+    category to season/{season}/standings, removing any that no longer apply.
+    """
+    _refresh_championship_standings(
+        db.transaction(), season_name, race_name, reuse_aggregates
+    )
+
+
+@firestore.transactional
+def _refresh_championship_standings(
+    transaction, season_name, race_name, reuse_aggregates
+):
+    """Read, fold and write a season's standings in one transaction.
+
+    The season, its races, the stored aggregates and the results of every
+    race rebuilt are read in the transaction rather than from the process
+    caches, so a race edited on another instance is never folded from an
+    old copy, and a result written while this refresh runs makes it retry
+    instead of committing an older aggregate over a newer one.
+    """
+    season_ref = db.collection("season").document(season_name)
+    aggregates_ref = season_ref.collection("race_aggregates")
+    standings_ref = season_ref.collection("standings")
+
+    season_doc = season_ref.get(transaction=transaction)
+    season = season_doc.to_dict() if season_doc.exists else None
+    races = [
+        {**doc.to_dict(), "name": doc.id}
+        for doc in season_ref.collection("races").stream(transaction=transaction)
+    ]
+    aggregates = {
+        doc.id: doc.to_dict() for doc in aggregates_ref.stream(transaction=transaction)
+    }
+    race_names = {race["name"] for race in races}
+    orphans = [name for name in aggregates if name not in race_names]
+
+    if race_name is None and not reuse_aggregates:
+        aggregates = {}
+    aggregates.pop(race_name, None)
+    # Races without a stored aggregate are rebuilt from their results
+    rebuilt = {
+        race["name"]: championship.race_aggregate(
+            _in_finish_order(
+                _query_race_results(season_name, race["name"], transaction=transaction)
             )
-            batch.set(doc_ref, {"participant": participant_data})
+        )
+        for race in races
+        if race["name"] not in aggregates
+    }
+    aggregates.update(rebuilt)
+
+    documents = {}
+    if races:
+        for gender in championship.GENDERS:
+            documents[standings_document_id("team", gender)] = (
+                championship.fold_team_championship(
+                    season_name, races, aggregates, gender
+                )
+            )
+            categories = championship.aggregate_categories(
+                aggregates[race["name"]] for race in races
+            )
+            for category in [None, *categories]:
+                doc_id = standings_document_id("individual", gender, category)
+                documents[doc_id] = championship.fold_individual_championship(
+                    season_name, season, races, aggregates, gender, category
+                )
+
+    if race_name is None and not reuse_aggregates:
+        for name in orphans:
+            transaction.delete(aggregates_ref.document(name))
+    for name, aggregate in rebuilt.items():
+        transaction.set(aggregates_ref.document(name), aggregate)
+    for doc_ref in standings_ref.list_documents():
+        if doc_ref.id not in documents:
+            transaction.delete(doc_ref)
+    for doc_id, data in documents.items():
+        transaction.set(standings_ref.document(doc_id), data)
+
+
+def get_championship_standings(season_name, championship_type, gender, category=None):
+    """Get materialised championship standings, or None if not yet computed"""
+    doc = (
+        db.collection("season")
+        .document(season_name)
+        .collection("standings")
+        .document(standings_document_id(championship_type, gender, category))
+        .get()
+    )
+    if doc.exists:
+        return doc.to_dict()
+    return None
 
-        batch.commit()
+
+def get_championship(season_name, championship_type, gender, category=None):
+    """Get championship standings, materialised or calculated live.
+
+    Returns None when the season has no races.
+    """
+    if championship_type == "team":
+        category = None
+    standings = get_championship_standings(
+        season_name, championship_type, gender, category
+    )
+    if standings:
+        return standings
+
+    season_results = load_season_results(season_name)
+    if not season_results.races:
+        return None
+    if championship_type == "team":
+        return championship.team_championship(season_name, season_results, gender)
+    return championship.individual_championship(
+        season_name, get_season(season_name), season_results, gender, category
+    )
+
+
+def get_individual_championships(season_name):
+    """Get every individual championship of a season, materialised or live.
+
+    Returns a list with each gender's overall standings followed by one per
+    age category, each tagged with its gender, or None when the season has
+    no races. Materialised standings are read in one query; otherwise the
+    season's results are read once and scored in one grouped pass.
+    """
+    docs = (
+        db.collection("season")
+        .document(season_name)
+        .collection("standings")
+        .where(filter=firestore.FieldFilter("championship_type", "==", "individual"))
+        .get()
+    )
+    stored = [
+        {**doc.to_dict(), "gender": doc.id.split("-")[1]}
+        for doc in docs
+        if doc.id.split("-")[1] in championship.GENDERS
+    ]
+    if stored:
+        return sorted(
+            stored,
+            key=lambda c: (
+                championship.GENDERS.index(c["gender"]),
+                c.get("category") is not None,
+                c.get("category") or "",
+            ),
+        )
+
+    season_results = load_season_results(season_name)
+    if not season_results.races:
+        return None
+    by_gender = championship.individual_championships(
+        season_name, get_season(season_name), season_results
+    )
+    return [
+        {**standings, "gender": gender}
+        for gender, championships in by_gender.items()
+        for standings in championships
+    ]
+
+
+def participant_results_from_index(participant_id, index):
+    """Expand a participant results index document, most recent race first"""
+    results = [
+        {
+            "season": entry["season"],
+            "race_name": entry["race_name"],
+            "race_date": entry.get("race_date", ""),
+            "finish_token": entry["finish_token"],
+            "position": entry.get("position"),
+            "participant": {
+                "parkrun_barcode_id": participant_id,
+                **{
+                    field: entry[field]
+                    for field in INDEXED_PARTICIPANT_FIELDS
+                    if field in entry
+                },
+            },
+        }
+        for entry in index.get("results", {}).values()
+    ]
+    results.sort(key=lambda x: x.get("race_date", ""), reverse=True)
+    return results
 
 
 def get_participant_results(participant_id):
-    """Get all results for a specific participant across all seasons and races"""
+    """Get all results for a specific participant across all seasons and races.
+
+    Reads the participant's participant_results index document. Participants
+    without one, before backfill_participant_results() has run, fall back to
+    a collection group query over every race's results.
+    """
+    index = db.collection("participant_results").document(participant_id).get()
+    if index.exists:
+        return participant_results_from_index(participant_id, index.to_dict())
+
     # Use collection group query to search across all results collections
     results_query = (
         db.collection_group("results")
@@ -486,29 +1912,39 @@ def get_participant_results(participant_id):
         .get()
     )
 
-    results = []
+    # Resolve every distinct parent race in one batched read for its date
+    race_refs = {}
     for result in results_query:
+        race_ref = result.reference.parent.parent
+        race_refs[race_ref.path] = race_ref
+
+    race_dates = {}
+    if race_refs:
+        for race_doc in db.get_all(list(race_refs.values())):
+            if race_doc.exists:
+                race_dates[race_doc.reference.path] = race_doc.to_dict().get("date", "")
+
+    return participant_results_from_docs(results_query, race_dates)
+
+
+def participant_results_from_docs(result_docs, race_dates):
+    """Build participant results from result snapshots, most recent race first.
+
+    race_dates maps each race document path to the race's date.
+    """
+    results = []
+    for result in result_docs:
         # Extract season and race from document path
         path_parts = result.reference.path.split("/")
         season_name = path_parts[1]
         race_name = path_parts[3]
 
-        # Get race data for date
-        race_doc = (
-            db.collection("season")
-            .document(season_name)
-            .collection("races")
-            .document(race_name)
-            .get()
-        )
-        race_date = race_doc.to_dict().get("date", "") if race_doc.exists else ""
-
         result_data = result.to_dict()
         results.append(
             {
                 "season": season_name,
                 "race_name": race_name,
-                "race_date": race_date,
+                "race_date": race_dates.get(result.reference.parent.parent.path, ""),
                 "finish_token": result.id,
                 "participant": result_data.get("participant", {}),
             }
@@ -0,0 +1,89 @@
+"""HTTP conditional request support for the public API resources.
+
+Responses carry an ETag and Last-Modified derived from the version stamps
+that database.py writers bump, so a client revalidating an unchanged
+resource gets a 304 after one small versions read, before any results are
+read or standings computed.
+"""
+
+import hashlib
+import json
+from datetime import UTC, date
+from functools import wraps
+
+from flask import Response, g, request
+from flask_restx.utils import unpack
+from werkzeug.http import http_date
+
+import database
+
+
+def _etag(name, view_args, versions):
+    """Build a weak ETag from the resource, its arguments and scope versions"""
+    key = json.dumps(
+        [
+            name,
+            view_args,
+            sorted(request.args.items(multi=True)),
+            {scope: v["version"] for scope, v in versions.items()},
+            # Default races move on with the calendar
+            date.today().isoformat(),
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def _last_modified(versions):
+    """Get the latest update time across scopes, or None if never bumped"""
+    updated = [v["updated_at"] for v in versions.values() if v["updated_at"]]
+    if not updated:
+        return None
+    latest = max(updated).replace(microsecond=0)
+    return latest if latest.tzinfo else latest.replace(tzinfo=UTC)
+
+
+def _not_modified(etag, last_modified):
+    """Check the request's validators against the current ones"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional(scopes, max_age):
+    """Serve a resource with validators, Cache-Control and 304 handling.
+
+    scopes is called with the view's keyword arguments and returns the
+    database version scopes the response depends on. Apply it above
+    marshal_with so the headers are added to the marshalled response.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            versions = database.get_versions(*scopes(**kwargs))
+            etag = _etag(func.__qualname__, kwargs, versions)
+            last_modified = _last_modified(versions)
+
+            headers = {"Cache-Control": f"public, max-age={max_age}"}
+            if last_modified:
+                headers["Last-Modified"] = http_date(last_modified)
+            if _not_modified(etag, last_modified):
+                response = Response(status=304, headers=headers)
+                response.set_etag(etag, weak=True)
+                return response
+
+            # Lets coalesced requests share work only within one version,
+            # and cached responses keep the validators they were built under
+            g.etag = etag
+            g.last_modified = headers.get("Last-Modified")
+            data, code, extra_headers = unpack(func(*args, **kwargs))
+            headers["ETag"] = f'W/"{etag}"'
+            # A response served from cache replaces these with its own
+            return data, code, {**headers, **extra_headers}
+
+        return wrapper
+
+    return decorator
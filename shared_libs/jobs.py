@@ -0,0 +1,206 @@
+"""Background jobs for long-running admin work such as CSV uploads.
+
+A large upload processed inside the request holds one of the few gunicorn
+threads until every row is written, and can outlast the request timeout.
+Instead the upload is saved to disk and processed as a job on a small
+in-process worker pool. Each job's status, progress counters (rows parsed,
+written and rejected) and final message are kept in the jobs collection,
+so a progress view can poll them while the job runs. A running job
+whose record stops being updated, because its instance was stopped or
+replaced, is marked failed the next time its status is read.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import UTC, datetime, timedelta
+
+import database
+
+logger = logging.getLogger(__name__)
+
+# Jobs running at once, and jobs accepted at once including queued ones
+JOB_WORKERS = 2
+MAX_PENDING_JOBS = 8
+# Seconds between progress writes while a job runs
+PROGRESS_INTERVAL = 1.0
+# Detail lines, such as rejected rows, kept on a finished job
+MAX_JOB_DETAILS = 50
+# Seconds without a write after which a running job is taken to have died
+# with its instance; a running job writes every PROGRESS_INTERVAL, while a
+# queued one writes nothing until a worker starts it, however long it waits
+JOB_STALE_AFTER = 600
+STALE_JOB_ERROR = "Processing stopped responding before it finished, please try again"
+
+
+class JobQueueFull(Exception):
+    """Raised when MAX_PENDING_JOBS jobs are already queued or running"""
+
+
+class Job:
+    """A running job's progress counters, detail lines and record id.
+
+    Only the thread running the job should update it.
+    """
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.progress = {"parsed": 0, "written": 0, "rejected": 0}
+        self.details = []
+        self._saved_at = time.monotonic()
+
+    def update(self, **counters):
+        """Set progress counters, saving them at most every PROGRESS_INTERVAL"""
+        self.progress.update(counters)
+        if time.monotonic() - self._saved_at >= PROGRESS_INTERVAL:
+            self.save()
+
+    def save(self, **data):
+        """Save the progress counters and any other fields to the job record"""
+        self._saved_at = time.monotonic()
+        database.update_job(self.id, {"progress": dict(self.progress), **data})
+
+    def kept_details(self):
+        """Get the detail lines to store, summarising any beyond the limit"""
+        if len(self.details) <= MAX_JOB_DETAILS:
+            return self.details
+        hidden = len(self.details) - MAX_JOB_DETAILS
+        return self.details[:MAX_JOB_DETAILS] + [f"... and {hidden} more not shown"]
+
+
+class JobRunner:
+    """Bounded pool of threads running jobs outside the request.
+
+    With max_workers=0 jobs run in the submitting thread instead, which
+    tests use to check a job's outcome as soon as its request returns.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, max_pending=MAX_PENDING_JOBS):
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+            if max_workers
+            else None
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._futures = set()
+
+    def submit(self, kind, func, *args, params=None):
+        """Queue func(job, *args) as a job of the given kind, returning its id.
+
+        func returns the job's final message; an exception it raises marks
+        the job failed. params are stored on the job record for display.
+        Raises JobQueueFull rather than queue work without limit.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull(
+                "Too many uploads are already being processed, please try again shortly"
+            )
+        try:
+            job = Job(database.create_job(kind, params or {}))
+        except BaseException:
+            self._slots.release()
+            raise
+
+        if self._executor is None:
+            self._run(job, func, args)
+            return job.id
+
+        future = self._executor.submit(self._run, job, func, args)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+        return job.id
+
+    def _discard(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def _run(self, job, func, args):
+        """Run one job, recording its outcome on the job record"""
+        try:
+            job.save(status="running")
+            message = func(job, *args)
+            job.save(status="done", message=message, details=job.kept_details())
+        # Any error the job raises is its outcome, recorded for the progress view
+        except Exception as e:
+            logger.exception("Error running job %s", job.id)
+            try:
+                job.save(status="failed", error=str(e), details=job.kept_details())
+            except Exception:
+                # The worker thread must still release the job's slot
+                logger.exception("Error recording failure of job %s", job.id)
+        finally:
+            self._slots.release()
+
+    def wait(self, timeout=None):
+        """Wait for every job submitted so far to finish"""
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures, timeout=timeout)
+
+
+runner = JobRunner()
+
+
+def submit(kind, func, *args, params=None):
+    """Queue func(job, *args) on the shared runner, returning the job id"""
+    return runner.submit(kind, func, *args, params=params)
+
+
+def submit_upload(kind, func, file, *args, params=None):
+    """Save an uploaded file to disk and queue func(job, path, *args) on it.
+
+    The upload stream is gone once the request returns, so the file is
+    spooled to a temporary file first, which is removed when the job ends.
+    """
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=".csv")
+    with os.fdopen(fd, "wb") as spool:
+        file.save(spool)
+    try:
+        return submit(kind, _process_upload, func, path, *args, params=params)
+    except BaseException:
+        os.remove(path)
+        raise
+
+
+def _process_upload(job, func, path, *args):
+    try:
+        return func(job, path, *args)
+    finally:
+        os.remove(path)
+
+
+def is_stale(record, now=None):
+    """Check whether a running job has gone JOB_STALE_AFTER without a write"""
+    updated_at = record.get("updated_at")
+    if record.get("status") != "running" or updated_at is None:
+        return False
+    now = now or datetime.now(UTC)
+    return now - updated_at > timedelta(seconds=JOB_STALE_AFTER)
+
+
+def get_status(job_id):
+    """Get a job's status, progress and outcome for the progress view.
+
+    A stale job is marked failed, so the view stops polling for it.
+    """
+    record = database.get_job(job_id)
+    if record is None:
+        return None
+    if is_stale(record):
+        database.update_job(job_id, {"status": "failed", "error": STALE_JOB_ERROR})
+        record = {**record, "status": "failed", "error": STALE_JOB_ERROR}
+    return {
+        "id": record["id"],
+        "kind": record.get("kind"),
+        "params": record.get("params", {}),
+        "status": record.get("status"),
+        "progress": record.get("progress", {}),
+        "message": record.get("message"),
+        "error": record.get("error"),
+        "details": record.get("details", []),
+    }
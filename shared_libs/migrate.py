@@ -0,0 +1,65 @@
+"""Backfill fields on documents written before the code maintained them.
+
+Run after deploying a change that adds a maintained field, with the
+project's Firestore credentials configured, either directly:
+
+    GOOGLE_CLOUD_PROJECT=my-project python shared_libs/migrate.py all
+
+or with make migrate. Each migration only writes documents whose field
+is missing or out of date, so running one again is safe. participant-results
+merges just the index entries that differ, keeping any an upload writes
+while it runs.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+import database
+
+# Migration name -> (function returning the number of documents updated, what it updates)
+MIGRATIONS = {
+    "search-index": (
+        database.rebuild_participant_search_index,
+        "participant search tokens",
+    ),
+    "result-positions": (
+        database.backfill_result_positions,
+        "numeric positions on race results",
+    ),
+    "participant-results": (
+        database.backfill_participant_results,
+        "participant results indexes",
+    ),
+}
+
+
+def run(names):
+    """Run the named migrations in order, returning documents updated per name"""
+    updated = {}
+    for name in names:
+        migration, description = MIGRATIONS[name]
+        print(f"Backfilling {description}...")
+        updated[name] = migration()
+        print(f"  {updated[name]} documents updated")
+    return updated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "migrations",
+        nargs="+",
+        choices=[*MIGRATIONS, "all"],
+        help="migrations to run, or all to run every migration",
+    )
+    args = parser.parse_args(argv)
+    names = list(MIGRATIONS) if "all" in args.migrations else args.migrations
+    run(names)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
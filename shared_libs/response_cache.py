@@ -0,0 +1,232 @@
+"""Stale-while-revalidate response cache for expensive public API resources.
+
+Responses are cached per resource, arguments and query string, along with
+the ETag and Last-Modified of the data versions they were computed from. A
+response younger than its soft time to live and computed from the current
+versions is served as is. Past the soft TTL, or once a write moves the
+versions on, it is still served immediately, with the validators it was
+computed under so a cached body always matches its ETag, while one
+background thread recomputes it. Only requests with nothing cached, or
+only an entry past the hard TTL, wait. Responses report their cache age in
+the Age header and the outcome in X-Cache.
+"""
+
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import wraps
+
+from flask import copy_current_request_context, g, request
+from flask_restx.utils import unpack
+from werkzeug.exceptions import HTTPException
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    """One cached response and the validators of the versions it was computed from"""
+
+    __slots__ = ("created_at", "etag", "last_modified", "response")
+
+    def __init__(self, etag, last_modified, response):
+        self.created_at = time.monotonic()
+        self.etag = etag
+        self.last_modified = last_modified
+        self.response = response
+
+    @property
+    def age(self):
+        return time.monotonic() - self.created_at
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of responses with soft and hard expiry"""
+
+    def __init__(self, name, soft_ttl, hard_ttl, maxsize=128):
+        self.name = name
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.refresh_errors = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = weakref.WeakValueDictionary()
+
+    def get(self, key):
+        """Get the entry for key, dropping it if past its hard expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.age >= self.hard_ttl:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, etag, last_modified, response):
+        """Store a response for key, evicting the least recently used entries"""
+        entry = _Entry(etag, last_modified, response)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def record(self, counter):
+        """Count a hit, stale hit, miss or refresh error"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def discard(self, key):
+        """Drop the entry for key, if any"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def key_lock(self, key):
+        """Get the lock serialising computations of one key"""
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def is_fresh(self, entry, etag):
+        """Check an entry can be served for the given ETag without refreshing it"""
+        return entry.etag == etag and entry.age < self.soft_ttl
+
+    def invalidate(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Get hit/stale/miss counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale": self.stale,
+                "misses": self.misses,
+                "refresh_errors": self.refresh_errors,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "soft_ttl": self.soft_ttl,
+                "hard_ttl": self.hard_ttl,
+            }
+
+
+_caches = {}
+
+
+def _refresh(cache, key, etag, last_modified, compute):
+    """Recompute an entry on a background thread unless one already is"""
+    lock = cache.key_lock(key)
+    if not lock.acquire(blocking=False):
+        return
+
+    @copy_current_request_context
+    def refresh():
+        try:
+            g.etag = etag
+            data, code, headers = unpack(compute())
+            if code == 200:
+                cache.set(key, etag, last_modified, (data, code, headers))
+            else:
+                cache.discard(key)
+        except HTTPException:
+            # The current data no longer gives this response, so stop serving it
+            cache.discard(key)
+        # Nothing waits on a background refresh, so any error is logged and
+        # counted here, and the last response stays in service
+        except Exception:
+            cache.record("refresh_errors")
+            logger.exception("Error refreshing %s response", cache.name)
+        finally:
+            lock.release()
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+def _respond(entry, status):
+    """Add cache headers, and the validators it was computed under, to a response"""
+    data, code, headers = entry.response
+    validators = {}
+    if entry.etag:
+        validators["ETag"] = f'W/"{entry.etag}"'
+    if entry.last_modified:
+        validators["Last-Modified"] = entry.last_modified
+    if entry.etag and request.if_none_match.contains_weak(entry.etag):
+        # The client already holds the older response being served
+        data, code = None, 304
+    return (
+        data,
+        code,
+        {**headers, **validators, "Age": str(int(entry.age)), "X-Cache": status},
+    )
+
+
+def cached_response(name, soft_ttl, hard_ttl, maxsize=128):
+    """Serve a resource from a stale-while-revalidate response cache.
+
+    Resources given the same name share one cache. Apply it below
+    conditional, whose ETag tells the cache which data versions the
+    request sees, and above coalesced so concurrent misses compute once.
+    """
+    cache = _caches.setdefault(
+        name, ResponseCache(name, soft_ttl, hard_ttl, maxsize=maxsize)
+    )
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (
+                func.__qualname__,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+            )
+            etag = g.get("etag")
+            last_modified = g.get("last_modified")
+
+            entry = cache.get(key)
+            if entry is not None:
+                if cache.is_fresh(entry, etag):
+                    cache.record("hits")
+                    return _respond(entry, "HIT")
+                # Serve the last response, even one computed from older
+                # versions, while one refresh computes the current one
+                cache.record("stale")
+                _refresh(cache, key, etag, last_modified, lambda: func(*args, **kwargs))
+                return _respond(entry, "STALE")
+
+            with cache.key_lock(key):
+                # Another request may have filled it while this one waited
+                entry = cache.get(key)
+                if entry is not None and entry.etag == etag:
+                    cache.record("hits")
+                    return _respond(entry, "HIT")
+                cache.record("misses")
+                data, code, headers = unpack(func(*args, **kwargs))
+                if code != 200:
+                    return data, code, headers
+                entry = cache.set(key, etag, last_modified, (data, code, headers))
+            return _respond(entry, "MISS")
+
+        return wrapper
+
+    return decorator
+
+
+def clear_caches():
+    """Drop every cached response"""
+    for cache in _caches.values():
+        cache.invalidate()
+
+
+def get_stats():
+    """Get counters for every response cache"""
+    return {name: cache.stats() for name, cache in _caches.items()}
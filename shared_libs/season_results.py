@@ -0,0 +1,154 @@
+"""Compact in-memory store for a season's race results.
+
+Each result is one row across parallel typed arrays: its race index and an
+integer code per participant field. Every distinct string (name, gender,
+club, age category, barcode, finish token) is held once per season, so a
+season with tens of thousands of results keeps a few integers per result
+rather than a result dict and a participant dict each. The store is built
+once as race results are read and is what the championship engine encodes.
+"""
+
+from array import array
+from itertools import islice
+
+import numpy as np
+
+# Participant fields kept for every result, in storage order
+PARTICIPANT_FIELDS = (
+    "first_name",
+    "last_name",
+    "gender",
+    "club",
+    "age_category",
+    "parkrun_barcode_id",
+)
+
+
+class _Missing:
+    """Marks a field the original participant did not have"""
+
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+
+class StringColumn:
+    """One field of every result as codes into its distinct values"""
+
+    __slots__ = ("_array", "_codes", "_lookup", "values")
+
+    def __init__(self):
+        self.values = []
+        self._lookup = {}
+        self._codes = array("i")
+        self._array = None
+
+    def __len__(self):
+        return len(self._codes)
+
+    def extend(self, values):
+        """Add one row per value, interning values not seen before"""
+        lookup = self._lookup
+        intern = lookup.setdefault
+        self._codes.extend([intern(value, len(lookup)) for value in values])
+        self.values.extend(islice(lookup, len(self.values), None))
+        self._array = None
+
+    @property
+    def codes(self):
+        """Value code per row as a NumPy array"""
+        if self._array is None:
+            self._array = np.array(self._codes, dtype=np.int32)
+        return self._array
+
+    def value(self, row):
+        """Get one row's value, MISSING when the field was absent"""
+        return self.values[self._codes[row]]
+
+    def mapped(self, func, dtype):
+        """Apply func once per distinct value and spread the result over rows"""
+        per_value = np.array([func(v) for v in self.values], dtype=dtype)
+        return per_value[self.codes] if len(per_value) else np.zeros(0, dtype)
+
+
+class SeasonResults:
+    """A season's results as parallel columns, in race and finish order"""
+
+    __slots__ = ("_race", "_race_array", "columns", "finish_token", "races")
+
+    def __init__(self):
+        self.races = []
+        self._race = array("i")
+        self._race_array = None
+        self.finish_token = StringColumn()
+        self.columns = {field: StringColumn() for field in PARTICIPANT_FIELDS}
+
+    @classmethod
+    def from_results(cls, season_results):
+        """Build a store from {"race", "results"} entries in race order"""
+        store = cls()
+        for entry in season_results:
+            store.append_race(entry["race"], entry["results"])
+        return store
+
+    def __len__(self):
+        return len(self._race)
+
+    def append_race(self, race, results):
+        """Add a race and its results in finish order.
+
+        results may be result dicts or Firestore document snapshots; each is
+        read once and only its interned field codes are kept.
+        """
+        rows = []
+        for result in results:
+            if hasattr(result, "to_dict"):
+                finish_token, result = result.id, result.to_dict()
+            else:
+                finish_token = result.get("finish_token", MISSING)
+            rows.append((finish_token, result.get("participant", {})))
+
+        self._race.extend([len(self.races)] * len(rows))
+        self.races.append(race)
+        self.finish_token.extend([finish_token for finish_token, _ in rows])
+        participants = [participant for _, participant in rows]
+        for field, column in self.columns.items():
+            column.extend(
+                [participant.get(field, MISSING) for participant in participants]
+            )
+        self._race_array = None
+
+    @property
+    def race(self):
+        """Race index per result as a NumPy array"""
+        if self._race_array is None:
+            self._race_array = np.array(self._race, dtype=np.int32)
+        return self._race_array
+
+    def participant(self, row):
+        """Rebuild one result's participant dict with the fields it had"""
+        participant = {}
+        for field, column in self.columns.items():
+            value = column.value(row)
+            if value is not MISSING:
+                participant[field] = value
+        return participant
+
+    def results(self, race_index):
+        """Rebuild one race's results as {"finish_token", "participant"} dicts"""
+        rows = np.flatnonzero(self.race == race_index).tolist()
+        results = []
+        for row in rows:
+            result = {"participant": self.participant(row)}
+            finish_token = self.finish_token.value(row)
+            if finish_token is not MISSING:
+                result["finish_token"] = finish_token
+            results.append(result)
+        return results
@@ -0,0 +1,104 @@
+"""Request coalescing for expensive public API resources.
+
+When results go live many clients ask for the same standings at once. The
+coalesced decorator lets concurrent identical requests in one process wait
+on a single in-flight computation and share its response, instead of every
+thread re-reading the season and scoring it again.
+"""
+
+import threading
+from functools import wraps
+
+from flask import g, request
+
+
+class _Call:
+    """One in-flight computation and its outcome"""
+
+    __slots__ = ("done", "error", "value")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+        self.value = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time, sharing it with concurrent callers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, func):
+        """Call func, or wait for the call already running under key.
+
+        Every caller gets the same value, or the same exception re-raised.
+        The key is released once the call finishes, so later callers
+        compute afresh rather than reuse a finished result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = func()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+    def stats(self):
+        """Get how many calls ran and how many callers shared one"""
+        return {"calls": self.calls, "shared": self.shared}
+
+
+_flights = SingleFlight()
+
+
+def _request_key(name, view_args):
+    """Normalise a request to its resource, arguments and sorted query"""
+    return (
+        name,
+        tuple(sorted(view_args.items())),
+        tuple(sorted(request.args.items(multi=True))),
+        # Only share a computation started against the same versions
+        g.get("etag"),
+    )
+
+
+def coalesced(func):
+    """Share one computation between concurrent identical requests.
+
+    Apply it below conditional, so each request is still validated against
+    its own If-None-Match, and above marshal_with, so the marshalled
+    response is what waiting requests receive.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = _request_key(func.__qualname__, kwargs)
+        return _flights.do(key, lambda: func(*args, **kwargs))
+
+    return wrapper
+
+
+def get_stats():
+    """Get request coalescing counters for this process"""
+    return _flights.stats()
@@ -0,0 +1,114 @@
+import os
+import sys
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "shared_libs"))
+
+import async_database
+import database
+
+
+async def _async_iter(items):
+    for item in items:
+        yield item
+
+
+def _doc(doc_id, data, exists=True):
+    doc = Mock()
+    doc.id = doc_id
+    doc.exists = exists
+    doc.to_dict.return_value = dict(data)
+    return doc
+
+
+class TestAsyncDatabase(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        database.clear_caches()
+
+    @patch("async_database.db")
+    async def test_get_participant(self, mock_db):
+        mock_db.collection.return_value.document.return_value.get = AsyncMock(
+            return_value=_doc("A123456", {"first_name": "John"})
+        )
+
+        result = await async_database.get_participant("A123456")
+
+        self.assertEqual(result, {"first_name": "John", "barcode": "A123456"})
+
+    @patch("async_database.db")
+    async def test_get_participant_not_found(self, mock_db):
+        mock_db.collection.return_value.document.return_value.get = AsyncMock(
+            return_value=_doc("A999999", {}, exists=False)
+        )
+
+        self.assertIsNone(await async_database.get_participant("A999999"))
+
+    @patch("async_database.db")
+    async def test_get_participant_results(self, mock_db):
+        race_ref = Mock()
+        race_ref.path = "season/2025/races/Race1"
+        result_doc = _doc("P1", {"participant": {"first_name": "John"}})
+        result_doc.reference.path = "season/2025/races/Race1/results/P1"
+        result_doc.reference.parent.parent = race_ref
+        race_doc = _doc("Race1", {"date": "2025-01-15"})
+        race_doc.reference.path = race_ref.path
+        # Without a results index the collection group query is used
+        mock_db.collection.return_value.document.return_value.get = AsyncMock(
+            return_value=_doc("A123456", {}, exists=False)
+        )
+        mock_db.collection_group.return_value.where.return_value.get = AsyncMock(
+            return_value=[result_doc]
+        )
+        mock_db.get_all.side_effect = lambda refs: _async_iter([race_doc])
+
+        result = await async_database.get_participant_results("A123456")
+
+        mock_db.get_all.assert_called_once_with([race_ref])
+        self.assertEqual(
+            result,
+            [
+                {
+                    "season": "2025",
+                    "race_name": "Race1",
+                    "race_date": "2025-01-15",
+                    "finish_token": "P1",
+                    "participant": {"first_name": "John"},
+                }
+            ],
+        )
+
+    @patch("async_database.db")
+    async def test_get_participant_results_from_index(self, mock_db):
+        entry = {
+            "season": "2025",
+            "race_name": "Race1",
+            "race_date": "2025-01-15",
+            "finish_token": "P1",
+            "position": 1,
+            "age_category": "V40",
+            "club": "Club A",
+        }
+        mock_db.collection.return_value.document.return_value.get = AsyncMock(
+            return_value=_doc("A123456", {"results": {"2025/Race1/P1": entry}})
+        )
+
+        result = await async_database.get_participant_results("A123456")
+
+        mock_db.collection.assert_called_with("participant_results")
+        mock_db.collection_group.assert_not_called()
+        self.assertEqual(result[0]["finish_token"], "P1")
+        self.assertEqual(result[0]["participant"]["club"], "Club A")
+
+    def test_run_gathers_on_shared_loop(self):
+        async def value(n):
+            return n
+
+        result = async_database.run(async_database.gather(value(1), value(2)))
+
+        self.assertEqual(result, [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,353 @@
+import os
+import sys
+import unittest
+from unittest.mock import Mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "shared_libs"))
+
+import championship
+from season_results import MISSING, SeasonResults
+
+
+def _result(first_name, club, gender="Male", last_name="Runner", category="Senior"):
+    return {
+        "participant": {
+            "first_name": first_name,
+            "last_name": last_name,
+            "gender": gender,
+            "club": club,
+            "age_category": category,
+        }
+    }
+
+
+def _race(name, results, organising_clubs=()):
+    return {
+        "race": {"name": name, "organising_clubs": list(organising_clubs)},
+        "results": results,
+    }
+
+
+class TestChampionship(unittest.TestCase):
+
+    def test_team_top_count_and_dq(self):
+        season_results = [
+            _race(
+                "Race1",
+                [_result(f"A{i}", "Club A") for i in range(4)]
+                + [_result(f"B{i}", "Club B") for i in range(3)],
+            ),
+            _race("Race2", [_result(f"B{i}", "Club B") for i in range(4)]),
+        ]
+
+        result = championship.team_championship("2025", season_results, "Male")
+
+        club_a, club_b = result["standings"]
+        self.assertEqual(club_a["name"], "Club A")
+        self.assertEqual(
+            club_a["race_points"]["Race1"],
+            {"points": 10, "positions": [1, 2, 3, 4], "rank": 1},
+        )
+        # Three men are not enough for a men's team score
+        self.assertEqual(club_b["race_points"]["Race1"], "DQ")
+        self.assertEqual(club_b["total_points"], "DQ")
+
+    def test_team_women_need_three_finishers(self):
+        season_results = [
+            _race("Race1", [_result(f"W{i}", "Club A", "Female") for i in range(3)])
+        ]
+
+        result = championship.team_championship("2025", season_results, "Female")
+
+        self.assertEqual(result["standings"][0]["race_points"]["Race1"]["points"], 6)
+
+    def test_team_tied_ranks_and_organiser_adjustment(self):
+        # Club A and Club B tie in Race1 (1+4+5+8 vs 2+3+6+7)
+        race1 = [
+            _result("A1", "Club A"),
+            _result("B1", "Club B"),
+            _result("B2", "Club B"),
+            _result("A2", "Club A"),
+            _result("A3", "Club A"),
+            _result("B3", "Club B"),
+            _result("B4", "Club B"),
+            _result("A4", "Club A"),
+        ]
+        race2 = [_result(f"A{i}", "Club A") for i in range(4)]
+        season_results = [
+            _race("Race1", race1, ["Club C"]),
+            _race("Race2", race2, ["Club B"]),
+        ]
+
+        result = championship.team_championship("2025", season_results, "Male")
+        standings = {row["name"]: row for row in result["standings"]}
+
+        self.assertEqual(standings["Club A"]["race_points"]["Race1"]["rank"], 1)
+        self.assertEqual(standings["Club B"]["race_points"]["Race1"]["rank"], 1)
+        # Club A never organises, so its rank total is scaled by (2 - 1) / 2
+        self.assertEqual(standings["Club A"]["total_points"], 1.0)
+        self.assertEqual(standings["Club B"]["race_points"]["Race2"], "ORG")
+        self.assertEqual(standings["Club B"]["total_points"], 1)
+        self.assertEqual(standings["Club C"]["race_points"], {"Race1": "ORG"})
+        self.assertEqual(standings["Club C"]["total_points"], 0)
+
+    def test_individual_best_of(self):
+        season_results = [
+            _race("Race1", [_result("John", "Club A"), _result("Bob", "Club B")]),
+            _race("Race2", [_result("Bob", "Club B"), _result("John", "Club A")]),
+            _race("Race3", [_result("John", "Club A")]),
+        ]
+        season = {"individual_results_best_of": 2}
+
+        result = championship.individual_championship(
+            "2025", season, season_results, "Male"
+        )
+
+        self.assertEqual(result["best_of"], 2)
+        john, bob = result["standings"]
+        self.assertEqual(john["name"], "John Runner")
+        self.assertEqual(john["total_points"], 2)
+        self.assertEqual(john["race_positions"], {"Race1": 1, "Race2": 2, "Race3": 1})
+        self.assertEqual(bob["total_points"], 3)
+
+    def test_individual_category_positions(self):
+        season_results = [
+            _race(
+                "Race1",
+                [
+                    _result("John", "Club A", category="Senior"),
+                    _result("Bob", "Club B", category="V40"),
+                    _result("Jane", "Club A", "Female", category="V40"),
+                ],
+            )
+        ]
+
+        result = championship.individual_championship(
+            "2025", None, season_results, "Male", "V40"
+        )
+
+        self.assertEqual(
+            result["championship_name"], "Male V40 Individual Championship"
+        )
+        self.assertEqual(len(result["standings"]), 1)
+        self.assertEqual(result["standings"][0]["race_positions"], {"Race1": 1})
+
+    def test_individual_unnamed_finishers_keep_position(self):
+        season_results = [
+            _race("Race1", [_result("", "Club A"), _result("John", "Club A")]),
+            _race("Race2", [_result("John", "Club A")]),
+        ]
+
+        result = championship.individual_championship(
+            "2025", {"individual_results_best_of": 1}, season_results, "Male"
+        )
+
+        self.assertEqual(len(result["standings"]), 1)
+        self.assertEqual(
+            result["standings"][0]["race_positions"], {"Race1": 1, "Race2": 1}
+        )
+
+    def test_encoded_season_is_reused(self):
+        season_results = [
+            _race("Race1", [_result("John", "Club A", category="V40")]),
+        ]
+        encoded = championship.encode_season(season_results)
+
+        self.assertIs(championship.encode_season(encoded), encoded)
+        self.assertEqual(championship.result_categories(encoded), ["V40"])
+        self.assertEqual(
+            championship.individual_championship("2025", None, encoded, "Male", "V40"),
+            championship.individual_championship(
+                "2025", None, season_results, "Male", "V40"
+            ),
+        )
+
+    def test_individual_championships_grouped(self):
+        season_results = [
+            _race(
+                "Race1",
+                [
+                    _result("John", "Club A", category="V40"),
+                    _result("Jane", "Club B", "Female", category="V40"),
+                    _result("", "Club A", category="V40"),
+                    _result("Bob", "Club B", category="Senior"),
+                ],
+            ),
+            _race("Race2", [_result("Bob", "Club B", category="Senior")]),
+        ]
+        season = {"individual_results_best_of": 1}
+
+        result = championship.individual_championships("2025", season, season_results)
+
+        self.assertEqual(
+            [c["category"] for c in result["Male"]], [None, "Senior", "V40"]
+        )
+        for gender, championships in result.items():
+            for entry in championships:
+                self.assertEqual(
+                    entry,
+                    championship.individual_championship(
+                        "2025", season, season_results, gender, entry["category"]
+                    ),
+                )
+
+    def test_race_aggregate(self):
+        aggregate = championship.race_aggregate(
+            [
+                _result("John", "Club A", category="V40"),
+                _result("Jane", "Club B", "Female"),
+                _result("Bob", "Club A", category="V40"),
+                _result("", "Club C"),
+            ]
+        )
+
+        self.assertEqual(aggregate["clubs"], ["Club A", "Club B", "Club C"])
+        self.assertEqual(
+            aggregate["teams"]["Male"],
+            [{"club": "Club A", "finishers": 2, "positions": [1, 2]}],
+        )
+        bob = aggregate["individuals"]["Male"][1]
+        self.assertEqual((bob["position"], bob["category_position"]), (2, 2))
+        self.assertEqual(
+            championship.aggregate_categories([aggregate]), ["Senior", "V40"]
+        )
+
+    def test_fold_matches_full_scoring(self):
+        season_results = [
+            _race(
+                "Race1",
+                [_result(f"A{i}", "Club A", category="V40") for i in range(4)]
+                + [_result(f"B{i}", "Club B") for i in range(4)],
+                ["Club C"],
+            ),
+            _race("Race2", [], ["Club A"]),
+            _race(
+                "Race3",
+                [_result(f"B{i}", "Club B") for i in range(4)]
+                + [_result("A1", "Club A", category="V40")],
+            ),
+        ]
+        races = [entry["race"] for entry in season_results]
+        aggregates = {
+            entry["race"]["name"]: championship.race_aggregate(entry["results"])
+            for entry in season_results
+        }
+        season = {"individual_results_best_of": 2}
+
+        for gender in championship.GENDERS:
+            self.assertEqual(
+                championship.fold_team_championship("2025", races, aggregates, gender),
+                championship.team_championship("2025", season_results, gender),
+            )
+            for category in [None, "V40"]:
+                self.assertEqual(
+                    championship.fold_individual_championship(
+                        "2025", season, races, aggregates, gender, category
+                    ),
+                    championship.individual_championship(
+                        "2025", season, season_results, gender, category
+                    ),
+                )
+
+    def test_blank_organising_club_is_ignored(self):
+        season_results = [
+            _race("Race1", [_result(f"A{i}", "Club A") for i in range(4)], [""]),
+            _race(
+                "Race2", [_result(f"A{i}", "Club A") for i in range(4)], ["", "Club B"]
+            ),
+        ]
+        races = [entry["race"] for entry in season_results]
+        aggregates = {
+            entry["race"]["name"]: championship.race_aggregate(entry["results"])
+            for entry in season_results
+        }
+
+        folded = championship.fold_team_championship("2025", races, aggregates, "Male")
+
+        self.assertEqual(
+            folded, championship.team_championship("2025", season_results, "Male")
+        )
+        standings = {row["name"]: row for row in folded["standings"]}
+        self.assertEqual(set(standings), {"Club A", "Club B"})
+        self.assertEqual(standings["Club A"]["race_points"]["Race1"]["rank"], 1)
+        self.assertEqual(standings["Club B"]["race_points"], {"Race2": "ORG"})
+
+
+class TestSeasonResults(unittest.TestCase):
+
+    def test_strings_are_interned(self):
+        store = SeasonResults.from_results(
+            [
+                _race("Race1", [_result("John", "Club A"), _result("Jane", "Club A")]),
+                _race("Race2", [_result("John", "Club B")]),
+            ]
+        )
+
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.race.tolist(), [0, 0, 1])
+        self.assertEqual(store.columns["club"].values, ["Club A", "Club B"])
+        self.assertEqual(store.columns["club"].codes.tolist(), [0, 0, 1])
+        self.assertEqual(store.columns["first_name"].values, ["John", "Jane"])
+
+    def test_round_trip_keeps_missing_and_none_apart(self):
+        results = [
+            {"finish_token": "P1", "participant": {"first_name": "John", "club": None}},
+            {"participant": {"first_name": "Jane"}},
+            {},
+        ]
+        store = SeasonResults.from_results([_race("Race1", results)])
+
+        self.assertEqual(store.columns["club"].value(0), None)
+        self.assertIs(store.columns["club"].value(1), MISSING)
+        self.assertEqual(
+            store.results(0),
+            [
+                {
+                    "finish_token": "P1",
+                    "participant": {"first_name": "John", "club": None},
+                },
+                {"participant": {"first_name": "Jane"}},
+                {"participant": {}},
+            ],
+        )
+
+    def test_append_race_reads_snapshots(self):
+        snapshot = Mock()
+        snapshot.id = "P0001"
+        snapshot.to_dict.return_value = _result("John", "Club A")
+        store = SeasonResults()
+
+        store.append_race({"name": "Race1"}, [snapshot])
+
+        self.assertEqual(store.finish_token.value(0), "P0001")
+        self.assertEqual(store.participant(0)["club"], "Club A")
+
+    def test_scoring_from_store_matches_dicts(self):
+        season_results = [
+            _race(
+                "Race1",
+                [
+                    _result("John", "Club A", category="V40"),
+                    _result("Jane", "Club B", "Female", last_name=None),
+                    _result("", "Club A"),
+                ],
+                organising_clubs=["Club B"],
+            ),
+            _race("Race2", [_result("John", "Club A", category="V40")]),
+        ]
+        store = SeasonResults.from_results(season_results)
+        season = {"individual_results_best_of": 2}
+
+        for gender in championship.GENDERS:
+            self.assertEqual(
+                championship.team_championship("2025", store, gender),
+                championship.team_championship("2025", season_results, gender),
+            )
+        self.assertEqual(
+            championship.individual_championships("2025", season, store),
+            championship.individual_championships("2025", season, season_results),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,29 @@
 import os
 import sys
+import threading
+import time
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import ANY, Mock, patch
+
+from google.api_core import exceptions
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "shared_libs"))
 
+import championship
 import database
+import migrate
+from season_results import MISSING, SeasonResults
 
 
 class TestDatabase(unittest.TestCase):
 
+    def setUp(self):
+        database.clear_caches()
+        # Version stamps are covered by TestVersions
+        patcher = patch("database.bump_version")
+        self.mock_bump_version = patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_validate_barcode_valid(self):
         self.assertTrue(database.validate_barcode("A12"))
         self.assertTrue(database.validate_barcode("A1234567"))
@@ -32,6 +46,26 @@ class TestDatabase(unittest.TestCase):
         self.assertFalse(database.validate_position_token("P12345"))
         self.assertFalse(database.validate_position_token("123"))
 
+    def test_iter_result_rows(self):
+        skipped = {"invalid_barcodes": 0, "invalid_tokens": 0, "duplicates": []}
+        lines = iter(
+            ["\ufeffA123,P1\n", "A124,P1\n", "B1,P2\n", "A125,X\n", "A126,\n", "A127\n"]
+        )
+
+        rows = database.iter_result_rows(lines, skipped)
+
+        self.assertEqual(next(rows), ("A123", "P1"))
+        # Rows are only read as they are asked for
+        self.assertEqual(next(lines), "A124,P1\n")
+        self.assertEqual(list(rows), [])
+        self.assertEqual(
+            skipped, {"invalid_barcodes": 1, "invalid_tokens": 1, "duplicates": []}
+        )
+
+    def test_chunked(self):
+        self.assertEqual(list(database.chunked(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(database.chunked([], 2)), [])
+
     @patch("database.db")
     def test_get_clubs(self, mock_db):
         mock_club = Mock()
@@ -46,6 +80,86 @@ class TestDatabase(unittest.TestCase):
         mock_db.collection.assert_called_with("clubs")
         self.assertEqual(result, [{"name": "Test Club", "short_names": ["TC"]}])
 
+    @patch("database.db")
+    def test_get_clubs_cached(self, mock_db):
+        mock_club = Mock()
+        mock_club.to_dict.return_value = {"short_names": ["TC"]}
+        mock_club.id = "Test Club"
+        mock_get = mock_db.collection.return_value.order_by.return_value.get
+        mock_get.return_value = [mock_club]
+        hits_before = database.get_cache_stats()["clubs"]["hits"]
+
+        first = database.get_clubs()
+        first[0]["name"] = "Mutated"
+        second = database.get_clubs()
+
+        mock_get.assert_called_once()
+        self.assertEqual(second, [{"name": "Test Club", "short_names": ["TC"]}])
+        self.assertEqual(database.get_cache_stats()["clubs"]["hits"], hits_before + 1)
+
+    @patch("database.db")
+    def test_club_writers_invalidate_cache(self, mock_db):
+        mock_get = mock_db.collection.return_value.order_by.return_value.get
+        mock_get.return_value = []
+
+        database.get_clubs()
+        database.add_club("New Club")
+        database.get_clubs()
+        database.update_club("New Club", {"short_names": ["NC"]})
+        database.get_clubs()
+        database.delete_club("New Club")
+        database.get_clubs()
+
+        self.assertEqual(mock_get.call_count, 4)
+
+    @patch("database.refresh_championship_standings")
+    @patch("database.db")
+    def test_season_cache_invalidated_by_update(self, mock_db, mock_refresh):
+        mock_doc = Mock()
+        mock_doc.exists = True
+        mock_doc.to_dict.return_value = {"age_category_size": 5}
+        mock_get = mock_db.collection.return_value.document.return_value.get
+        mock_get.return_value = mock_doc
+
+        database.get_season("2024 Season")
+        database.get_season("2024 Season")
+        self.assertEqual(mock_get.call_count, 1)
+
+        database.update_season("2024 Season", {"age_category_size": 10})
+        database.get_season("2024 Season")
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("database.refresh_championship_standings")
+    @patch("database.db")
+    def test_races_cache_invalidated_by_create_race(self, mock_db, mock_refresh):
+        mock_get = (
+            mock_db.collection.return_value.document.return_value.collection.return_value.get
+        )
+        mock_get.return_value = []
+
+        database.get_races_by_season("2024 Season")
+        database.get_races_by_season("2024 Season")
+        database.create_race("2024 Season", "Race 1", {"date": "2024-01-01"})
+        database.get_races_by_season("2024 Season")
+
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_ttl_cache_expiry_and_eviction(self):
+        cache = database.TTLCache("test", ttl=60, maxsize=2)
+        cache.set(("a",), 1)
+        cache.set(("b",), 2)
+        cache.get(("a",))
+        cache.set(("c",), 3)
+
+        self.assertEqual(cache.get(("a",)), (True, 1))
+        self.assertEqual(cache.get(("b",)), (False, None))
+
+        with patch("database.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertEqual(cache.get(("a",)), (False, None))
+
+        self.assertEqual(cache.stats()["hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 2)
+
     @patch("database.db")
     def test_club_exists_true(self, mock_db):
         mock_doc = Mock()
@@ -133,6 +247,210 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(result["page"], 1)
         self.assertEqual(result["page_size"], 50)
 
+    def _mock_participant_query(self, mock_db, total_count):
+        query = (
+            mock_db.collection.return_value.order_by.return_value.order_by.return_value
+        )
+        mock_count_result = Mock()
+        mock_count_result.value = total_count
+        query.count.return_value.get.return_value = [[mock_count_result]]
+        return query
+
+    def _mock_participant_docs(self, count):
+        docs = []
+        for i in range(count):
+            doc = Mock()
+            doc.id = f"A{i:06d}"
+            doc.to_dict.return_value = {"first_name": "John", "last_name": f"Doe{i}"}
+            docs.append(doc)
+        return docs
+
+    @patch("database.db")
+    def test_get_participants_next_cursor(self, mock_db):
+        query = self._mock_participant_query(mock_db, total_count=120)
+        query.offset.return_value.limit.return_value.get.return_value = (
+            self._mock_participant_docs(50)
+        )
+
+        result = database.get_participants()
+
+        self.assertIsNone(result["prev_cursor"])
+        direction, values = database.decode_participant_cursor(result["next_cursor"])
+        self.assertEqual(direction, "after")
+        self.assertEqual(
+            values,
+            {"last_name": "Doe49", "first_name": "John", "__name__": "A000049"},
+        )
+
+    @patch("database.db")
+    def test_get_participants_with_cursor_skips_offset(self, mock_db):
+        query = self._mock_participant_query(mock_db, total_count=5000)
+        keyed_query = query.order_by.return_value
+        keyed_query.start_after.return_value.limit.return_value.get.return_value = (
+            self._mock_participant_docs(50)
+        )
+        cursor = database.encode_participant_cursor(
+            "after", {"last_name": "Doe", "first_name": "John", "barcode": "A1"}
+        )
+
+        result = database.get_participants(page=40, cursor=cursor)
+
+        query.offset.assert_not_called()
+        query.order_by.assert_called_with("__name__")
+        keyed_query.start_after.assert_called_with(
+            {"last_name": "Doe", "first_name": "John", "__name__": "A1"}
+        )
+        self.assertEqual(len(result["participants"]), 50)
+        self.assertIsNotNone(result["next_cursor"])
+        self.assertIsNotNone(result["prev_cursor"])
+
+    @patch("database.db")
+    def test_get_participants_with_previous_cursor(self, mock_db):
+        query = self._mock_participant_query(mock_db, total_count=5000)
+        keyed_query = query.order_by.return_value
+        cursor = database.encode_participant_cursor(
+            "before", {"last_name": "Doe", "first_name": "John", "barcode": "A1"}
+        )
+
+        database.get_participants(page=3, cursor=cursor)
+
+        keyed_query.end_before.assert_called_once()
+        keyed_query.end_before.return_value.limit_to_last.assert_called_with(50)
+
+    @patch("database.db")
+    def test_get_participants_last_page_reads_from_end(self, mock_db):
+        query = self._mock_participant_query(mock_db, total_count=120)
+
+        database.get_participants(page=3)
+
+        query.offset.assert_not_called()
+        query.limit_to_last.assert_called_with(20)
+
+    def test_decode_participant_cursor_invalid(self):
+        with self.assertRaises(ValueError):
+            database.decode_participant_cursor("not-a-cursor")
+
+    @patch("database.db")
+    def test_get_participants_search_uses_index(self, mock_db):
+        mock_participant = Mock()
+        mock_participant.to_dict.return_value = {
+            "first_name": "John",
+            "search_tokens": ["j", "jo"],
+        }
+        mock_participant.id = "A123456"
+        mock_query = (
+            mock_db.collection.return_value.order_by.return_value.order_by.return_value.where.return_value
+        )
+        mock_query.offset.return_value.limit.return_value.get.return_value = [
+            mock_participant
+        ]
+        mock_count_result = Mock()
+        mock_count_result.value = 151
+        mock_query.count.return_value.get.return_value = [[mock_count_result]]
+
+        result = database.get_participants(page=2, search="  John   SM ")
+
+        mock_query.offset.assert_called_with(50)
+        mock_query.offset.return_value.limit.assert_called_with(50)
+        self.assertEqual(
+            result["participants"], [{"first_name": "John", "barcode": "A123456"}]
+        )
+        self.assertEqual(result["total_count"], 151)
+        self.assertEqual(result["total_pages"], 4)
+
+    @patch("database.firestore")
+    @patch("database.db")
+    def test_get_participants_search_term_normalized(self, mock_db, mock_firestore):
+        database.get_participants(search="  John   SM ")
+
+        mock_firestore.FieldFilter.assert_called_with(
+            "search_tokens", "array_contains", "john sm"
+        )
+
+    def test_build_search_tokens(self):
+        tokens = database.build_search_tokens(
+            "A123456",
+            {"first_name": "John", "last_name": "Smith", "club": "Romsey Road Runners"},
+        )
+
+        for token in [
+            "j",
+            "john",
+            "smi",
+            "john s",
+            "a123",
+            "1234",
+            "romsey",
+            "road",
+            "run",
+        ]:
+            self.assertIn(token, tokens)
+        self.assertNotIn("ohn", tokens)
+        self.assertTrue(all(len(token) <= 20 for token in tokens))
+
+    @patch("database.db")
+    def test_create_participant_adds_search_tokens(self, mock_db):
+        data = {"first_name": "John", "last_name": "Doe", "club": "Test Club"}
+        database.create_participant("A123456", data)
+
+        saved = mock_db.collection.return_value.document.return_value.set.call_args[0][
+            0
+        ]
+        self.assertIn("doe", saved["search_tokens"])
+
+    @patch("database.db")
+    def test_update_participant_partial_merges_existing(self, mock_db):
+        mock_doc = Mock()
+        mock_doc.exists = True
+        mock_doc.to_dict.return_value = {
+            "first_name": "John",
+            "last_name": "Doe",
+            "club": "Test Club",
+        }
+        mock_db.collection.return_value.document.return_value.get.return_value = (
+            mock_doc
+        )
+
+        database.update_participant("A123456", {"last_name": "Smith"})
+
+        saved = mock_db.collection.return_value.document.return_value.update.call_args[
+            0
+        ][0]
+        self.assertIn("john smith", saved["search_tokens"])
+        self.assertIn("test club", saved["search_tokens"])
+
+    @patch("database.db")
+    def test_update_participant_without_search_fields(self, mock_db):
+        database.update_participant("A123456", {"gender": "Male"})
+
+        mock_db.collection.return_value.document.return_value.get.assert_not_called()
+        saved = mock_db.collection.return_value.document.return_value.update.call_args[
+            0
+        ][0]
+        self.assertNotIn("search_tokens", saved)
+
+    @patch("database.db")
+    def test_rebuild_participant_search_index(self, mock_db):
+        current = {"first_name": "Jane", "last_name": "Roe", "club": "Club"}
+        up_to_date = Mock()
+        up_to_date.id = "A1"
+        up_to_date.to_dict.return_value = dict(
+            current, search_tokens=database.build_search_tokens("A1", current)
+        )
+        stale = Mock()
+        stale.id = "A2"
+        stale.to_dict.return_value = dict(current)
+        mock_db.collection.return_value.stream.return_value = [up_to_date, stale]
+        mock_writer = Mock()
+        mock_db.bulk_writer.return_value = mock_writer
+
+        updated = database.rebuild_participant_search_index()
+
+        self.assertEqual(updated, 1)
+        mock_writer.update.assert_called_once()
+        self.assertEqual(mock_writer.update.call_args[0][0], stale.reference)
+        mock_writer.close.assert_called_once()
+
     @patch("database.db")
     def test_get_participant(self, mock_db):
         mock_doc = Mock()
@@ -149,6 +467,111 @@ class TestDatabase(unittest.TestCase):
         mock_db.collection.return_value.document.assert_called_with("A123456")
         self.assertEqual(result["barcode"], "A123456")
 
+    @patch("database.db")
+    def test_get_participants_by_barcodes(self, mock_db):
+        def make_doc(barcode, exists=True):
+            doc = Mock()
+            doc.id = barcode
+            doc.exists = exists
+            doc.to_dict.return_value = {"first_name": f"Runner {barcode}"}
+            return doc
+
+        # Document references stand in as their barcode
+        mock_db.collection.return_value.document.side_effect = lambda b: b
+        mock_db.get_all.side_effect = lambda refs: [
+            make_doc(barcode, exists=barcode != "A3") for barcode in refs
+        ]
+
+        barcodes = [f"A{i}" for i in range(5)] + ["A0"]
+        result = database.get_participants_by_barcodes(barcodes, chunk_size=2)
+
+        # Duplicates are fetched once, in chunks of 2
+        self.assertEqual(mock_db.get_all.call_count, 3)
+        self.assertEqual(sorted(result), ["A0", "A1", "A2", "A4"])
+        self.assertEqual(result["A1"]["barcode"], "A1")
+        self.assertEqual(result["A1"]["first_name"], "Runner A1")
+
+    @patch("database.db")
+    def test_get_participants_by_barcodes_empty(self, mock_db):
+        self.assertEqual(database.get_participants_by_barcodes([]), {})
+        mock_db.get_all.assert_not_called()
+
+    @patch("database.get_participants_by_barcodes")
+    @patch("database.db")
+    def test_load_existing_participants_batched(self, mock_db, mock_get_many):
+        mock_count = Mock()
+        mock_count.value = 2500
+        mock_db.collection.return_value.count.return_value.get.return_value = [
+            [mock_count]
+        ]
+        mock_get_many.return_value = {"A123456": {"barcode": "A123456"}}
+
+        participants, reads = database.load_existing_participants(
+            ["A123456", "A654321"]
+        )
+
+        mock_get_many.assert_called_once()
+        mock_db.collection.return_value.stream.assert_not_called()
+        self.assertEqual(list(participants), ["A123456"])
+        # 3 reads for the count aggregation plus one per requested document
+        self.assertEqual(reads, 5)
+
+    @patch("database.get_participants_by_barcodes")
+    @patch("database.db")
+    def test_load_existing_participants_full_scan(self, mock_db, mock_get_many):
+        mock_count = Mock()
+        mock_count.value = 2
+        mock_db.collection.return_value.count.return_value.get.return_value = [
+            [mock_count]
+        ]
+        docs = []
+        for barcode in ["A123456", "A999999"]:
+            doc = Mock()
+            doc.id = barcode
+            doc.to_dict.return_value = {"first_name": "John"}
+            docs.append(doc)
+        mock_db.collection.return_value.stream.return_value = docs
+
+        participants, reads = database.load_existing_participants(["A123456"])
+
+        mock_get_many.assert_not_called()
+        self.assertEqual(
+            participants, {"A123456": {"first_name": "John", "barcode": "A123456"}}
+        )
+        self.assertEqual(reads, 3)
+
+    @patch("database.load_existing_participants")
+    def test_diff_participants(self, mock_load):
+        existing = {
+            "first_name": "John",
+            "last_name": "Doe",
+            "gender": "Male",
+            "date_of_birth": "1990-01-01",
+            "club": "Test Club",
+        }
+        mock_load.return_value = (
+            {
+                "A1": dict(existing, barcode="A1"),
+                "A2": dict(existing, barcode="A2"),
+            },
+            4,
+        )
+        records = [
+            dict(existing, barcode="A1"),
+            dict(existing, barcode="A2", club="Other Club"),
+            dict(existing, barcode="A3"),
+        ]
+
+        diff = database.diff_participants(records)
+
+        mock_load.assert_called_once_with(["A1", "A2", "A3"], 0.5)
+        self.assertEqual(diff["new"], [records[2]])
+        self.assertEqual(diff["updated"][0][0], "A2")
+        self.assertEqual(diff["updated"][0][1]["club"], "Other Club")
+        self.assertNotIn("barcode", diff["updated"][0][1])
+        self.assertEqual(diff["unchanged"], 1)
+        self.assertEqual(diff["reads"], 4)
+
     @patch("database.db")
     def test_add_club(self, mock_db):
         club_name = "New Club"
@@ -282,11 +705,13 @@ class TestDatabase(unittest.TestCase):
         ][0]
         self.assertNotIn("individual_results_best_of", call_args)
 
+    @patch("database.refresh_championship_standings")
     @patch("database.db")
-    def test_create_race(self, mock_db):
+    def test_create_race(self, mock_db, mock_refresh):
         database.create_race("2024 Season", "Test Race", {"date": "2024-01-01"})
 
         mock_db.collection.assert_called_with("season")
+        mock_refresh.assert_called_once_with("2024 Season", "Test Race")
 
     @patch("database.db")
     def test_get_race_results(self, mock_db):
@@ -323,8 +748,82 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]["name"], "Test Race")
 
+    @patch("database.get_race_results")
+    @patch("database.get_races_by_season")
+    def test_get_season_results(self, mock_get_races, mock_get_results):
+        mock_get_races.return_value = [
+            {"name": f"Race {i}", "date": f"2024-01-{i:02d}"} for i in range(1, 11)
+        ]
+
+        def slow_results(season_name, race_name):
+            # Earlier races finish last to prove ordering is preserved
+            time.sleep(0.002 * (10 - int(race_name.split()[1])))
+            return [{"finish_token": "P1", "race": race_name}]
+
+        mock_get_results.side_effect = slow_results
+
+        result = database.get_season_results("2024 Season", max_workers=4)
+
+        self.assertEqual(mock_get_results.call_count, 10)
+        self.assertEqual(
+            [entry["race"]["name"] for entry in result],
+            [f"Race {i}" for i in range(1, 11)],
+        )
+        for entry in result:
+            self.assertEqual(entry["results"][0]["race"], entry["race"]["name"])
+
+    @patch("database.get_race_results")
+    @patch("database.get_races_by_season")
+    def test_get_season_results_no_races(self, mock_get_races, mock_get_results):
+        mock_get_races.return_value = []
+
+        self.assertEqual(database.get_season_results("2024 Season"), [])
+        mock_get_results.assert_not_called()
+
+    @patch("database.get_race_results")
+    @patch("database.get_races_by_season")
+    def test_load_season_results(self, mock_get_races, mock_get_results):
+        mock_get_races.return_value = [{"name": "Race1"}, {"name": "Race2"}]
+        mock_get_results.side_effect = lambda season_name, race_name, **kwargs: [
+            {
+                "finish_token": "P1",
+                "participant": {"first_name": race_name, "club": "Club A"},
+            },
+            {"finish_token": "P2", "participant": {"first_name": "Jane"}},
+        ]
+
+        store = database.load_season_results("2024 Season")
+
+        self.assertEqual(store.races, mock_get_races.return_value)
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store.race.tolist(), [0, 0, 1, 1])
+        self.assertEqual(store.columns["club"].values, ["Club A", MISSING])
+        self.assertEqual(
+            store.results(1)[0],
+            {
+                "finish_token": "P1",
+                "participant": {"first_name": "Race2", "club": "Club A"},
+            },
+        )
+        mock_get_results.assert_called_with("2024 Season", "Race2")
+
+    @patch("database.get_race_results")
+    def test_get_results_for_races_orders_by_finish_token(self, mock_get_results):
+        # Results written before positions were stored have no position field
+        mock_get_results.return_value = [
+            {"finish_token": "P10", "position": 10},
+            {"finish_token": "P2"},
+            {"finish_token": "P1", "position": 1},
+        ]
+
+        (results,) = database.get_results_for_races("2024 Season", ["Race1"])
+
+        self.assertEqual([r["finish_token"] for r in results], ["P1", "P2", "P10"])
+        mock_get_results.assert_called_once_with("2024 Season", "Race1")
+
+    @patch("database.refresh_championship_standings")
     @patch("database.db")
-    def test_delete_race_result(self, mock_db):
+    def test_delete_race_result(self, mock_db, mock_refresh):
         database.delete_race_result("2024 Season", "Test Race", "1")
 
         mock_db.collection.assert_called_with("season")
@@ -347,6 +846,115 @@ class TestDatabase(unittest.TestCase):
         result = database.validate_and_normalize_club("Unknown Club", clubs)
         self.assertIsNone(result)
 
+    def test_position_from_token(self):
+        self.assertEqual(database.position_from_token("P1"), 1)
+        self.assertEqual(database.position_from_token("p0012"), 12)
+        self.assertIsNone(database.position_from_token("X1"))
+
+    @patch("database.db")
+    def test_get_race_results_by_position(self, mock_db):
+        results_ref = (
+            mock_db.collection.return_value.document.return_value.collection.return_value.document.return_value.collection.return_value
+        )
+        mock_result = Mock()
+        mock_result.id = "P1"
+        mock_result.to_dict.return_value = {"participant": {}, "position": 1}
+        results_ref.order_by.return_value.limit.return_value.get.return_value = [
+            mock_result
+        ]
+
+        result = database.get_race_results(
+            "2024 Season", "Test Race", order_by_position=True, limit=10
+        )
+
+        results_ref.order_by.assert_called_once_with("position")
+        results_ref.order_by.return_value.limit.assert_called_once_with(10)
+        self.assertEqual(
+            result, [{"participant": {}, "position": 1, "finish_token": "P1"}]
+        )
+
+    @patch("database.db")
+    def test_get_race_results_filtered(self, mock_db):
+        results_ref = (
+            mock_db.collection.return_value.document.return_value.collection.return_value.document.return_value.collection.return_value
+        )
+        query = results_ref.where.return_value.where.return_value
+        mock_result = Mock()
+        mock_result.id = "P3"
+        mock_result.to_dict.return_value = {
+            "participant": {"gender": "Female", "age_category": "V50"}
+        }
+        query.order_by.return_value.limit.return_value.get.return_value = [mock_result]
+
+        result = database.get_race_results(
+            "2024 Season",
+            "Test Race",
+            order_by_position=True,
+            limit=5,
+            gender="Female",
+            category="V50",
+        )
+
+        gender_filter = results_ref.where.call_args.kwargs["filter"]
+        category_filter = results_ref.where.return_value.where.call_args.kwargs[
+            "filter"
+        ]
+        self.assertEqual(
+            (gender_filter.field_path, gender_filter.value),
+            ("participant.gender", "Female"),
+        )
+        self.assertEqual(
+            (category_filter.field_path, category_filter.value),
+            ("participant.age_category", "V50"),
+        )
+        query.order_by.return_value.limit.assert_called_once_with(5)
+        self.assertEqual(result[0]["finish_token"], "P3")
+
+    @patch("database.get_race_results")
+    def test_get_top_race_results_reads_past_skipped_results(self, mock_get_results):
+        results = [{"finish_token": f"P{i}", "keep": i % 3 != 2} for i in range(1, 8)]
+        mock_get_results.side_effect = lambda *args, limit=None, **kwargs: results[
+            :limit
+        ]
+
+        top = database.get_top_race_results(
+            "2024 Season", "Test Race", 3, keep=lambda r: r["keep"]
+        )
+
+        self.assertEqual([r["finish_token"] for r in top], ["P1", "P3", "P4"])
+        self.assertEqual(
+            [c.kwargs["limit"] for c in mock_get_results.call_args_list], [3, 6]
+        )
+
+        # A race with too few kept results stops once it runs out of results
+        mock_get_results.reset_mock()
+        top = database.get_top_race_results(
+            "2024 Season", "Test Race", 6, keep=lambda r: r["keep"]
+        )
+        self.assertEqual(len(top), 5)
+        self.assertEqual(
+            [c.kwargs["limit"] for c in mock_get_results.call_args_list], [6, 12]
+        )
+
+    @patch("database.db")
+    def test_backfill_result_positions(self, mock_db):
+        current = Mock()
+        current.id = "P1"
+        current.to_dict.return_value = {"participant": {}, "position": 1}
+        missing = Mock()
+        missing.id = "P10"
+        missing.to_dict.return_value = {"participant": {}}
+        mock_db.collection_group.return_value.stream.return_value = [current, missing]
+        mock_writer = Mock()
+        mock_db.bulk_writer.return_value = mock_writer
+
+        updated = database.backfill_result_positions()
+
+        mock_db.collection_group.assert_called_with("results")
+        self.assertEqual(updated, 1)
+        mock_writer.update.assert_called_once_with(missing.reference, {"position": 10})
+        mock_writer.close.assert_called_once()
+
     def test_calculate_age_category(self):
         from datetime import datetime
 
@@ -372,6 +980,58 @@ class TestDatabase(unittest.TestCase):
         dob = datetime(1979, 1, 1)  # 45 years old
         self.assertEqual(database.calculate_age_category(season_date, dob, 10), "V40")
 
+    def test_calculate_age_category_parses_strings(self):
+        self.assertEqual(
+            database.calculate_age_category("2024-07-01", "1984-07-01"), "V40"
+        )
+        self.assertEqual(
+            database.calculate_age_category("2024-07-01", "1984-07-02"), "Senior"
+        )
+        with self.assertRaises(ValueError):
+            database.calculate_age_category("2024-07-01", "01/07/1984")
+
+    def test_calculate_age_categories(self):
+        from datetime import datetime
+
+        dobs = [
+            "1999-06-15",
+            "1984-07-01",
+            "1979-01-01",
+            "1939-01-01",
+            None,
+            "not a date",
+            datetime(1969, 6, 30),
+        ]
+
+        result = database.calculate_age_categories("2024-07-01", dobs)
+
+        self.assertEqual(
+            result, ["Senior", "V40", "V45", "V80", "Unknown", "Unknown", "V55"]
+        )
+        # Each known row matches the scalar calculation
+        for dob, category in zip(dobs, result):
+            if category != "Unknown":
+                self.assertEqual(
+                    database.calculate_age_category("2024-07-01", dob), category
+                )
+        self.assertEqual(
+            database.calculate_age_categories("2024-07-01", dobs[:3], 10),
+            ["Senior", "V40", "V40"],
+        )
+        self.assertEqual(database.calculate_age_categories("2024-07-01", []), [])
+
+    def test_calculate_age_categories_float_size_matches_scalar(self):
+        # Category sizes read back from Firestore can be floats
+        dobs = ["1999-06-15", "1984-07-01", "1978-01-01", "1939-01-01"]
+
+        result = database.calculate_age_categories("2024-07-01", dobs, 5.0)
+
+        self.assertEqual(result, ["Senior", "V40", "V45", "V80"])
+        self.assertEqual(
+            result,
+            [database.calculate_age_category("2024-07-01", dob, 5.0) for dob in dobs],
+        )
+
     @patch("database.db")
     @patch("database.firestore")
     def test_get_default_season(self, mock_firestore, mock_db):
@@ -470,8 +1130,9 @@ class TestDatabase(unittest.TestCase):
         result = database.get_season("Nonexistent Season")
         self.assertIsNone(result)
 
+    @patch("database.refresh_championship_standings")
     @patch("database.db")
-    def test_update_season(self, mock_db):
+    def test_update_season(self, mock_db, mock_refresh):
         data = {"age_category_size": 10, "is_default": True}
         database.update_season("2024 Season", data)
 
@@ -479,9 +1140,11 @@ class TestDatabase(unittest.TestCase):
         mock_db.collection.return_value.document.return_value.update.assert_called_with(
             data
         )
+        mock_refresh.assert_called_once_with("2024 Season", reuse_aggregates=True)
 
+    @patch("database.refresh_championship_standings")
     @patch("database.db")
-    def test_update_season_with_start_date(self, mock_db):
+    def test_update_season_with_start_date(self, mock_db, mock_refresh):
         data = {
             "age_category_size": 10,
             "is_default": False,
@@ -531,41 +1194,620 @@ class TestDatabase(unittest.TestCase):
 
         mock_db.collection.return_value.document.return_value.delete.assert_called_once()
 
+    @patch("database.refresh_championship_standings")
     @patch("database.db")
-    def test_add_race_result(self, mock_db):
+    def test_add_race_result(self, mock_db, mock_refresh):
         participant_data = {"first_name": "John", "last_name": "Doe"}
-        database.add_race_result("2024 Season", "Test Race", "1", participant_data)
+        transaction = self._mock_transaction(mock_db)
+
+        database.add_race_result("2024 Season", "Test Race", "P12", participant_data)
 
         mock_db.collection.assert_called_with("season")
+        transaction.set.assert_called_once_with(
+            ANY, {"participant": participant_data, "position": 12}
+        )
+        # Any results blob is dropped in the same transaction
+        transaction.delete.assert_called_once()
+        transaction._commit.assert_called_once()
+        mock_db.get_all.assert_called_once_with([ANY], transaction=transaction)
+        mock_refresh.assert_called_once_with("2024 Season", "Test Race")
+
+    def _blob_header(self, results, **overrides):
+        shards = database.encode_results_blob(results)
+        header = Mock()
+        header.exists = True
+        header.to_dict.return_value = {
+            "version": database.RESULTS_BLOB_VERSION,
+            "shards": len(shards),
+            "count": len(results),
+            "data": shards[0],
+            **overrides,
+        }
+        return header, shards
+
+    def test_results_blob_round_trip(self):
+        results = [
+            {"finish_token": f"P{i}", "position": i, "participant": {"n": i}}
+            for i in range(1, 200)
+        ]
 
+        with patch("database.RESULTS_BLOB_SHARD_SIZE", 64):
+            shards = database.encode_results_blob(results)
+
+        self.assertGreater(len(shards), 1)
+        decoded = database.decode_results_blob(shards)
+        self.assertEqual(
+            [r["finish_token"] for r in decoded],
+            sorted(r["finish_token"] for r in results),
+        )
+        self.assertEqual(
+            database.sort_results_by_position(decoded, limit=3),
+            results[:3],
+        )
+
+    @patch("database.RESULTS_BLOB", True)
+    @patch("database._results_blob_ref")
+    @patch("database.db")
+    def test_get_race_results_from_blob(self, mock_db, mock_blob_ref):
+        results = [
+            {"finish_token": "P1", "position": 1, "participant": {}},
+            {"finish_token": "P10", "position": 10, "participant": {}},
+            {"finish_token": "P2", "position": 2, "participant": {}},
+        ]
+        header, _ = self._blob_header(results)
+        mock_blob_ref.return_value.document.return_value.get.return_value = header
+
+        result = database.get_race_results(
+            "2024 Season", "Test Race", order_by_position=True, limit=2
+        )
+
+        self.assertEqual([r["finish_token"] for r in result], ["P1", "P2"])
+        mock_db.collection.assert_not_called()
+
+        # Filters are applied to the decoded blob
+        result = database.get_race_results("2024 Season", "Test Race", gender="Female")
+        self.assertEqual(result, [])
+
+    @patch("database.RESULTS_BLOB", True)
+    @patch("database._results_blob_ref")
+    @patch("database.db")
+    def test_get_race_results_stale_blob_falls_back(self, mock_db, mock_blob_ref):
+        header, _ = self._blob_header([{"finish_token": "P1"}], count=2)
+        mock_blob_ref.return_value.document.return_value.get.return_value = header
+        mock_result = Mock()
+        mock_result.id = "P1"
+        mock_result.to_dict.return_value = {"participant": {}}
+        mock_db.collection.return_value.document.return_value.collection.return_value.document.return_value.collection.return_value.get.return_value = [
+            mock_result
+        ]
+
+        result = database.get_race_results("2024 Season", "Test Race")
+
+        self.assertEqual(result, [{"participant": {}, "finish_token": "P1"}])
+
+    @patch("database.RESULTS_BLOB", True)
+    @patch("database.refresh_championship_standings")
+    @patch("database._results_blob_ref")
+    @patch("database.db")
+    def test_add_race_result_updates_blob(self, mock_db, mock_blob_ref, mock_refresh):
+        existing = [{"finish_token": "P1", "position": 1, "participant": {}}]
+        header, _ = self._blob_header(existing)
+        header_ref = mock_blob_ref.return_value.document.return_value
+        header_ref.get.return_value = header
+        transaction = self._mock_transaction(mock_db)
+
+        database.add_race_result("2024 Season", "Test Race", "P2", {"first_name": "J"})
+
+        # The blob is read in the transaction that rewrites it
+        header_ref.get.assert_called_once_with(transaction=transaction)
+        blob_writes = [
+            c.args[1] for c in transaction.set.call_args_list if "version" in c.args[1]
+        ]
+        self.assertEqual(len(blob_writes), 1)
+        self.assertEqual(blob_writes[0]["count"], 2)
+        self.assertEqual(
+            [
+                r["finish_token"]
+                for r in database.decode_results_blob([blob_writes[0]["data"]])
+            ],
+            ["P1", "P2"],
+        )
+        transaction.delete.assert_not_called()
+        transaction._commit.assert_called_once()
+
+    @patch("database.RESULTS_BLOB", True)
+    @patch("database.refresh_championship_standings")
+    @patch("database._results_blob_ref")
+    @patch("database.db")
+    def test_add_race_result_retries_on_conflict(
+        self, mock_db, mock_blob_ref, mock_refresh
+    ):
+        # Another writer adds P3 while this write is in flight
+        before, _ = self._blob_header([{"finish_token": "P1", "participant": {}}])
+        after, _ = self._blob_header(
+            [
+                {"finish_token": "P1", "participant": {}},
+                {"finish_token": "P3", "participant": {}},
+            ]
+        )
+        mock_blob_ref.return_value.document.return_value.get.side_effect = [
+            before,
+            after,
+        ]
+        transaction = self._mock_transaction(mock_db)
+        transaction._max_attempts = 2
+        transaction._commit.side_effect = [exceptions.Aborted("conflict"), []]
+
+        database.add_race_result("2024 Season", "Test Race", "P2", {"first_name": "J"})
+
+        blob_write = [
+            c.args[1] for c in transaction.set.call_args_list if "version" in c.args[1]
+        ][-1]
+        self.assertEqual(
+            [
+                r["finish_token"]
+                for r in database.decode_results_blob([blob_write["data"]])
+            ],
+            ["P1", "P2", "P3"],
+        )
+
+    @patch("database.RESULTS_BLOB", True)
+    @patch("database.rebuild_results_blob")
+    @patch("database.refresh_championship_standings")
+    @patch("database._results_blob_ref")
     @patch("database.db")
-    def test_delete_all_race_results(self, mock_db):
+    def test_add_race_results_stream_rebuilds_blob(
+        self, mock_db, mock_blob_ref, mock_refresh, mock_rebuild
+    ):
+        header, _ = self._blob_header([{"finish_token": "P1", "participant": {}}])
+        mock_blob_ref.return_value.document.return_value.get.return_value = header
+
+        database.add_race_results_stream(
+            "2024 Season",
+            "Test Race",
+            [[{"finish_token": "P2", "participant": {"first_name": "J"}}]],
+        )
+
+        # Rebuilt from the subcollection, not merged into the blob read first
+        mock_rebuild.assert_called_once_with("2024 Season", "Test Race")
+        mock_db.batch.assert_not_called()
+
+    @patch("database._results_blob_ref")
+    @patch("database.db")
+    def test_rebuild_results_blob(self, mock_db, mock_blob_ref):
+        mock_result = Mock()
+        mock_result.id = "P1"
+        mock_result.to_dict.return_value = {"participant": {}, "position": 1}
+        results_query = (
+            mock_db.collection.return_value.document.return_value.collection.return_value.document.return_value.collection.return_value
+        )
+        results_query.get.return_value = [mock_result]
+        transaction = self._mock_transaction(mock_db)
+
+        database.rebuild_results_blob("2024 Season", "Test Race")
+
+        results_query.get.assert_called_once_with(transaction=transaction)
+        (header,) = [c.args[1] for c in transaction.set.call_args_list]
+        self.assertEqual(header["count"], 1)
+        transaction._commit.assert_called_once()
+
+    @patch("database.refresh_championship_standings")
+    @patch("database.db")
+    def test_delete_all_race_results(self, mock_db, mock_refresh):
         mock_result = Mock()
         mock_result.reference = Mock()
         mock_db.collection.return_value.document.return_value.collection.return_value.document.return_value.collection.return_value.get.return_value = [
             mock_result
         ]
-        mock_batch = Mock()
-        mock_db.batch.return_value = mock_batch
+        mock_writer = Mock()
+        mock_db.bulk_writer.return_value = mock_writer
 
         database.delete_all_race_results("2024 Season", "Test Race")
 
-        mock_batch.delete.assert_called_with(mock_result.reference)
-        mock_batch.commit.assert_called_once()
+        mock_writer.delete.assert_any_call(mock_result.reference)
+        mock_writer.close.assert_called_once()
 
+    @patch("database.refresh_championship_standings")
     @patch("database.db")
-    def test_add_race_results_batch(self, mock_db):
+    def test_add_race_results_batch(self, mock_db, mock_refresh):
         results_data = [
             {"finish_token": "1", "participant": {"first_name": "John"}},
             {"finish_token": "2", "participant": {"first_name": "Jane"}},
         ]
-        mock_batch = Mock()
-        mock_db.batch.return_value = mock_batch
+        mock_writer = Mock()
+        mock_db.bulk_writer.return_value = mock_writer
 
         database.add_race_results_batch("2024 Season", "Test Race", results_data)
 
-        self.assertEqual(mock_batch.set.call_count, 2)
-        mock_batch.commit.assert_called_once()
+        self.assertEqual(mock_writer.set.call_count, 2)
+        mock_writer.close.assert_called_once()
+        mock_refresh.assert_called_once_with("2024 Season", "Test Race")
+
+    @patch("database.refresh_championship_standings")
+    @patch("database.db")
+    def test_add_race_results_stream_overlaps_writes(self, mock_db, mock_refresh):
+        mock_writer = Mock()
+        mock_db.bulk_writer.return_value = mock_writer
+        committed = threading.Event()
+        mock_writer.close.side_effect = committed.set
+
+        def chunks():
+            yield [{"finish_token": "P1", "participant": {"first_name": "John"}}]
+            # The first chunk is committed while the next is still produced
+            self.assertTrue(committed.wait(5))
+            yield [
+                {"finish_token": f"P{i}", "participant": {"first_name": "Jane"}}
+                for i in (2, 3)
+            ]
+
+        progress = Mock()
+        written = database.add_race_results_stream(
+            "2024 Season", "Test Race", chunks(), progress=progress
+        )
+
+        self.assertEqual(written, 3)
+        # Progress is reported as each chunk's writes complete
+        self.assertEqual([c.args[0] for c in progress.call_args_list], [1, 3])
+        self.assertEqual(mock_writer.set.call_count, 3)
+        self.assertEqual(mock_writer.close.call_count, 2)
+        mock_refresh.assert_called_once_with("2024 Season", "Test Race")
+        self.mock_bump_version.assert_called_once_with("season:2024 Season")
+
+    @patch("database.refresh_championship_standings")
+    @patch("database.db")
+    def test_add_race_results_stream_error_keeps_written_chunks(
+        self, mock_db, mock_refresh
+    ):
+        mock_writer = Mock()
+        mock_db.bulk_writer.return_value = mock_writer
+
+        def chunks():
+            yield [{"finish_token": "P1", "participant": {"first_name": "John"}}]
+            raise ValueError("bad upload")
+
+        with self.assertRaises(ValueError):
+            database.add_race_results_stream("2024 Season", "Test Race", chunks())
+
+        # Results already written still reach the standings and version
+        mock_writer.close.assert_called_once()
+        mock_refresh.assert_called_once_with("2024 Season", "Test Race")
+        self.mock_bump_version.assert_called_once()
+
+    @patch("database.refresh_championship_standings")
+    @patch("database.db")
+    def test_add_race_results_stream_empty(self, mock_db, mock_refresh):
+        written = database.add_race_results_stream("2024 Season", "Test Race", [[]])
+
+        self.assertEqual(written, 0)
+        mock_db.bulk_writer.assert_not_called()
+        mock_refresh.assert_not_called()
+
+    def _mock_season_refs(self, mock_db, season, races):
+        """Mock a season document, its races and its aggregate and standings refs"""
+        refs = {"races": Mock(), "race_aggregates": Mock(), "standings": Mock()}
+        for ref in refs.values():
+            ref.document.side_effect = lambda doc_id: doc_id
+            ref.list_documents.return_value = []
+            ref.stream.return_value = []
+        race_docs = []
+        for race in races:
+            race_doc = Mock()
+            race_doc.id = race["name"]
+            race_doc.to_dict.return_value = {
+                k: v for k, v in race.items() if k != "name"
+            }
+            race_docs.append(race_doc)
+        refs["races"].stream.return_value = race_docs
+        season_ref = mock_db.collection.return_value.document.return_value
+        season_ref.get.return_value = Mock(
+            exists=True, **{"to_dict.return_value": season}
+        )
+        season_ref.collection.side_effect = refs.__getitem__
+        return season_ref, refs["race_aggregates"], refs["standings"]
+
+    def _mock_transaction(self, mock_db):
+        """Make db.transaction() run the transactional function once"""
+        transaction = Mock(_max_attempts=1, _read_only=False)
+        mock_db.transaction.return_value = transaction
+        return transaction
+
+    def _stored_aggregate(self, race_name, results):
+        doc = Mock()
+        doc.id = race_name
+        doc.to_dict.return_value = championship.race_aggregate(results)
+        return doc
+
+    @patch("database._query_race_results")
+    @patch("database.get_races_by_season")
+    @patch("database.get_season")
+    @patch("database.db")
+    def test_refresh_championship_standings(
+        self, mock_db, mock_get_season, mock_get_races, mock_query_results
+    ):
+        mock_query_results.return_value = [
+            {
+                "finish_token": "P1",
+                "participant": {
+                    "first_name": "John",
+                    "last_name": "Doe",
+                    "gender": "Male",
+                    "age_category": "V40",
+                    "club": "Test Club",
+                },
+            }
+        ]
+        season_ref, aggregates_ref, standings_ref = self._mock_season_refs(
+            mock_db,
+            {"individual_results_best_of": 1},
+            [{"name": "Race1", "organising_clubs": []}],
+        )
+        stale_ref = Mock()
+        stale_ref.id = "individual-Male-V60"
+        standings_ref.list_documents.return_value = [stale_ref]
+        aggregates_ref.stream.return_value = [
+            self._stored_aggregate("Race1", []),
+            self._stored_aggregate("Deleted Race", []),
+        ]
+        transaction = self._mock_transaction(mock_db)
+
+        database.refresh_championship_standings("2024 Season")
+
+        # Everything folded is read in the transaction, not from the caches
+        mock_get_season.assert_not_called()
+        mock_get_races.assert_not_called()
+        season_ref.get.assert_called_once_with(transaction=transaction)
+        aggregates_ref.stream.assert_called_once_with(transaction=transaction)
+        mock_query_results.assert_called_once_with(
+            "2024 Season", "Race1", transaction=transaction
+        )
+        written = {c.args[0]: c.args[1] for c in transaction.set.call_args_list}
+        self.assertEqual(
+            set(written),
+            {
+                "Race1",
+                "team-Male-all",
+                "team-Female-all",
+                "individual-Male-all",
+                "individual-Female-all",
+                "individual-Male-V40",
+                "individual-Female-V40",
+            },
+        )
+        self.assertEqual(
+            written["Race1"]["teams"]["Male"],
+            [{"club": "Test Club", "finishers": 1, "positions": [1]}],
+        )
+        self.assertEqual(
+            written["individual-Male-V40"]["standings"][0]["name"], "John Doe"
+        )
+        self.assertEqual(
+            [c.args[0] for c in transaction.delete.call_args_list],
+            ["Deleted Race", stale_ref],
+        )
+        transaction._commit.assert_called_once()
+        mock_db.batch.assert_not_called()
+
+    @patch("database._query_race_results")
+    @patch("database.db")
+    def test_refresh_championship_standings_single_race(
+        self, mock_db, mock_query_results
+    ):
+        john = {"participant": {"first_name": "John", "gender": "Male", "club": "A"}}
+        mock_query_results.return_value = [{"finish_token": "P1", **john}]
+        _, aggregates_ref, _ = self._mock_season_refs(
+            mock_db,
+            {"individual_results_best_of": 2},
+            [
+                {"name": "Race1", "organising_clubs": []},
+                {"name": "Race2", "organising_clubs": []},
+            ],
+        )
+        aggregates_ref.stream.return_value = [
+            self._stored_aggregate("Race1", [john]),
+            self._stored_aggregate("Race2", []),
+        ]
+        transaction = self._mock_transaction(mock_db)
+
+        database.refresh_championship_standings("2024 Season", "Race2")
+
+        # Only the edited race is re-read; Race1 comes from its aggregate
+        mock_query_results.assert_called_once_with(
+            "2024 Season", "Race2", transaction=transaction
+        )
+        written = {c.args[0]: c.args[1] for c in transaction.set.call_args_list}
+        self.assertNotIn("Race1", written)
+        self.assertIn("Race2", written)
+        standing = written["individual-Male-all"]["standings"][0]
+        self.assertEqual(standing["race_positions"], {"Race1": 1, "Race2": 1})
+        self.assertEqual(standing["total_points"], 2)
+        transaction.delete.assert_not_called()
+
+    @patch("database._query_race_results")
+    @patch("database.db")
+    def test_refresh_championship_standings_reuses_aggregates(
+        self, mock_db, mock_query_results
+    ):
+        john = {"participant": {"first_name": "John", "gender": "Male", "club": "A"}}
+        _, aggregates_ref, _ = self._mock_season_refs(
+            mock_db,
+            {"individual_results_best_of": 1},
+            [{"name": "Race1", "organising_clubs": ["A"]}],
+        )
+        aggregates_ref.stream.return_value = [self._stored_aggregate("Race1", [john])]
+        transaction = self._mock_transaction(mock_db)
+
+        database.refresh_championship_standings("2024 Season", reuse_aggregates=True)
+
+        # No results are read, but standings are refolded with the new settings
+        mock_query_results.assert_not_called()
+        written = {c.args[0]: c.args[1] for c in transaction.set.call_args_list}
+        self.assertNotIn("Race1", written)
+        self.assertIn("team-Male-all", written)
+        self.assertEqual(
+            written["individual-Male-all"]["standings"][0]["race_positions"],
+            {"Race1": 1},
+        )
+
+    @patch("database.get_races_by_season")
+    def test_get_default_race(self, mock_get_races):
+        mock_get_races.return_value = [
+            {"name": "Race1", "date": "2024-01-01"},
+            {"name": "Race2", "date": "2024-02-01"},
+            {"name": "Race3", "date": "2999-01-01"},
+        ]
+
+        self.assertEqual(database.get_default_race("2024 Season"), "Race2")
+
+    @patch("database.load_season_results")
+    @patch("database.get_championship_standings")
+    def test_get_championship(self, mock_get_standings, mock_get_results):
+        mock_get_standings.return_value = {"championship_type": "team"}
+
+        result = database.get_championship("2024 Season", "team", "Male", "V40")
+
+        self.assertEqual(result, {"championship_type": "team"})
+        # Team standings are never split by category
+        mock_get_standings.assert_called_with("2024 Season", "team", "Male", None)
+        mock_get_results.assert_not_called()
+
+    @patch("database.load_season_results")
+    @patch("database.get_championship_standings")
+    def test_get_championship_no_races(self, mock_get_standings, mock_get_results):
+        mock_get_standings.return_value = None
+        mock_get_results.return_value = SeasonResults()
+
+        self.assertIsNone(database.get_championship("2024 Season", "team", "Male"))
+
+    @patch("database.get_season")
+    @patch("database.load_season_results")
+    @patch("database.db")
+    def test_get_individual_championships_live(
+        self, mock_db, mock_get_results, mock_get_season
+    ):
+        mock_db.collection.return_value.document.return_value.collection.return_value.where.return_value.get.return_value = (
+            []
+        )
+        mock_get_season.return_value = {"individual_results_best_of": 1}
+        mock_get_results.return_value = SeasonResults.from_results(
+            [
+                {
+                    "race": {"name": "Race1"},
+                    "results": [
+                        {
+                            "participant": {
+                                "first_name": "John",
+                                "gender": "Male",
+                                "age_category": "V40",
+                            }
+                        },
+                        {
+                            "participant": {
+                                "first_name": "Jane",
+                                "gender": "Female",
+                                "age_category": "Senior",
+                            }
+                        },
+                    ],
+                }
+            ]
+        )
+
+        result = database.get_individual_championships("2024 Season")
+
+        self.assertEqual(
+            [(c["gender"], c["category"]) for c in result],
+            [("Male", None), ("Male", "Senior"), ("Male", "V40")]
+            + [("Female", None), ("Female", "Senior"), ("Female", "V40")],
+        )
+        self.assertEqual(result[2]["standings"][0]["name"], "John")
+        self.assertEqual(result[1]["standings"], [])
+        mock_get_results.assert_called_once_with("2024 Season")
+
+    @patch("database.load_season_results")
+    @patch("database.db")
+    def test_get_individual_championships_materialised(self, mock_db, mock_get_results):
+        docs = []
+        for doc_id, category in [
+            ("individual-Female-all", None),
+            ("individual-Male-V40", "V40"),
+            ("individual-Male-all", None),
+        ]:
+            doc = Mock()
+            doc.id = doc_id
+            doc.to_dict.return_value = {"category": category}
+            docs.append(doc)
+        standings_ref = (
+            mock_db.collection.return_value.document.return_value.collection.return_value
+        )
+        standings_ref.where.return_value.get.return_value = docs
+
+        result = database.get_individual_championships("2024 Season")
+
+        self.assertEqual(
+            [(c["gender"], c["category"]) for c in result],
+            [("Male", None), ("Male", "V40"), ("Female", None)],
+        )
+        mock_get_results.assert_not_called()
+
+    @patch("database.db")
+    def test_get_championship_standings(self, mock_db):
+        mock_doc = Mock()
+        mock_doc.exists = True
+        mock_doc.to_dict.return_value = {"championship_type": "team"}
+        standings_ref = (
+            mock_db.collection.return_value.document.return_value.collection.return_value
+        )
+        standings_ref.document.return_value.get.return_value = mock_doc
+
+        result = database.get_championship_standings("2024 Season", "team", "Male")
+
+        standings_ref.document.assert_called_with("team-Male-all")
+        self.assertEqual(result, {"championship_type": "team"})
+
+    @patch("database.db")
+    def test_get_championship_standings_missing(self, mock_db):
+        mock_db.collection.return_value.document.return_value.collection.return_value.document.return_value.get.return_value.exists = (
+            False
+        )
+
+        self.assertIsNone(
+            database.get_championship_standings("2024 Season", "individual", "Male")
+        )
+
+    @patch("database.db")
+    def test_bulk_writer_retries_and_reports_failures(self, mock_db):
+        writer = mock_db.bulk_writer.return_value
+
+        def failure(code, attempts, path):
+            return Mock(
+                code=code,
+                attempts=attempts,
+                message="failed",
+                operation=Mock(reference=Mock(path=path)),
+            )
+
+        with (
+            self.assertRaises(database.BulkWriteError) as raised,
+            database.bulk_writer(max_attempts=3) as bulk,
+        ):
+            self.assertIs(bulk, writer)
+            on_error = writer.on_write_error.call_args[0][0]
+            # Contention is retried until the attempts run out
+            self.assertTrue(on_error(failure(10, 1, "participants/A1"), writer))
+            self.assertFalse(on_error(failure(10, 3, "participants/A2"), writer))
+            # Invalid arguments are never retried
+            self.assertFalse(on_error(failure(3, 0, "participants/A3"), writer))
+
+        writer.close.assert_called_once()
+        self.assertEqual(
+            [f["path"] for f in raised.exception.failures],
+            ["participants/A2", "participants/A3"],
+        )
+        options = mock_db.bulk_writer.call_args.kwargs["options"]
+        self.assertEqual(options.retry, database.BulkRetry.exponential)
+        # The rate ramps up from its initial value rather than staying there
+        self.assertEqual(options.initial_ops_per_second, 500)
+        self.assertGreater(options.max_ops_per_second, options.initial_ops_per_second)
 
     @patch("database.db")
     def test_process_participants_batch(self, mock_db):
@@ -575,14 +1817,14 @@ class TestDatabase(unittest.TestCase):
         updated_participants = [
             ("A654321", {"first_name": "Jane", "last_name": "Smith"})
         ]
-        mock_batch = Mock()
-        mock_db.batch.return_value = mock_batch
+        mock_writer = Mock()
+        mock_db.bulk_writer.return_value = mock_writer
 
         database.process_participants_batch(new_participants, updated_participants)
 
-        self.assertEqual(mock_batch.set.call_count, 1)
-        self.assertEqual(mock_batch.update.call_count, 1)
-        self.assertEqual(mock_batch.commit.call_count, 2)
+        self.assertEqual(mock_writer.set.call_count, 1)
+        self.assertEqual(mock_writer.update.call_count, 1)
+        mock_writer.close.assert_called_once()
 
     @patch("database.db")
     def test_init_running_clubs_empty(self, mock_db):
@@ -625,6 +1867,10 @@ class TestDatabase(unittest.TestCase):
 
     @patch("database.db")
     def test_get_participant_results(self, mock_db):
+        # Without a results index the collection group query is used
+        mock_db.collection.return_value.document.return_value.get.return_value.exists = (
+            False
+        )
         # Mock result document
         mock_result = Mock()
         mock_result.to_dict.return_value = {
@@ -636,21 +1882,29 @@ class TestDatabase(unittest.TestCase):
         }
         mock_result.id = "P0001"
         mock_result.reference.path = "season/2024/races/Race1/results/P0001"
+        mock_result.reference.parent.parent.path = "season/2024/races/Race1"
+
+        # A second result in the same race shares the parent race document
+        mock_result_2 = Mock()
+        mock_result_2.to_dict.return_value = {"participant": {}}
+        mock_result_2.id = "P0002"
+        mock_result_2.reference.path = "season/2024/races/Race1/results/P0002"
+        mock_result_2.reference.parent.parent.path = "season/2024/races/Race1"
 
         # Mock race document for date
         mock_race_doc = Mock()
         mock_race_doc.exists = True
+        mock_race_doc.reference.path = "season/2024/races/Race1"
         mock_race_doc.to_dict.return_value = {"date": "2024-01-15"}
 
         # Setup collection group query
         mock_db.collection_group.return_value.where.return_value.get.return_value = [
-            mock_result
+            mock_result,
+            mock_result_2,
         ]
 
-        # Setup race document query
-        mock_db.collection.return_value.document.return_value.collection.return_value.document.return_value.get.return_value = (
-            mock_race_doc
-        )
+        # Race documents are fetched in a single batched read
+        mock_db.get_all.return_value = [mock_race_doc]
 
         result = database.get_participant_results("A123456")
 
@@ -659,8 +1913,12 @@ class TestDatabase(unittest.TestCase):
         # Verify the filter parameter was used (new Firestore syntax)
         mock_db.collection_group.return_value.where.assert_called()
 
+        # Verify the parent race was fetched once, in one round trip
+        mock_db.get_all.assert_called_once()
+        self.assertEqual(len(mock_db.get_all.call_args[0][0]), 1)
+
         # Verify result structure
-        self.assertEqual(len(result), 1)
+        self.assertEqual(len(result), 2)
         self.assertEqual(result[0]["season"], "2024")
         self.assertEqual(result[0]["race_name"], "Race1")
         self.assertEqual(result[0]["race_date"], "2024-01-15")
@@ -669,6 +1927,9 @@ class TestDatabase(unittest.TestCase):
 
     @patch("database.db")
     def test_get_participant_results_no_results(self, mock_db):
+        mock_db.collection.return_value.document.return_value.get.return_value.exists = (
+            False
+        )
         # Mock empty collection group query
         mock_db.collection_group.return_value.where.return_value.get.return_value = []
 
@@ -679,6 +1940,352 @@ class TestDatabase(unittest.TestCase):
 
         # Verify empty result
         self.assertEqual(len(result), 0)
+        mock_db.get_all.assert_not_called()
+
+    @patch("database.db")
+    def test_get_participant_results_from_index(self, mock_db):
+        index_doc = Mock()
+        index_doc.exists = True
+        index_doc.to_dict.return_value = {
+            "results": {
+                "2024/Race1/P0002": {
+                    "season": "2024",
+                    "race_name": "Race1",
+                    "race_date": "2024-01-15",
+                    "finish_token": "P0002",
+                    "position": 2,
+                    "age_category": "V40",
+                    "club": "Club A",
+                },
+                "2024/Race2/P0007": {
+                    "season": "2024",
+                    "race_name": "Race2",
+                    "race_date": "2024-02-15",
+                    "finish_token": "P0007",
+                    "position": 7,
+                    "first_name": "John",
+                    "last_name": "Doe",
+                    "gender": "Male",
+                    "age_category": "V40",
+                    "club": "Club A",
+                },
+            }
+        }
+        mock_db.collection.return_value.document.return_value.get.return_value = (
+            index_doc
+        )
+
+        result = database.get_participant_results("A123456")
+
+        mock_db.collection.assert_called_with("participant_results")
+        mock_db.collection_group.assert_not_called()
+        self.assertEqual([r["race_name"] for r in result], ["Race2", "Race1"])
+        self.assertEqual(
+            result[0]["participant"],
+            {
+                "parkrun_barcode_id": "A123456",
+                "first_name": "John",
+                "last_name": "Doe",
+                "gender": "Male",
+                "age_category": "V40",
+                "club": "Club A",
+            },
+        )
+        # Entries indexed before names were stored keep the fields they have
+        self.assertEqual(
+            result[1]["participant"],
+            {"parkrun_barcode_id": "A123456", "age_category": "V40", "club": "Club A"},
+        )
+
+    @patch("database._race_date", return_value="2024-01-15")
+    @patch("database.refresh_championship_standings")
+    @patch("database.db")
+    def test_add_race_result_updates_participant_results(
+        self, mock_db, mock_refresh, mock_race_date
+    ):
+        # P0003 was previously recorded against another participant
+        previous = Mock()
+        previous.id = "P0003"
+        previous.exists = True
+        previous.to_dict.return_value = {
+            "participant": {"parkrun_barcode_id": "A111111"}
+        }
+        mock_db.get_all.return_value = [previous]
+        transaction = self._mock_transaction(mock_db)
+
+        database.add_race_result(
+            "2024",
+            "Race1",
+            "P0003",
+            {
+                "parkrun_barcode_id": "A123456",
+                "first_name": "Jane",
+                "last_name": "Doe",
+                "gender": "Female",
+                "age_category": "V40",
+                "club": "A",
+            },
+        )
+
+        index_writes = [
+            c for c in transaction.set.call_args_list if c.kwargs.get("merge")
+        ]
+        written = {
+            barcode: c.args[1]["results"]["2024/Race1/P0003"]
+            for barcode, c in zip(["A111111", "A123456"], index_writes)
+        }
+        self.assertIs(written["A111111"], database.firestore.DELETE_FIELD)
+        self.assertEqual(written["A123456"]["position"], 3)
+        self.assertEqual(written["A123456"]["race_date"], "2024-01-15")
+        self.assertEqual(
+            (written["A123456"]["first_name"], written["A123456"]["gender"]),
+            ("Jane", "Female"),
+        )
+        transaction._commit.assert_called_once()
+
+    @patch("database.db")
+    def test_backfill_participant_results(self, mock_db):
+        race = Mock()
+        race.reference.path = "season/2024/races/Race1"
+        race.to_dict.return_value = {"date": "2024-01-15"}
+        result = Mock()
+        result.id = "P0001"
+        result.reference.path = "season/2024/races/Race1/results/P0001"
+        result.to_dict.return_value = {
+            "participant": {"parkrun_barcode_id": "A123456", "club": "Club A"}
+        }
+        unscored = Mock()
+        unscored.id = "P0002"
+        unscored.reference.path = "season/2024/races/Race1/results/P0002"
+        unscored.to_dict.return_value = {"participant": {}}
+        mock_db.collection_group.side_effect = lambda name: Mock(
+            stream=Mock(return_value=[race] if name == "races" else [result, unscored])
+        )
+        registered = Mock()
+        registered.id = "A999999"
+        indexed = Mock()
+        indexed.id = "A888888"
+        mock_db.collection.return_value.list_documents.return_value = [
+            registered,
+            indexed,
+        ]
+        # A stored index with an outdated entry and one whose result has gone,
+        # and an empty one that is already up to date
+        outdated = Mock()
+        outdated.id = "A123456"
+        outdated.to_dict.return_value = {
+            "results": {
+                "2024/Race1/P0001": {"race_date": "2024-01-01"},
+                "2024/Race1/P0009": {"race_date": "2024-01-15"},
+            }
+        }
+        current = Mock()
+        current.id = "A888888"
+        current.to_dict.return_value = {"results": {}}
+        mock_db.collection.return_value.stream.return_value = [outdated, current]
+        mock_writer = Mock()
+        mock_db.bulk_writer.return_value = mock_writer
+
+        self.assertEqual(database.backfill_participant_results(), 2)
+
+        barcodes = [
+            c.args[0] for c in mock_db.collection.return_value.document.call_args_list
+        ]
+        written = {
+            barcode: c.args[1]
+            for barcode, c in zip(barcodes, mock_writer.set.call_args_list)
+        }
+        self.assertEqual(set(written), {"A123456", "A999999"})
+        results = written["A123456"]["results"]
+        entry = results["2024/Race1/P0001"]
+        self.assertEqual((entry["race_date"], entry["club"]), ("2024-01-15", "Club A"))
+        self.assertIs(results["2024/Race1/P0009"], database.firestore.DELETE_FIELD)
+        self.assertEqual(written["A999999"], {"results": {}})
+        # Entries are merged so ones written during the backfill are kept
+        self.assertTrue(all(c.kwargs["merge"] for c in mock_writer.set.call_args_list))
+
+    @patch("database.refresh_championship_standings")
+    @patch("database.db")
+    def test_create_race_date_change_reindexes_results(self, mock_db, mock_refresh):
+        race_ref = (
+            mock_db.collection.return_value.document.return_value.collection.return_value.document.return_value
+        )
+        previous = Mock()
+        previous.exists = True
+        previous.to_dict.return_value = {"date": "2024-01-15"}
+        race_ref.get.return_value = previous
+        mock_writer = Mock()
+        mock_db.bulk_writer.return_value = mock_writer
+
+        with patch("database._query_race_results") as mock_results:
+            mock_results.return_value = [
+                {
+                    "finish_token": "P0001",
+                    "participant": {"parkrun_barcode_id": "A123456"},
+                }
+            ]
+            database.create_race("2024", "Race1", {"date": "2024-01-22"})
+            # Unchanged dates leave the indexes alone
+            previous.to_dict.return_value = {"date": "2024-01-22"}
+            database.create_race("2024", "Race1", {"date": "2024-01-22"})
+
+        mock_results.assert_called_once_with("2024", "Race1")
+        mock_writer.set.assert_called_once()
+        entry = mock_writer.set.call_args.args[1]["results"]["2024/Race1/P0001"]
+        self.assertEqual(entry["race_date"], "2024-01-22")
+
+    @patch("database.db")
+    def test_race_date_reads_race_document(self, mock_db):
+        race = Mock()
+        race.exists = True
+        race.to_dict.return_value = {"date": "2024-01-22"}
+        race_ref = (
+            mock_db.collection.return_value.document.return_value.collection.return_value.document
+        )
+        race_ref.return_value.get.return_value = race
+
+        self.assertEqual(database._race_date("2024", "Race1"), "2024-01-22")
+        race_ref.assert_called_with("Race1")
+
+        race.exists = False
+        self.assertEqual(database._race_date("2024", "Race1"), "")
+
+
+class TestVersions(unittest.TestCase):
+
+    def setUp(self):
+        database.clear_caches()
+
+    @patch("database.db")
+    def test_bump_version(self, mock_db):
+        database.bump_version("clubs", database.season_version_scope("2024"))
+
+        documents = mock_db.collection.return_value.document
+        mock_db.collection.assert_called_with("versions")
+        self.assertEqual(
+            [c.args[0] for c in documents.call_args_list], ["clubs", "season:2024"]
+        )
+        self.assertEqual(documents.return_value.set.call_count, 2)
+        self.assertTrue(documents.return_value.set.call_args.kwargs["merge"])
+
+    @patch("database.db")
+    def test_create_job(self, mock_db):
+        mock_db.collection.return_value.document.return_value.id = "job-1"
+
+        job_id = database.create_job("upload_participants", {"filename": "a.csv"})
+
+        self.assertEqual(job_id, "job-1")
+        mock_db.collection.assert_called_with("jobs")
+        data = mock_db.collection.return_value.document.return_value.set.call_args[0][0]
+        self.assertEqual(data["status"], "queued")
+        self.assertEqual(data["params"], {"filename": "a.csv"})
+        self.assertEqual(data["progress"], {"parsed": 0, "written": 0, "rejected": 0})
+
+    @patch("database.db")
+    def test_update_and_get_job(self, mock_db):
+        document = mock_db.collection.return_value.document
+        database.update_job("job-1", {"status": "done"})
+
+        document.assert_called_with("job-1")
+        data = document.return_value.update.call_args[0][0]
+        self.assertEqual(data["status"], "done")
+        self.assertIn("updated_at", data)
+
+        mock_doc = Mock()
+        mock_doc.exists = True
+        mock_doc.id = "job-1"
+        mock_doc.to_dict.return_value = {"status": "done"}
+        document.return_value.get.return_value = mock_doc
+        self.assertEqual(database.get_job("job-1"), {"id": "job-1", "status": "done"})
+
+        mock_doc.exists = False
+        self.assertIsNone(database.get_job("job-1"))
+
+    @patch("database.db")
+    def test_get_versions(self, mock_db):
+        stored = Mock()
+        stored.id = "clubs"
+        stored.exists = True
+        stored.to_dict.return_value = {"version": 3, "updated_at": None}
+        missing = Mock()
+        missing.id = "seasons"
+        missing.exists = False
+        mock_db.get_all.return_value = [stored, missing]
+
+        result = database.get_versions("clubs", "seasons")
+
+        self.assertEqual(
+            result,
+            {
+                "clubs": {"version": 3, "updated_at": None},
+                "seasons": {"version": 0, "updated_at": None},
+            },
+        )
+
+    @patch("database.db")
+    def test_version_change_drops_reference_caches(self, mock_db):
+        season_doc = Mock()
+        season_doc.exists = True
+        season_doc.to_dict.return_value = {"age_category_size": 5}
+        season_get = mock_db.collection.return_value.document.return_value.get
+        season_get.return_value = season_doc
+        version = Mock()
+        version.id = "seasons"
+        version.exists = True
+        version.to_dict.return_value = {"version": 1, "updated_at": None}
+        mock_db.get_all.return_value = [version]
+
+        def read_versions():
+            database.invalidate_cache("versions")
+            database.get_versions("seasons")
+
+        database.get_season("2024")
+        read_versions()
+        database.get_season("2024")
+        self.assertEqual(season_get.call_count, 2)
+
+        # An unchanged version keeps the cached season
+        read_versions()
+        database.get_season("2024")
+        self.assertEqual(season_get.call_count, 2)
+
+        # A write on another instance moves the version on
+        version.to_dict.return_value = {"version": 2, "updated_at": None}
+        read_versions()
+        database.get_season("2024")
+        self.assertEqual(season_get.call_count, 3)
+
+    @patch("database.db")
+    def test_writers_bump_versions(self, mock_db):
+        with patch("database.bump_version") as mock_bump:
+            database.add_club("New Club")
+            database.create_race("2024", "Race1", {})
+
+        self.assertEqual(
+            [c.args for c in mock_bump.call_args_list], [("clubs",), ("seasons",)]
+        )
+
+
+class TestMigrate(unittest.TestCase):
+    def test_run_named_migration(self):
+        rebuild = Mock(return_value=3)
+        with patch.dict(
+            migrate.MIGRATIONS, {"search-index": (rebuild, "participant search tokens")}
+        ):
+            self.assertEqual(migrate.main(["search-index"]), 0)
+            self.assertEqual(migrate.run(["search-index"]), {"search-index": 3})
+        self.assertEqual(rebuild.call_count, 2)
+
+    def test_run_all_migrations(self):
+        migrations = {name: (Mock(return_value=0), name) for name in migrate.MIGRATIONS}
+        with patch.dict(migrate.MIGRATIONS, migrations):
+            migrate.main(["all"])
+        for migration, _ in migrations.values():
+            migration.assert_called_once_with()
+
+    def test_unknown_migration(self):
+        with self.assertRaises(SystemExit):
+            migrate.main(["unknown"])
 
 
 if __name__ == "__main__":
@@ -247,6 +247,8 @@ resource "google_cloud_run_service" "app" {
       annotations = {
         "run.googleapis.com/execution-environment" = "gen2"
         "run.googleapis.com/startup-cpu-boost"     = "true"
+        # Keep CPU allocated between requests for background upload jobs
+        "run.googleapis.com/cpu-throttling" = "false"
       }
     }
 
@@ -447,6 +449,8 @@ resource "google_cloud_run_service" "admin" {
       annotations = {
         "run.googleapis.com/execution-environment" = "gen2"
         "run.googleapis.com/startup-cpu-boost"     = "true"
+        # Keep CPU allocated between requests for background upload jobs
+        "run.googleapis.com/cpu-throttling" = "false"
       }
     }
 